@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+Benchmark script for Pegasus Lacak Nomor
+Measures lookup performance offline against a local stub API endpoint
+
+Usage:
+    python benchmark.py [lookup|cache|batch|db|compact|snapshot|import|stats] [iterations]
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import tempfile
+import threading
+import contextlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from colorama import Fore, Style, init
+
+init()
+
+
+def default_responder(path, params, body):
+    """Answer every lookup with a small JSON record echoing the target."""
+    target = (params.get('phone') or params.get('nik') or [''])[0]
+    return 200, {}, {'name': 'Stub User', 'city': 'Jakarta', 'target': target}
+
+
+def start_stub_server(responder=default_responder):
+    """
+    Start a keep-alive HTTP stub API on a free local port
+
+    Args:
+        responder: callable(path, params, body) -> (status, headers, payload)
+
+    Returns:
+        (server, base_url); call server.shutdown() when done
+    """
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def _respond(self, body=None):
+            parsed = urlparse(self.path)
+            status, headers, payload = responder(parsed.path, parse_qs(parsed.query), body)
+            data = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            for key, value in headers.items():
+                self.send_header(key, str(value))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            self._respond()
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            raw = self.rfile.read(length) if length else b''
+            self._respond(json.loads(raw) if raw else None)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+@contextlib.contextmanager
+def patched_config(module, **overrides):
+    """Temporarily override module-level config constants."""
+    saved = {name: getattr(module, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(module, name, value)
+
+
+def timed_lookups(lookup, targets):
+    """Run lookup() over targets with output silenced, return seconds per call."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for target in targets:
+            lookup(target)
+        elapsed = time.perf_counter() - start
+    return elapsed / len(targets)
+
+
+def bench_lookup(iterations=200):
+    """Per-lookup wall time: fresh clients per call vs the shared LookupService."""
+    from utils import api_client
+
+    server, base_url = start_stub_server()
+    tmpdir = tempfile.TemporaryDirectory()
+    db_path = os.path.join(tmpdir.name, 'bench.db')
+    targets = [f"0812{i:08d}" for i in range(iterations)]
+
+    overrides = dict(
+        API_ENABLED=True, DATABASE_ENABLED=True, CACHE_RESULTS=False,
+        RATE_LIMIT_ENABLED=False, REQUEST_DELAY=0,
+        API_KEYS={'primary': 'bench-key', 'secondary': ''},
+        API_ENDPOINTS={'phone_lookup': f"{base_url}/v1/phone/lookup"},
+    )
+    try:
+        with patched_config(api_client, **overrides):
+            # Before: every lookup built its own APIClient and DatabaseClient
+            before = timed_lookups(
+                lambda t: api_client.LookupService(db_path).lookup(t), targets)
+            with contextlib.redirect_stdout(io.StringIO()):
+                service = api_client.LookupService(db_path)
+            after = timed_lookups(service.lookup, targets)
+    finally:
+        server.shutdown()
+        tmpdir.cleanup()
+
+    print(f"{Fore.CYAN}[*] Lookup benchmark ({iterations} lookups, local stub API){Style.RESET_ALL}")
+    print(f"    Per-call clients : {before * 1000:8.3f} ms/lookup")
+    print(f"    Shared service   : {after * 1000:8.3f} ms/lookup")
+    print(f"{Fore.GREEN}[✓] Speedup: {before / after:.1f}x{Style.RESET_ALL}")
+    return before, after
+
+
+def bench_cache_restart(iterations=100, latency_ms=20):
+    """Lookup latency on a cold start vs a restart with a warm persistent cache."""
+    from utils import api_client
+
+    def slow_responder(path, params, body):
+        # Stand in for a remote provider's round trip
+        time.sleep(latency_ms / 1000)
+        return default_responder(path, params, body)
+
+    server, base_url = start_stub_server(slow_responder)
+    tmpdir = tempfile.TemporaryDirectory()
+    cache_path = os.path.join(tmpdir.name, 'cache.db')
+    targets = [f"0812{i:08d}" for i in range(iterations)]
+
+    def fresh_process_cache():
+        # A restart keeps only what is on disk: empty L1, same L2 file
+        return api_client.TieredCache(api_client.ResultCache(),
+                                      api_client.PersistentCache(cache_path))
+
+    overrides = dict(
+        API_ENABLED=True, CACHE_RESULTS=True, RATE_LIMIT_ENABLED=False, REQUEST_DELAY=0,
+        API_KEYS={'primary': 'bench-key', 'secondary': ''},
+        API_ENDPOINTS={'phone_lookup': f"{base_url}/v1/phone/lookup"},
+    )
+    try:
+        with patched_config(api_client, **overrides):
+            client = api_client.APIClient()
+            with patched_config(api_client, result_cache=fresh_process_cache()):
+                cold = timed_lookups(client.lookup_phone, targets)
+            with patched_config(api_client, result_cache=fresh_process_cache()):
+                warm = timed_lookups(client.lookup_phone, targets)
+    finally:
+        server.shutdown()
+        tmpdir.cleanup()
+
+    print(f"{Fore.CYAN}[*] Restart benchmark ({iterations} lookups, {latency_ms} ms stub latency){Style.RESET_ALL}")
+    print(f"    Cold start (API)      : {cold * 1000:8.3f} ms/lookup")
+    print(f"    Warm start (L2 cache) : {warm * 1000:8.3f} ms/lookup")
+    print(f"{Fore.GREEN}[✓] Speedup: {cold / warm:.1f}x{Style.RESET_ALL}")
+    return cold, warm
+
+
+def bench_batch(iterations=100, latency_ms=20, workers=8):
+    """Batch wall time: sequential lookups vs the concurrent batch engine."""
+    from utils import api_client
+
+    def slow_responder(path, params, body):
+        time.sleep(latency_ms / 1000)
+        return default_responder(path, params, body)
+
+    server, base_url = start_stub_server(slow_responder)
+    tmpdir = tempfile.TemporaryDirectory()
+    db_path = os.path.join(tmpdir.name, 'bench.db')
+    targets = [f"0812{i:08d}" for i in range(iterations)]
+
+    overrides = dict(
+        API_ENABLED=True, DATABASE_ENABLED=True, CACHE_RESULTS=False,
+        NEGATIVE_CACHE_ENABLED=False, RATE_LIMIT_ENABLED=False, REQUEST_DELAY=0,
+        API_KEYS={'primary': 'bench-key', 'secondary': ''},
+        API_ENDPOINTS={'phone_lookup': f"{base_url}/v1/phone/lookup"},
+    )
+    try:
+        with patched_config(api_client, **overrides), contextlib.redirect_stdout(io.StringIO()):
+            service = api_client.LookupService(db_path)
+            # Half of the batch is already in the local database
+            for target in targets[::2]:
+                service.db_client.add_phone_record({'phone_number': target, 'name': 'Local User'})
+
+            start = time.perf_counter()
+            for target in targets:
+                service.lookup(target)
+            sequential = time.perf_counter() - start
+
+            start = time.perf_counter()
+            service.batch_lookup(targets, workers=workers)
+            concurrent = time.perf_counter() - start
+    finally:
+        server.shutdown()
+        tmpdir.cleanup()
+
+    print(f"{Fore.CYAN}[*] Batch benchmark ({iterations} targets, 50% local hits, "
+          f"{latency_ms} ms stub latency){Style.RESET_ALL}")
+    print(f"    Sequential          : {sequential:8.3f} s")
+    print(f"    Concurrent ({workers} workers): {concurrent:8.3f} s")
+    print(f"{Fore.GREEN}[✓] Speedup: {sequential / concurrent:.1f}x{Style.RESET_ALL}")
+    return sequential, concurrent
+
+
+def populate_phone_records(db_path, rows, chunk=50000):
+    """Fill phone_records with synthetic rows (0812 + zero-padded index)."""
+    import sqlite3
+    from utils.db_schema import apply_schema, configure_connection, rebuild_aggregates
+
+    conn = configure_connection(sqlite3.connect(db_path))
+    apply_schema(conn)
+    with conn:
+        for start in range(0, rows, chunk):
+            conn.executemany(
+                'INSERT INTO phone_records (phone_number, name, address, city, province, operator, last_updated) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                ((f"0812{i:08d}", f"User {i}", f"Jalan {i}", "Jakarta", "DKI Jakarta",
+                  "Telkomsel", "2025-01-01 00:00:00")
+                 for i in range(start, min(start + chunk, rows)))
+            )
+        # Raw inserts bypass upsert_rows, so recount the summaries once
+        rebuild_aggregates(conn, 'phone_records')
+    conn.close()
+
+
+def bench_db_lookups(rows=1000000, lookups=100000):
+    """Point lookups per second: connection per query vs persistent tuned connection."""
+    import random
+    import sqlite3
+    from utils import api_client
+
+    tmpdir = tempfile.TemporaryDirectory()
+    db_path = os.path.join(tmpdir.name, 'bench.db')
+    rng = random.Random(42)
+    targets = [f"0812{rng.randrange(rows):08d}" for _ in range(lookups)]
+
+    try:
+        start = time.perf_counter()
+        populate_phone_records(db_path, rows)
+        populate = time.perf_counter() - start
+
+        # Before: a new connection per query, as DatabaseClient used to do
+        old_targets = targets[:min(lookups, 10000)]
+        start = time.perf_counter()
+        for target in old_targets:
+            conn = sqlite3.connect(db_path)
+            conn.execute('SELECT * FROM phone_records WHERE phone_number = ?', (target,)).fetchone()
+            conn.close()
+        before = len(old_targets) / (time.perf_counter() - start)
+
+        with patched_config(api_client, DATABASE_ENABLED=True):
+            client = api_client.DatabaseClient(db_path)
+            start = time.perf_counter()
+            for target in targets:
+                client.query_phone(target)
+            after = lookups / (time.perf_counter() - start)
+            client.close()
+    finally:
+        tmpdir.cleanup()
+
+    print(f"{Fore.CYAN}[*] Database benchmark ({rows:,} rows, populated in {populate:.1f}s){Style.RESET_ALL}")
+    print(f"    Connection per query : {before:12,.0f} lookups/s")
+    print(f"    Persistent connection: {after:12,.0f} lookups/s")
+    print(f"{Fore.GREEN}[✓] Speedup: {after / before:.1f}x{Style.RESET_ALL}")
+    return before, after
+
+
+def bench_compact_schema(rows=1000000, lookups=100000):
+    """File size and point-lookup rate: rowid + UNIQUE index vs WITHOUT ROWID layout."""
+    import random
+    import sqlite3
+    from utils import api_client
+    from utils.db_schema import compact_table, configure_connection
+
+    tmpdir = tempfile.TemporaryDirectory()
+    db_path = os.path.join(tmpdir.name, 'bench.db')
+    rng = random.Random(42)
+    targets = [f"0812{rng.randrange(rows):08d}" for _ in range(lookups)]
+
+    def measure():
+        conn = sqlite3.connect(db_path)
+        conn.execute('VACUUM')
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        conn.close()
+        size = os.path.getsize(db_path)
+        client = api_client.DatabaseClient(db_path)
+        start = time.perf_counter()
+        for target in targets:
+            client.query_phone(target)
+        rate = lookups / (time.perf_counter() - start)
+        client.close()
+        return size, rate
+
+    try:
+        populate_phone_records(db_path, rows)
+        with patched_config(api_client, DATABASE_ENABLED=True):
+            before_size, before_rate = measure()
+            conn = configure_connection(sqlite3.connect(db_path))
+            compact_table(conn, 'phone_records')
+            conn.close()
+            after_size, after_rate = measure()
+    finally:
+        tmpdir.cleanup()
+
+    print(f"{Fore.CYAN}[*] Schema layout benchmark ({rows:,} rows, {lookups:,} lookups){Style.RESET_ALL}")
+    print(f"    Rowid + UNIQUE index : {before_size / 1024 / 1024:8.1f} MB {before_rate:12,.0f} lookups/s")
+    print(f"    WITHOUT ROWID        : {after_size / 1024 / 1024:8.1f} MB {after_rate:12,.0f} lookups/s")
+    print(f"{Fore.GREEN}[✓] Size: {after_size / before_size:.0%} of original, "
+          f"lookups {after_rate / before_rate:.2f}x{Style.RESET_ALL}")
+    return (before_size, before_rate), (after_size, after_rate)
+
+
+def bench_snapshot(rows=1000000, lookups=100000):
+    """Point lookups per second: SQLite vs the memory-mapped lookup snapshot."""
+    import random
+    import sqlite3
+    from utils import api_client
+    from utils.snapshot import build_snapshot, snapshot_path
+
+    tmpdir = tempfile.TemporaryDirectory()
+    db_path = os.path.join(tmpdir.name, 'bench.db')
+    rng = random.Random(42)
+    targets = [f"0812{rng.randrange(rows):08d}" for _ in range(lookups)]
+
+    def lookups_per_second(snapshot_enabled):
+        with patched_config(api_client, DATABASE_ENABLED=True,
+                            DATABASE_SNAPSHOT_ENABLED=snapshot_enabled):
+            client = api_client.DatabaseClient(db_path)
+            start = time.perf_counter()
+            for target in targets:
+                client.query_phone(target)
+            rate = lookups / (time.perf_counter() - start)
+            client.close()
+        return rate
+
+    try:
+        populate_phone_records(db_path, rows)
+        conn = sqlite3.connect(db_path)
+        start = time.perf_counter()
+        build_snapshot(conn, 'phone_records', snapshot_path(db_path, 'phone_records'))
+        build = time.perf_counter() - start
+        conn.close()
+
+        before = lookups_per_second(False)
+        after = lookups_per_second(True)
+    finally:
+        tmpdir.cleanup()
+
+    print(f"{Fore.CYAN}[*] Snapshot benchmark ({rows:,} rows, snapshot built in {build:.1f}s){Style.RESET_ALL}")
+    print(f"    SQLite B-tree        : {before:12,.0f} lookups/s")
+    print(f"    Memory-mapped snapshot: {after:12,.0f} lookups/s")
+    print(f"{Fore.GREEN}[✓] Speedup: {after / before:.1f}x{Style.RESET_ALL}")
+    return before, after
+
+
+def bench_parallel_import(rows=2000000, workers=0):
+    """Import wall time for a large CSV: serial importer vs parallel parse + single writer."""
+    from utils import database_manager
+
+    workers = workers or os.cpu_count() or 1
+    tmpdir = tempfile.TemporaryDirectory()
+    csv_file = os.path.join(tmpdir.name, 'records.csv')
+    database_manager.generate_dataset(csv_file, 'phone_records', rows)
+
+    def timed(func, *args, **kwargs):
+        db_path = os.path.join(tmpdir.name, f"{func.__name__}.db")
+        with patched_config(database_manager, DATABASE_PATH=db_path), \
+                contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            func(csv_file, *args, **kwargs)
+            return time.perf_counter() - start
+
+    try:
+        serial = timed(database_manager.import_from_csv, resume=False)
+        parallel = timed(database_manager.import_parallel, workers=workers)
+    finally:
+        tmpdir.cleanup()
+
+    print(f"{Fore.CYAN}[*] Parallel import benchmark ({rows:,} CSV rows, "
+          f"{workers} parser processes, {os.cpu_count()} CPUs){Style.RESET_ALL}")
+    print(f"    Serial importer      : {serial:8.2f} s ({rows / serial:10,.0f} rows/s)")
+    print(f"    Parallel + 1 writer  : {parallel:8.2f} s ({rows / parallel:10,.0f} rows/s)")
+    print(f"{Fore.GREEN}[✓] Speedup: {serial / parallel:.1f}x{Style.RESET_ALL}")
+    return serial, parallel
+
+
+def bench_aggregates(rows=1000000, iterations=20):
+    """Per-dimension summary time: GROUP BY over phone_records vs the record_stats table."""
+    import sqlite3
+    from utils import database_manager
+    from utils.db_schema import AGGREGATE_DIMENSIONS, _dimension_sql
+
+    tmpdir = tempfile.TemporaryDirectory()
+    db_path = os.path.join(tmpdir.name, 'bench.db')
+    dimensions = AGGREGATE_DIMENSIONS['phone_records']
+
+    def per_summary(query):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            for dimension in dimensions:
+                query(dimension)
+        return (time.perf_counter() - start) / iterations
+
+    try:
+        populate_phone_records(db_path, rows)
+        conn = sqlite3.connect(db_path)
+        scan = per_summary(lambda dimension: conn.execute(
+            f"SELECT {_dimension_sql(dimension)}, COUNT(*) FROM phone_records GROUP BY 1"
+        ).fetchall())
+        stats = per_summary(lambda dimension: database_manager.aggregate_counts(
+            conn, 'phone_records', dimension))
+        conn.close()
+    finally:
+        tmpdir.cleanup()
+
+    print(f"{Fore.CYAN}[*] Aggregate benchmark ({rows:,} rows, "
+          f"{len(dimensions)} dimensions per summary){Style.RESET_ALL}")
+    print(f"    GROUP BY scan  : {scan * 1000:10.3f} ms/summary")
+    print(f"    record_stats   : {stats * 1000:10.3f} ms/summary")
+    print(f"{Fore.GREEN}[✓] Speedup: {scan / stats:.0f}x{Style.RESET_ALL}")
+    return scan, stats
+
+
+BENCHMARKS = {
+    'lookup': bench_lookup,
+    'cache': bench_cache_restart,
+    'batch': bench_batch,
+    'db': bench_db_lookups,
+    'compact': bench_compact_schema,
+    'snapshot': bench_snapshot,
+    'import': bench_parallel_import,
+    'stats': bench_aggregates,
+}
+
+
+def main():
+    """Run the selected benchmark (or all of them)."""
+    name = sys.argv[1] if len(sys.argv) > 1 else 'all'
+    args = [int(arg) for arg in sys.argv[2:]]
+
+    if name == 'all':
+        for bench in BENCHMARKS.values():
+            bench()
+    elif name in BENCHMARKS:
+        BENCHMARKS[name](*args)
+    else:
+        print(f"{Fore.RED}[!] Unknown benchmark '{name}'. Choose from: {', '.join(BENCHMARKS)}{Style.RESET_ALL}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
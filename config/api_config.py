@@ -33,7 +33,21 @@ API_ENDPOINTS = {
     "phone_lookup": "https://api.example.com/v1/phone/lookup",
     "nik_lookup": "https://api.example.com/v1/nik/lookup",
     "operator_check": "https://api.example.com/v1/operator/check",
-    "location_lookup": "https://api.example.com/v1/location/lookup"
+    "location_lookup": "https://api.example.com/v1/location/lookup",
+    # Endpoint bulk (opsional) - kosongkan jika provider tidak mendukung
+    "phone_bulk_lookup": "",
+    "nik_bulk_lookup": ""
+}
+
+# Format request/response untuk endpoint bulk (dipakai oleh batch search)
+# Request : POST {"phones": ["0812...", ...]}
+# Response: {"results": [{"phone_number": "0812...", ...}, ...]}
+#           atau {"results": {"0812...": {...}, ...}}
+BULK_LOOKUP = {
+    "batch_size": 50,  # maksimal target per request
+    "request_key": {"phone": "phones", "nik": "niks"},
+    "results_key": "results",
+    "id_field": {"phone": "phone_number", "nik": "nik"}
 }
 
 # ============================================================================
@@ -42,6 +56,19 @@ API_ENDPOINTS = {
 
 API_TIMEOUT = 10  # seconds - timeout untuk request
 MAX_API_RETRIES = 3  # jumlah retry jika request gagal
+CONNECTION_POOL_SIZE = 10  # jumlah koneksi keep-alive per host yang dipakai ulang
+
+# Retry dengan exponential backoff + jitter
+RETRY_BACKOFF_BASE = 1  # jeda retry pertama (seconds), berlipat dua tiap percobaan
+RETRY_BACKOFF_MAX = 30  # batas maksimal jeda retry (seconds)
+
+# Circuit breaker per endpoint: berhenti memanggil endpoint yang sedang down
+CIRCUIT_BREAKER_THRESHOLD = 5  # jumlah kegagalan berturut-turut sebelum endpoint diblokir
+CIRCUIT_BREAKER_RESET = 60  # detik sebelum endpoint dicoba lagi (half-open)
+
+# Endpoint cadangan untuk API key "secondary" (opsional, key sama dengan API_ENDPOINTS)
+# Jika kosong, key secondary dipakai pada endpoint utama
+API_ENDPOINTS_SECONDARY = {}
 
 # ============================================================================
 # DATABASE SETTINGS (Local Data)
@@ -50,6 +77,18 @@ MAX_API_RETRIES = 3  # jumlah retry jika request gagal
 # Set ke True jika ingin menggunakan database lokal
 DATABASE_ENABLED = False
 DATABASE_PATH = "data/local_database.db"
+DATABASE_CACHE_SIZE_KB = 65536  # page cache SQLite per koneksi (64 MB)
+DATABASE_BUSY_TIMEOUT_MS = 5000  # tunggu lock database sebelum error (ms)
+# Layani lookup dari snapshot read-only (memory-mapped) jika sudah dibuat
+# lewat database_manager; miss tetap dicek ke database SQLite
+DATABASE_SNAPSHOT_ENABLED = False
+
+# Simpan hasil API yang berhasil ke database lokal lewat satu thread penulis
+# di background (batch per transaksi, tidak memblokir lookup)
+DATABASE_WRITE_THROUGH = False
+WRITE_THROUGH_BATCH_SIZE = 500  # record per transaksi
+WRITE_THROUGH_FLUSH_INTERVAL = 1.0  # detik maksimal record menunggu di antrian
+WRITE_THROUGH_QUEUE_SIZE = 10000  # antrian penuh = record dilewati, lookup tidak menunggu
 
 # ============================================================================
 # FEATURE TOGGLES
@@ -68,6 +107,11 @@ ENABLE_SOCIAL_MEDIA_SCAN = False  # Scan social media (requires special API)
 RATE_LIMIT_ENABLED = True
 MAX_REQUESTS_PER_MINUTE = 10  # maksimal 10 request per menit
 REQUEST_DELAY = 1  # jeda antar request (seconds)
+# Sesuaikan pacing dengan header X-RateLimit-* / Retry-After dari provider
+ADAPTIVE_RATE_LIMIT = True
+# Batas jeda dari header Retry-After / X-RateLimit-Reset, agar nilai aneh tidak memblokir lama
+RATE_LIMIT_MAX_PAUSE = 300  # seconds
+RATE_LIMIT_ACQUIRE_TIMEOUT = 600  # maksimal menunggu slot rate limit sebelum request dibatalkan (seconds)
 
 # ============================================================================
 # CACHING
@@ -76,6 +120,18 @@ REQUEST_DELAY = 1  # jeda antar request (seconds)
 # Cache hasil untuk mengurangi API calls
 CACHE_RESULTS = True
 CACHE_DURATION = 3600  # cache selama 1 jam (3600 seconds)
+CACHE_MAX_ENTRIES = 1000  # jumlah maksimal entry di cache memori (LRU)
+CACHE_MAX_BYTES = 10 * 1024 * 1024  # batas ukuran cache memori (10 MB)
+CACHE_SWEEP_INTERVAL = 300  # interval pembersihan entry kadaluarsa (seconds)
+
+# Cache persisten (L2) agar hasil tetap tersedia setelah aplikasi di-restart
+PERSISTENT_CACHE_ENABLED = True
+PERSISTENT_CACHE_PATH = "data/cache.db"
+
+# Cache hasil "tidak ditemukan" dari provider (bukan error koneksi)
+NEGATIVE_CACHE_ENABLED = True
+NEGATIVE_CACHE_DURATION = 600  # lebih pendek dari CACHE_DURATION (10 menit)
+NEGATIVE_CACHE_MAX_ENTRIES = 5000
 
 # ============================================================================
 # PRIVACY & COMPLIANCE
@@ -23,6 +23,7 @@ MAX_HISTORY_ITEMS = 50
 # Batch Search Settings
 BATCH_INPUT_FILE = "batch_search.txt"
 MAX_BATCH_SIZE = 100
+BATCH_WORKERS = 4  # jumlah lookup paralel saat batch search
 
 # New Features Settings
 QUICK_SEARCH_MODE = False
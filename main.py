@@ -10,7 +10,7 @@ from config.settings import (
     LOADING_ANIMATION_ITERATIONS, VALID_PHONE_PREFIX,
     NIK_LENGTH, MAX_HISTORY_ITEMS, BATCH_INPUT_FILE,
     MAX_BATCH_SIZE, QUICK_SEARCH_MODE, MAX_FAVORITES,
-    PHONE_OPERATORS
+    PHONE_OPERATORS, BATCH_WORKERS
 )
 from config.api_config import (
     API_ENABLED, REQUIRE_CONSENT,
@@ -25,7 +25,7 @@ from utils.helpers import (
     generate_social_media, draw_ascii_chart, filter_history_by_date,
     filter_history_by_location, filter_history_by_gender, export_to_report
 )
-from utils.api_client import perform_real_lookup, APIClient
+from utils.api_client import perform_real_lookup, get_lookup_service
 
 # Initialize colorama
 init()
@@ -171,8 +171,7 @@ def normalize_api_response(api_data, target):
     
     # Detect operator for phone numbers
     if target.startswith('08') and 'Operator' not in normalized:
-        api_client = APIClient()
-        operator = api_client.check_operator(target)
+        operator = get_lookup_service().check_operator(target)
         if operator:
             normalized['Operator'] = operator
     
@@ -301,18 +300,22 @@ def batch_search():
     
     time.sleep(1)
     
-    results = []
-    for i, target in enumerate(numbers, 1):
-        print_colored(f"\n[{i}/{len(numbers)}] Mencari: {target}", "INFO")
-        
-        if not validate_input(target, VALID_PHONE_PREFIX, NIK_LENGTH):
+    valid_targets = []
+    for target in numbers:
+        if validate_input(target, VALID_PHONE_PREFIX, NIK_LENGTH):
+            valid_targets.append(target)
+        else:
             print_colored(f"[!] Melewati nomor tidak valid: {target}", "ERROR")
-            continue
+    
+    # Lookups run concurrently; results come back in input order
+    results = []
+    timings = {}
+    lookups = get_lookup_service().iter_batch(valid_targets, workers=BATCH_WORKERS, timings=timings)
+    for i, (target, api_result) in enumerate(lookups, 1):
+        print_colored(f"\n[{i}/{len(valid_targets)}] Mencari: {target}", "INFO")
         
         result = None
         
-        # Perform real tracking
-        api_result = perform_real_lookup(target)
         if api_result:
             result = normalize_api_response(api_result, target)
             result["Source"] = "API/Database"
@@ -327,9 +330,17 @@ def batch_search():
             # Show brief result for batch
             print_colored(f"    Nama: {result.get('Nama', 'N/A')}", "INFO")
             print_colored(f"    Kota: {result.get('Kota/Town', 'N/A')}", "INFO")
-            time.sleep(0.3)
     
     print_colored(f"\n[✓] Batch search selesai! {len(results)}/{len(numbers)} berhasil.", "SUCCESS")
+    if timings:
+        print_colored(f"    Database : {timings['database_hits']} ditemukan ({timings['database']:.3f}s)", "INFO")
+        print_colored(f"    Cache    : {timings['cache_hits']} ditemukan ({timings['cache']:.3f}s)", "INFO")
+        print_colored(f"    API      : {timings['remote_lookups']} dicari ({timings['remote']:.3f}s)", "INFO")
+    writer = get_lookup_service().writer
+    if writer is not None:
+        stats = writer.stats()
+        print_colored(f"    Disimpan : {stats['written']} ke database, {stats['queued']} antri, "
+                      f"{stats['dropped']} dilewati", "INFO")
     
     if results:
         choice = input(f"\n{Fore.YELLOW}[?] Export semua hasil? (y/n): {Style.RESET_ALL}")
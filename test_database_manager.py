@@ -0,0 +1,870 @@
+#!/usr/bin/env python3
+"""
+Test script for the Database Manager
+Tests bulk import/export and maintenance against temporary databases
+"""
+
+import io
+import os
+import csv
+import sys
+import gzip
+import json
+import sqlite3
+import builtins
+import tempfile
+import threading
+import contextlib
+from colorama import Fore, Style, init
+
+from benchmark import patched_config
+from utils import database_manager, db_schema
+
+init()
+
+def print_test(message, status="INFO"):
+    """Print test message with color."""
+    colors = {
+        "INFO": Fore.CYAN,
+        "SUCCESS": Fore.GREEN,
+        "ERROR": Fore.RED,
+        "WARNING": Fore.YELLOW
+    }
+    color = colors.get(status, Fore.WHITE)
+    symbol = {
+        "INFO": "[*]",
+        "SUCCESS": "[✓]",
+        "ERROR": "[✗]",
+        "WARNING": "[!]"
+    }
+    print(f"{color}{symbol[status]} {message}{Style.RESET_ALL}")
+
+@contextlib.contextmanager
+def temp_database():
+    """Point database_manager at a fresh database in a temporary directory."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'test.db')
+        with patched_config(database_manager, DATABASE_PATH=path):
+            yield tmpdir, path
+
+def quietly(func, *args, **kwargs):
+    """Call func with stdout silenced."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args, **kwargs)
+
+def phone_record(i):
+    return {
+        'phone_number': f"0812{i:08d}",
+        'name': f"User {i}",
+        'address': f"Jalan {i}",
+        'city': 'Jakarta',
+        'province': 'DKI Jakarta',
+        'operator': 'Telkomsel'
+    }
+
+def nik_record(i):
+    return {
+        'nik': f"3171{i:012d}",
+        'name': f"Warga {i}",
+        'birth_date': '1990-01-01',
+        'gender': 'L' if i % 2 else 'P',
+        'address': f"Jalan {i}",
+        'city': 'Jakarta',
+        'province': 'DKI Jakarta'
+    }
+
+def count_rows(path, table):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+    finally:
+        conn.close()
+
+def test_json_import():
+    """Test streaming JSON array and JSON Lines import."""
+    print_test("Testing streaming JSON import...", "INFO")
+
+    try:
+        with temp_database() as (tmpdir, path):
+            records = [phone_record(i) for i in range(2500)] + [{'name': 'No Phone'}, 42]
+
+            array_file = os.path.join(tmpdir, 'records.json')
+            with open(array_file, 'w', encoding='utf-8') as f:
+                json.dump(records, f, indent=4)
+
+            with patched_config(database_manager, JSON_READ_SIZE=256):
+                stats = quietly(database_manager.import_records,
+                                database_manager.iter_json_records(array_file), chunk_size=1000)
+            if stats['imported'] == 2500 and stats['rejected'] == 2 and count_rows(path, 'phone_records') == 2500:
+                print_test("✓ JSON array streamed in chunks, invalid rows rejected", "SUCCESS")
+            else:
+                print_test(f"JSON array import off: {stats}", "ERROR")
+                return False
+
+            lines_file = os.path.join(tmpdir, 'records.jsonl')
+            with open(lines_file, 'w', encoding='utf-8') as f:
+                for i in range(2500, 3000):
+                    f.write(json.dumps(phone_record(i)) + "\n")
+                f.write("{not json\n")
+
+            if quietly(database_manager.import_from_json, lines_file) and count_rows(path, 'phone_records') == 3000:
+                print_test("✓ JSON Lines imported", "SUCCESS")
+            else:
+                print_test("JSON Lines import failed", "ERROR")
+                return False
+
+            # A malformed element is rejected and the reader resyncs after it
+            broken_file = os.path.join(tmpdir, 'broken.json')
+            elements = [json.dumps(phone_record(i)) for i in range(3000, 3600)]
+            elements[10] = '{"phone_number": "081299999999", "name": oops, "tags": ["a, b", {"c": "]"}]}'
+            with open(broken_file, 'w', encoding='utf-8') as f:
+                f.write('[\n' + ',\n'.join(elements) + '\n]')
+            with patched_config(database_manager, JSON_READ_SIZE=256, JSON_MAX_ELEMENT_SIZE=4096):
+                stats = quietly(database_manager.import_records,
+                                database_manager.iter_json_records(broken_file))
+            if stats['inserted'] == 599 and stats['rejected'] == 1:
+                print_test("✓ Malformed array element rejected, remaining elements imported", "SUCCESS")
+            else:
+                print_test(f"Malformed element handling off: {stats}", "ERROR")
+                return False
+
+            # An element that never closes stops the read instead of buffering the file
+            with open(broken_file, 'w', encoding='utf-8') as f:
+                f.write('[' + json.dumps(phone_record(1)) + ', {"name": "unterminated')
+                f.write(' padding' * 2000 + '"}]')
+            try:
+                with patched_config(database_manager, JSON_READ_SIZE=256, JSON_MAX_ELEMENT_SIZE=4096):
+                    list(database_manager.iter_json_records(broken_file))
+                print_test("Oversized element was buffered", "ERROR")
+                return False
+            except ValueError as e:
+                if 'character' not in str(e):
+                    print_test(f"Oversized element error lacks an offset: {e}", "ERROR")
+                    return False
+                print_test("✓ Oversized element aborts with its offset", "SUCCESS")
+
+        return True
+    except Exception as e:
+        print_test(f"JSON import test failed: {e}", "ERROR")
+        return False
+
+def test_csv_import():
+    """Test buffered CSV import, resume from a saved offset and index rebuild."""
+    print_test("Testing CSV bulk import...", "INFO")
+
+    try:
+        with temp_database() as (tmpdir, path):
+            csv_file = os.path.join(tmpdir, 'records.csv')
+            with open(csv_file, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=database_manager.PHONE_COLUMNS)
+                writer.writeheader()
+                for i in range(3000):
+                    record = phone_record(i)
+                    # Quoted newlines must not be split across batches
+                    record['address'] = f"Jalan {i}\nRT 01, \"Blok A\""
+                    writer.writerow(record)
+
+            batches = list(database_manager.iter_csv_batches(csv_file, read_size=4096))
+            rows = sum(len(records) for records, _ in batches)
+            addresses_ok = all(r['address'].endswith('"Blok A"') for records, _ in batches for r in records)
+            if len(batches) > 1 and rows == 3000 and addresses_ok:
+                print_test(f"✓ Parsed in {len(batches)} batches without splitting rows", "SUCCESS")
+            else:
+                print_test(f"CSV batching off: {len(batches)} batches, {rows} rows", "ERROR")
+                return False
+
+            # Pretend a previous run committed the first batch and was interrupted
+            first_records, first_offset = batches[0]
+            with open(csv_file + '.offset', 'w', encoding='utf-8') as f:
+                f.write(str(first_offset))
+
+            conn = sqlite3.connect(path)
+            database_manager.apply_schema(conn)
+            conn.execute('CREATE INDEX idx_phone_city ON phone_records (city)')
+            conn.commit()
+            conn.close()
+
+            ok = quietly(database_manager.import_from_csv, csv_file,
+                         rebuild_indexes=True, read_size=4096)
+            if ok and count_rows(path, 'phone_records') == 3000 - len(first_records) \
+                    and not os.path.exists(csv_file + '.offset'):
+                print_test("✓ Resumed from saved offset and cleared checkpoint", "SUCCESS")
+            else:
+                print_test("CSV resume failed", "ERROR")
+                return False
+
+            conn = sqlite3.connect(path)
+            index = conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND name = 'idx_phone_city'"
+            ).fetchone()
+            conn.close()
+            if index:
+                print_test("✓ Secondary index rebuilt after load", "SUCCESS")
+            else:
+                print_test("Secondary index missing after load", "ERROR")
+                return False
+
+        return True
+    except Exception as e:
+        print_test(f"CSV import test failed: {e}", "ERROR")
+        return False
+
+def test_streaming_export():
+    """Test streaming export to JSON, JSON Lines and CSV, plain and gzipped."""
+    print_test("Testing streaming export...", "INFO")
+
+    try:
+        with temp_database() as (tmpdir, path):
+            quietly(database_manager.import_records, (phone_record(i) for i in range(1200)))
+            conn = sqlite3.connect(path)
+            conn.execute("INSERT INTO nik_records (nik, name) VALUES ('3171234567890123', 'Budi')")
+            conn.commit()
+            cursor = conn.execute('SELECT id, phone_number, name, address, city, province, '
+                                  'operator, last_updated FROM phone_records')
+            columns = [column[0] for column in cursor.description]
+            expected = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            conn.close()
+
+            json_file = os.path.join(tmpdir, 'out.json')
+            with patched_config(database_manager, EXPORT_ARRAYSIZE=100):
+                ok = quietly(database_manager.export_to_json, json_file)
+            with open(json_file, encoding='utf-8') as f:
+                text = f.read()
+            if ok and text == json.dumps(expected, indent=4, ensure_ascii=False):
+                print_test("✓ Pretty JSON matches a full json.dump", "SUCCESS")
+            else:
+                print_test("Pretty JSON export differs", "ERROR")
+                return False
+
+            jsonl_file = os.path.join(tmpdir, 'out.jsonl.gz')
+            quietly(database_manager.export_records, jsonl_file)
+            with gzip.open(jsonl_file, 'rt', encoding='utf-8') as f:
+                lines = [json.loads(line) for line in f]
+            csv_file = os.path.join(tmpdir, 'out.csv')
+            quietly(database_manager.export_records, csv_file)
+            with open(csv_file, encoding='utf-8', newline='') as f:
+                csv_rows = list(csv.DictReader(f))
+            if lines == expected and len(csv_rows) == 1200 and csv_rows[5]['name'] == 'User 5':
+                print_test("✓ Gzipped JSON Lines and CSV exported", "SUCCESS")
+            else:
+                print_test("JSON Lines/CSV export differs", "ERROR")
+                return False
+
+            nik_file = os.path.join(tmpdir, 'nik.json')
+            stats = database_manager.export_table(nik_file, 'nik_records')
+            with open(nik_file, encoding='utf-8') as f:
+                niks = json.load(f)
+            if stats['exported'] == 1 and niks[0]['nik'] == '3171234567890123':
+                print_test("✓ nik_records exported", "SUCCESS")
+            else:
+                print_test("nik_records export failed", "ERROR")
+                return False
+
+        return True
+    except Exception as e:
+        print_test(f"Streaming export test failed: {e}", "ERROR")
+        return False
+
+def test_nik_import():
+    """Test JSON Lines and CSV import into nik_records."""
+    print_test("Testing nik_records import...", "INFO")
+
+    try:
+        with temp_database() as (tmpdir, path):
+            lines_file = os.path.join(tmpdir, 'nik.jsonl')
+            with open(lines_file, 'w', encoding='utf-8') as f:
+                for i in range(1500):
+                    f.write(json.dumps(nik_record(i)) + "\n")
+                f.write(json.dumps({'name': 'No NIK'}) + "\n")
+
+            stats = quietly(database_manager.import_records,
+                            database_manager.iter_json_records(lines_file),
+                            chunk_size=500, table='nik_records')
+            if stats['imported'] == 1500 and stats['rejected'] == 1 and stats['rows_per_second'] > 0 \
+                    and count_rows(path, 'nik_records') == 1500 and count_rows(path, 'phone_records') == 0:
+                print_test("✓ NIK JSON Lines imported in batches", "SUCCESS")
+            else:
+                print_test(f"NIK JSON Lines import off: {stats}", "ERROR")
+                return False
+
+            csv_file = os.path.join(tmpdir, 'nik.csv')
+            with open(csv_file, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=database_manager.NIK_COLUMNS)
+                writer.writeheader()
+                for i in range(1000, 2000):
+                    writer.writerow(nik_record(i))
+
+            ok = quietly(database_manager.import_from_csv, csv_file, table='nik_records')
+            conn = sqlite3.connect(path)
+            gender = conn.execute('SELECT gender FROM nik_records WHERE nik = ?',
+                                  (nik_record(1999)['nik'],)).fetchone()
+            conn.close()
+            if ok and count_rows(path, 'nik_records') == 2000 and gender == ('L',):
+                print_test("✓ NIK CSV imported and merged on nik", "SUCCESS")
+            else:
+                print_test("NIK CSV import failed", "ERROR")
+                return False
+
+            if not quietly(database_manager.import_from_json, lines_file, table='no_such_table'):
+                print_test("✓ Unknown table rejected", "SUCCESS")
+            else:
+                print_test("Unknown table accepted", "ERROR")
+                return False
+
+        return True
+    except Exception as e:
+        print_test(f"NIK import test failed: {e}", "ERROR")
+        return False
+
+def test_upsert_import():
+    """Test that re-imports only touch changed rows and keep ids stable."""
+    print_test("Testing upsert re-import...", "INFO")
+
+    try:
+        with temp_database() as (tmpdir, path):
+            # Start from a version 1 database to exercise the migration
+            conn = sqlite3.connect(path)
+            for statement in db_schema.SCHEMA_MIGRATIONS[0]:
+                conn.execute(statement)
+            conn.execute("INSERT INTO phone_records (phone_number, name) VALUES ('081200000000', 'Old')")
+            conn.execute('PRAGMA user_version = 1')
+            conn.commit()
+            conn.close()
+
+            first = quietly(database_manager.import_records, (phone_record(i) for i in range(1000)))
+            conn = sqlite3.connect(path)
+            ids = dict(conn.execute('SELECT phone_number, id FROM phone_records'))
+            conn.close()
+            if (first['inserted'], first['updated'], first['unchanged']) == (999, 1, 0):
+                print_test("✓ Migrated v1 database and upserted first import", "SUCCESS")
+            else:
+                print_test(f"First import counts off: {first}", "ERROR")
+                return False
+
+            def changed(i):
+                record = phone_record(i)
+                if i % 10 == 0:
+                    record['city'] = 'Bandung'
+                return record
+
+            second = quietly(database_manager.import_records, (changed(i) for i in range(1100)))
+            conn = sqlite3.connect(path)
+            new_ids = dict(conn.execute('SELECT phone_number, id FROM phone_records'))
+            city = conn.execute("SELECT city FROM phone_records WHERE phone_number = '081200000010'").fetchone()
+            conn.close()
+            counts = (second['inserted'], second['updated'], second['unchanged'])
+            if counts == (100, 100, 900) and city == ('Bandung',) \
+                    and all(new_ids[key] == value for key, value in ids.items()):
+                print_test("✓ Only the delta was written, ids unchanged", "SUCCESS")
+            else:
+                print_test(f"Re-import counts off: {counts}", "ERROR")
+                return False
+
+        return True
+    except Exception as e:
+        print_test(f"Upsert import test failed: {e}", "ERROR")
+        return False
+
+def test_compact_migration():
+    """Test converting to the WITHOUT ROWID layout keeps data and lookups working."""
+    print_test("Testing compact schema migration...", "INFO")
+
+    try:
+        from utils import api_client
+
+        with temp_database() as (tmpdir, path):
+            quietly(database_manager.import_records, (phone_record(i) for i in range(500)))
+            quietly(database_manager.import_records, (nik_record(i) for i in range(100)), table='nik_records')
+            conn = sqlite3.connect(path)
+            conn.execute('CREATE INDEX idx_phone_city ON phone_records (city)')
+            conn.commit()
+            conn.close()
+
+            ok = quietly(database_manager.migrate_to_compact)
+            conn = sqlite3.connect(path)
+            compact = all(db_schema.is_compact(conn, table) for table in db_schema.TABLE_COLUMNS)
+            index = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'idx_phone_city'").fetchone()
+            conn.close()
+            if ok and compact and index and count_rows(path, 'phone_records') == 500 \
+                    and count_rows(path, 'nik_records') == 100:
+                print_test("✓ Tables rebuilt WITHOUT ROWID, rows and indexes kept", "SUCCESS")
+            else:
+                print_test("Compact migration failed", "ERROR")
+                return False
+
+            stats = quietly(database_manager.import_records, (phone_record(i) for i in range(550)))
+            with patched_config(api_client, DATABASE_ENABLED=True):
+                client = api_client.DatabaseClient(path)
+                record = client.query_phone(phone_record(7)['phone_number'])
+                nik = client.query_nik(nik_record(3)['nik'])
+                client.close()
+            if (stats['inserted'], stats['unchanged']) == (50, 500) \
+                    and record['name'] == 'User 7' and nik['name'] == 'Warga 3':
+                print_test("✓ Upserts and point lookups work on the compact layout", "SUCCESS")
+            else:
+                print_test("Compact layout reads/writes failed", "ERROR")
+                return False
+
+        return True
+    except Exception as e:
+        print_test(f"Compact migration test failed: {e}", "ERROR")
+        return False
+
+def test_keyset_pagination():
+    """Test keyset paging forwards/backwards and the cheap record count."""
+    print_test("Testing keyset pagination...", "INFO")
+
+    try:
+        with temp_database() as (tmpdir, path):
+            quietly(database_manager.import_records, (phone_record(i) for i in range(95)))
+            conn = sqlite3.connect(path)
+
+            pages = [database_manager.fetch_page(conn, 'phone_records', page_size=10)]
+            while True:
+                page = database_manager.fetch_page(conn, 'phone_records', after=pages[-1][-1][0], page_size=10)
+                if not page:
+                    break
+                pages.append(page)
+            keys = [row[0] for page in pages for row in page]
+            back = database_manager.fetch_page(conn, 'phone_records', before=pages[3][0][0], page_size=10)
+            if len(pages) == 10 and keys == sorted(phone_record(i)['phone_number'] for i in range(95)) \
+                    and back == pages[2]:
+                print_test("✓ Paged 95 rows forwards and back by key", "SUCCESS")
+            else:
+                print_test("Keyset pages are wrong", "ERROR")
+                return False
+
+            estimate = database_manager.estimate_count(conn, 'phone_records')
+            conn.execute('ANALYZE')
+            conn.commit()
+            analyzed = database_manager.estimate_count(conn, 'phone_records')
+            conn.close()
+            if estimate == (95, True) and analyzed == (95, True) \
+                    and database_manager._page_size("1; DROP TABLE phone_records") == 10:
+                print_test("✓ Count read without COUNT(*), bad page size ignored", "SUCCESS")
+            else:
+                print_test(f"Count estimate off: {estimate}, {analyzed}", "ERROR")
+                return False
+
+            # Re-imports and a clear leave rowids and ANALYZE figures behind
+            quietly(database_manager.import_records, (phone_record(i) for i in range(1000)))
+            quietly(database_manager.import_records, (dict(phone_record(i), name='Renamed') for i in range(1000)))
+            with patched_config(builtins, input=lambda prompt: 'yes'):
+                quietly(database_manager.clear_database)
+            quietly(database_manager.import_records, (phone_record(i) for i in range(10)))
+            conn = sqlite3.connect(path)
+            cleared = database_manager.estimate_count(conn, 'phone_records')
+            stale = conn.execute("SELECT COUNT(*) FROM sqlite_stat1 WHERE tbl = 'phone_records'").fetchone()[0]
+            conn.close()
+            if cleared == (10, True) and stale == 0:
+                print_test("✓ Count stays exact after deletes and a clear", "SUCCESS")
+            else:
+                print_test(f"Count after clear off: {cleared}, {stale} stale stat rows", "ERROR")
+                return False
+
+        return True
+    except Exception as e:
+        print_test(f"Keyset pagination test failed: {e}", "ERROR")
+        return False
+
+def test_lookup_snapshot():
+    """Test building a snapshot and serving DatabaseClient lookups from it."""
+    print_test("Testing memory-mapped lookup snapshot...", "INFO")
+
+    try:
+        from utils import api_client
+        from utils.snapshot import Snapshot, snapshot_path
+
+        with temp_database() as (tmpdir, path):
+            quietly(database_manager.import_records, (phone_record(i) for i in range(0, 2000, 2)))
+            quietly(database_manager.import_records, (nik_record(i) for i in range(50)), table='nik_records')
+            # A shorter key exercises the NUL padding order
+            quietly(database_manager.import_records, [{'phone_number': '0812', 'name': 'Short'}])
+
+            ok = quietly(database_manager.build_snapshots)
+            snapshot = Snapshot(snapshot_path(path, 'phone_records'))
+            keys = [phone_record(i)['phone_number'] for i in range(2000)]
+            membership = snapshot.contains_many(keys)
+            if ok and len(snapshot) == 1001 and membership == [i % 2 == 0 for i in range(2000)] \
+                    and snapshot.get('0812')['name'] == 'Short' and snapshot.get('08') is None:
+                print_test("✓ Snapshot built; binary search finds exactly the stored keys", "SUCCESS")
+            else:
+                print_test("Snapshot contents wrong", "ERROR")
+                return False
+            snapshot.close()
+
+            # Added after the snapshot: must still come from SQLite
+            quietly(database_manager.import_records, [phone_record(1)])
+            with patched_config(api_client, DATABASE_ENABLED=True, DATABASE_SNAPSHOT_ENABLED=True):
+                client = api_client.DatabaseClient(path)
+                served = set(client.snapshots)
+                record = client.query_phone(keys[10])
+                fresh = client.query_phone(keys[1])
+                many = client.query_many('phone', keys[:6])
+                nik = client.query_nik(nik_record(7)['nik'])
+                client.close()
+            conn = sqlite3.connect(path)
+            row = conn.execute('SELECT phone_number, name, address, city, province, operator, last_updated '
+                               'FROM phone_records WHERE phone_number = ?', (keys[10],)).fetchone()
+            conn.close()
+            expected = dict(zip(database_manager.PHONE_COLUMNS + ('last_updated',), row))
+            if served == {'phone', 'nik'} and record == expected and fresh['name'] == 'User 1' \
+                    and sorted(many) == keys[:3] + [keys[4]] and nik['name'] == 'Warga 7':
+                print_test("✓ DatabaseClient served from snapshot, fell back to SQLite", "SUCCESS")
+            else:
+                print_test("Snapshot-backed lookups wrong", "ERROR")
+                return False
+
+        # A table with no rows still gets a (keyless) snapshot
+        with temp_database() as (tmpdir, path):
+            quietly(database_manager.import_records, [phone_record(0)])
+            ok = quietly(database_manager.build_snapshots)
+            empty = Snapshot(snapshot_path(path, 'nik_records'))
+            misses = (len(empty), empty.get(nik_record(0)['nik']), empty.get(''), empty.contains_many(['1', '']))
+            empty.close()
+            with patched_config(api_client, DATABASE_ENABLED=True, DATABASE_SNAPSHOT_ENABLED=True):
+                client = quietly(api_client.DatabaseClient, path)
+                served = set(client.snapshots)
+                nik = client.query_nik(nik_record(0)['nik'])
+                client.close()
+            if ok and misses == (0, None, None, [False, False]) and served == {'phone', 'nik'} and nik is None:
+                print_test("✓ Empty table snapshot loads and finds nothing", "SUCCESS")
+            else:
+                print_test("Empty table snapshot wrong", "ERROR")
+                return False
+
+        return True
+    except Exception as e:
+        print_test(f"Lookup snapshot test failed: {e}", "ERROR")
+        return False
+
+def test_parallel_import():
+    """Test the process-pool parser with a single writer against the serial importer."""
+    print_test("Testing parallel import...", "INFO")
+
+    try:
+        with temp_database() as (tmpdir, path):
+            csv_file = os.path.join(tmpdir, 'records.csv')
+            with open(csv_file, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=database_manager.PHONE_COLUMNS)
+                writer.writeheader()
+                for i in range(3000):
+                    record = phone_record(i)
+                    record['address'] = f"Jalan {i}\n\"Blok\" B"
+                    writer.writerow(record)
+                writer.writerow({'name': 'No Phone'})
+
+            stats = quietly(database_manager.import_parallel, csv_file, workers=2, range_size=4096)
+            conn = sqlite3.connect(path)
+            parallel_rows = conn.execute(
+                'SELECT phone_number, address, content_hash FROM phone_records ORDER BY phone_number'
+            ).fetchall()
+            conn.execute('DELETE FROM phone_records')
+            conn.commit()
+            conn.close()
+            quietly(database_manager.import_from_csv, csv_file)
+            conn = sqlite3.connect(path)
+            serial_rows = conn.execute(
+                'SELECT phone_number, address, content_hash FROM phone_records ORDER BY phone_number'
+            ).fetchall()
+            conn.close()
+
+            if stats['inserted'] == 3000 and stats['rejected'] == 1 and stats['workers'] == 2 \
+                    and parallel_rows == serial_rows:
+                print_test("✓ CSV parsed in parallel matches the serial import", "SUCCESS")
+            else:
+                print_test(f"Parallel CSV import off: {stats}", "ERROR")
+                return False
+
+            lines_file = os.path.join(tmpdir, 'nik.jsonl')
+            with open(lines_file, 'w', encoding='utf-8') as f:
+                for i in range(1000):
+                    record = nik_record(i)
+                    # Unicode line separators stay raw inside JSON strings
+                    record['address'] = f"Jalan {i}\x85Blok\u2028C\x1c"
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.write("{broken\n")
+            stats = quietly(database_manager.import_parallel, lines_file, table='nik_records',
+                            workers=2, range_size=2048)
+            if stats['inserted'] == 1000 and stats['rejected'] == 1 and count_rows(path, 'nik_records') == 1000:
+                print_test("✓ JSON Lines parsed in parallel", "SUCCESS")
+            else:
+                print_test(f"Parallel JSON Lines import off: {stats}", "ERROR")
+                return False
+
+        return True
+    except Exception as e:
+        print_test(f"Parallel import test failed: {e}", "ERROR")
+        return False
+
+def test_aggregate_statistics():
+    """Test record_stats stays equal to a GROUP BY across imports, deletes and migrations."""
+    print_test("Testing aggregate statistics...", "INFO")
+
+    operators = ['Telkomsel', 'Indosat', 'XL', None]
+
+    def varied(i, city='Jakarta'):
+        record = phone_record(i)
+        record.update(operator=operators[i % 4], city=city if i % 3 else 'Bandung')
+        return record
+
+    def consistent(path):
+        conn = sqlite3.connect(path)
+        try:
+            for table, dimensions in db_schema.AGGREGATE_DIMENSIONS.items():
+                for dimension in dimensions:
+                    expected = sorted(conn.execute(
+                        f"SELECT {db_schema._dimension_sql(dimension)}, COUNT(*) FROM {table} GROUP BY 1"
+                    ).fetchall())
+                    if sorted(database_manager.aggregate_counts(conn, table, dimension)) != expected:
+                        return False
+            return True
+        finally:
+            conn.close()
+
+    try:
+        with temp_database() as (tmpdir, path):
+            quietly(database_manager.import_records, (varied(i) for i in range(400)))
+            quietly(database_manager.import_records, (nik_record(i) for i in range(50)), table='nik_records')
+            conn = sqlite3.connect(path)
+            operator_counts = dict(database_manager.aggregate_counts(conn, 'phone_records', 'operator'))
+            conn.close()
+            if operator_counts == {'Telkomsel': 100, 'Indosat': 100, 'XL': 100, '': 100} and consistent(path):
+                print_test("✓ Imports fill per-dimension counts", "SUCCESS")
+            else:
+                print_test(f"Aggregate counts off after import: {operator_counts}", "ERROR")
+                return False
+
+            # Moves, duplicates within a batch, deletes and the compact rebuild
+            batch = [varied(i, 'Surabaya') for i in range(350, 450)] + [varied(420, 'Medan')]
+            quietly(database_manager.import_records, batch, chunk_size=60)
+            quietly(database_manager.delete_record, phone_record(5)['phone_number'])
+            quietly(database_manager.migrate_to_compact)
+            if consistent(path):
+                print_test("✓ Updates, deletes and compaction keep counts exact", "SUCCESS")
+            else:
+                print_test("Aggregate counts drifted from the record tables", "ERROR")
+                return False
+
+            # Databases created before the summary table are backfilled on upgrade
+            conn = sqlite3.connect(path)
+            conn.execute('DROP TABLE record_stats')
+            conn.execute('PRAGMA user_version = 2')
+            conn.close()
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                database_manager.show_statistics()
+            with patched_config(builtins, input=lambda prompt: 'yes'):
+                quietly(database_manager.clear_database)
+            conn = sqlite3.connect(path)
+            leftover = conn.execute('SELECT COUNT(*) FROM record_stats').fetchone()[0]
+            conn.close()
+            if '449 records' in output.getvalue() and 'Telkomsel' in output.getvalue() and leftover == 0:
+                print_test("✓ Upgrade backfills counts, clearing empties them", "SUCCESS")
+            else:
+                print_test("Aggregate backfill or clear failed", "ERROR")
+                return False
+
+        # A second writer upserting the same key while the first transaction
+        # is open must wait for it, then see its row as already stored
+        with temp_database() as (tmpdir, path):
+            first = db_schema.configure_connection(sqlite3.connect(path, check_same_thread=False))
+            db_schema.apply_schema(first)
+            second = db_schema.configure_connection(sqlite3.connect(path, check_same_thread=False))
+            columns = database_manager.PHONE_COLUMNS
+            row = tuple(phone_record(0)[column] for column in columns)
+            moved = tuple(dict(phone_record(0), city='Medan')[column] for column in columns)
+            counts = {}
+
+            def write_second():
+                with second:
+                    counts['second'] = db_schema.upsert_rows(second, 'phone_records', [moved],
+                                                             '2024-01-02 00:00:00')
+
+            with first:
+                counts['first'] = db_schema.upsert_rows(first, 'phone_records', [row], '2024-01-01 00:00:00')
+                writer = threading.Thread(target=write_second)
+                writer.start()
+                writer.join(0.3)
+            writer.join(10)
+            first.close()
+            second.close()
+            conn = sqlite3.connect(path)
+            cities = dict(database_manager.aggregate_counts(conn, 'phone_records', 'city'))
+            days = dict(database_manager.aggregate_counts(conn, 'phone_records', 'day'))
+            conn.close()
+            if counts == {'first': (1, 0, 0), 'second': (0, 1, 0)} and cities == {'Medan': 1} \
+                    and days == {'2024-01-02': 1} and consistent(path):
+                print_test("✓ Concurrent writers serialize; counts stay exact", "SUCCESS")
+            else:
+                print_test(f"Concurrent upserts miscounted: {counts}, {cities}, {days}", "ERROR")
+                return False
+
+        return True
+    except Exception as e:
+        print_test(f"Aggregate statistics test failed: {e}", "ERROR")
+        return False
+
+def test_maintenance():
+    """Test the switch to incremental auto-vacuum, stepped page reclaim and ANALYZE."""
+    print_test("Testing database maintenance...", "INFO")
+
+    def delete_where(path, condition):
+        conn = sqlite3.connect(path)
+        with conn:
+            conn.execute(f'DELETE FROM phone_records WHERE {condition}')
+            # Raw deletes bypass delete_rows, so recount the summaries
+            db_schema.rebuild_aggregates(conn, 'phone_records')
+        conn.close()
+
+    try:
+        with temp_database() as (tmpdir, path):
+            quietly(database_manager.import_records, (phone_record(i) for i in range(6000)))
+            delete_where(path, "phone_number >= '081200003000'")
+
+            first = database_manager.run_maintenance(samples=200)
+            before, after = first['before'], first['after']
+            if before['free_pages'] > 0 and after['free_pages'] == 0 \
+                    and after['auto_vacuum'] == 'incremental' and after['file_bytes'] < before['file_bytes'] \
+                    and first['vacuum_steps'] is None and first['latency_before'] and first['latency_after']:
+                print_test(f"✓ Switched to incremental auto-vacuum, "
+                           f"{before['pages'] - after['pages']} pages returned", "SUCCESS")
+            else:
+                print_test(f"First maintenance run off: {first}", "ERROR")
+                return False
+
+            delete_where(path, "phone_number >= '081200001000'")
+            second = database_manager.run_maintenance(step_pages=10, samples=200)
+            conn = sqlite3.connect(path)
+            analyzed = conn.execute(
+                "SELECT COUNT(*) FROM sqlite_stat1 WHERE tbl = 'phone_records'"
+            ).fetchone()[0]
+            estimate = database_manager.estimate_count(conn, 'phone_records')
+            conn.close()
+            if second['before']['free_pages'] > 10 and second['after']['free_pages'] == 0 \
+                    and second['vacuum_steps'] > 1 and analyzed and estimate == (1000, True):
+                print_test(f"✓ Reclaimed in {second['vacuum_steps']} bounded steps, statistics refreshed",
+                           "SUCCESS")
+            else:
+                print_test(f"Incremental maintenance off: {second}", "ERROR")
+                return False
+
+            if quietly(database_manager.maintain_database):
+                print_test("✓ Maintenance report printed", "SUCCESS")
+            else:
+                print_test("Maintenance report failed", "ERROR")
+                return False
+
+        return True
+    except Exception as e:
+        print_test(f"Maintenance test failed: {e}", "ERROR")
+        return False
+
+def test_synthetic_dataset():
+    """Test the seeded generator: determinism, unique keys, consistent fields, every output format."""
+    print_test("Testing synthetic dataset generator...", "INFO")
+
+    try:
+        from config.settings import PHONE_OPERATORS
+        from utils import dataset_generator
+
+        phones = list(dataset_generator.iter_phone_records(5000, seed=7))
+        niks = list(dataset_generator.iter_nik_records(5000, seed=7))
+        regions = {code: (city, province) for code, city, province in dataset_generator.REGIONS}
+        same_seed = phones[:100] == list(dataset_generator.iter_phone_records(100, seed=7))
+        other_seed = phones[:100] != list(dataset_generator.iter_phone_records(100, seed=8))
+        phones_ok = len({r['phone_number'] for r in phones}) == 5000 and all(
+            len(r['phone_number']) == 12 and PHONE_OPERATORS[r['phone_number'][:4]] == r['operator']
+            for r in phones)
+        niks_ok = len({r['nik'] for r in niks}) == 5000 and all(
+            len(r['nik']) == 16 and regions[r['nik'][:6]] == (r['city'], r['province'])
+            and int(r['nik'][6:8]) - (40 if r['gender'] == 'P' else 0) == int(r['birth_date'][8:])
+            and r['nik'][8:12] == r['birth_date'][5:7] + r['birth_date'][2:4]
+            for r in niks)
+        if same_seed and other_seed and phones_ok and niks_ok:
+            print_test("✓ Seeded, unique and internally consistent records", "SUCCESS")
+        else:
+            print_test(f"Generated records off: seed {same_seed}/{other_seed}, "
+                       f"phone {phones_ok}, nik {niks_ok}", "ERROR")
+            return False
+
+        with temp_database() as (tmpdir, path):
+            outputs = {name: os.path.join(tmpdir, name)
+                       for name in ('p.json', 'p.jsonl', 'n.csv.gz', 'n.db')}
+            stats = [database_manager.generate_dataset(outputs['p.json'], count=300, seed=7),
+                     database_manager.generate_dataset(outputs['p.jsonl'], count=300, seed=7),
+                     database_manager.generate_dataset(outputs['n.csv.gz'], 'nik_records', 300, seed=7),
+                     quietly(database_manager.generate_dataset, outputs['n.db'], 'nik_records', 300, seed=7)]
+
+            with open(outputs['p.json'], 'r', encoding='utf-8') as f:
+                from_json = json.load(f)
+            with open(outputs['p.jsonl'], 'r', encoding='utf-8') as f:
+                from_jsonl = [json.loads(line) for line in f]
+            with gzip.open(outputs['n.csv.gz'], 'rt', encoding='utf-8', newline='') as f:
+                from_csv = list(csv.DictReader(f))
+            if all(s['generated'] == 300 for s in stats) and from_json == from_jsonl == phones[:300] \
+                    and from_csv == niks[:300] and count_rows(outputs['n.db'], 'nik_records') == 300:
+                print_test("✓ JSON, JSON Lines, gzipped CSV and SQLite outputs match", "SUCCESS")
+            else:
+                print_test("Generated files differ from the generator", "ERROR")
+                return False
+
+        return True
+    except Exception as e:
+        print_test(f"Synthetic dataset test failed: {e}", "ERROR")
+        return False
+
+def main():
+    """Run all tests."""
+    print(f"\n{Fore.CYAN}{'='*70}")
+    print("DATABASE MANAGER TEST SUITE")
+    print(f"{'='*70}{Style.RESET_ALL}\n")
+
+    tests = [
+        ("JSON Import", test_json_import),
+        ("CSV Import", test_csv_import),
+        ("Streaming Export", test_streaming_export),
+        ("NIK Import", test_nik_import),
+        ("Upsert Import", test_upsert_import),
+        ("Compact Migration", test_compact_migration),
+        ("Keyset Pagination", test_keyset_pagination),
+        ("Lookup Snapshot", test_lookup_snapshot),
+        ("Parallel Import", test_parallel_import),
+        ("Aggregate Statistics", test_aggregate_statistics),
+        ("Maintenance", test_maintenance),
+        ("Synthetic Dataset", test_synthetic_dataset),
+    ]
+
+    passed = 0
+    failed = 0
+
+    for name, test_func in tests:
+        try:
+            if test_func():
+                passed += 1
+            else:
+                failed += 1
+        except Exception as e:
+            print_test(f"Test '{name}' crashed: {e}", "ERROR")
+            failed += 1
+
+    # Summary
+    print(f"\n{Fore.CYAN}{'='*70}")
+    print("TEST SUMMARY")
+    print(f"{'='*70}{Style.RESET_ALL}")
+    print_test(f"Passed: {passed}", "SUCCESS")
+    if failed > 0:
+        print_test(f"Failed: {failed}", "ERROR")
+    else:
+        print_test(f"Failed: {failed}", "SUCCESS")
+    print_test(f"Total: {passed + failed}", "INFO")
+
+    if failed == 0:
+        print(f"\n{Fore.GREEN}✓ All tests passed!{Style.RESET_ALL}\n")
+        return 0
+    else:
+        print(f"\n{Fore.YELLOW}⚠ Some tests failed. Check output above.{Style.RESET_ALL}\n")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
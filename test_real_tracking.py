@@ -5,6 +5,7 @@ Tests API client, database, and fallback mechanisms
 """
 
 import sys
+import time
 from colorama import Fore, Style, init
 
 init()
@@ -99,6 +100,28 @@ def test_api_client():
         print_test(f"API client test failed: {e}", "ERROR")
         return False
 
+def test_lookup_service():
+    """Test that lookups share one long-lived service."""
+    print_test("\nTesting shared lookup service...", "INFO")
+    
+    try:
+        from utils.api_client import get_lookup_service
+        
+        service = get_lookup_service()
+        if service is get_lookup_service():
+            print_test("✓ Lookup service is reused across calls", "SUCCESS")
+        else:
+            print_test("Lookup service was rebuilt", "ERROR")
+            return False
+        
+        if service.check_operator("081234567890") == "Telkomsel":
+            print_test("✓ Shared operator check working", "SUCCESS")
+        
+        return True
+    except Exception as e:
+        print_test(f"Lookup service test failed: {e}", "ERROR")
+        return False
+
 def test_rate_limiter():
     """Test rate limiter."""
     print_test("\nTesting rate limiter...", "INFO")
@@ -119,6 +142,83 @@ def test_rate_limiter():
         else:
             print_test("Rate limiter not enforcing limit", "WARNING")
         
+        if not limiter.acquire(timeout=0) and limiter.fill_level == 1.0:
+            print_test("✓ acquire() times out when budget is exhausted", "SUCCESS")
+        else:
+            print_test("acquire() did not respect the budget", "ERROR")
+            return False
+        
+        # acquire() should block just until the oldest slot frees
+        limiter = RateLimiter(max_requests=2, time_window=0.2)
+        start = time.monotonic()
+        acquired = all(limiter.acquire() for _ in range(3))
+        elapsed = time.monotonic() - start
+        if acquired and 0.15 <= elapsed < 0.5:
+            print_test(f"✓ acquire() blocked {elapsed:.2f}s for next slot", "SUCCESS")
+        else:
+            print_test(f"acquire() pacing off (waited {elapsed:.2f}s)", "ERROR")
+            return False
+        
+        # Provider headers: budget spent until reset, larger limit adopted
+        limiter = RateLimiter(max_requests=2, time_window=60)
+        limiter.update_from_headers({'X-RateLimit-Limit': '100', 'X-RateLimit-Remaining': '0',
+                                     'X-RateLimit-Reset': '0.2'})
+        start = time.monotonic()
+        limiter.acquire()
+        elapsed = time.monotonic() - start
+        if limiter.max_requests == 100 and 0.15 <= elapsed < 0.5:
+            print_test(f"✓ Provider headers paced acquire() ({elapsed:.2f}s)", "SUCCESS")
+        else:
+            print_test(f"Header pacing off (waited {elapsed:.2f}s)", "ERROR")
+            return False
+        
+        limiter.update_from_headers({'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'})
+        if limiter.can_make_request():
+            print_test("✓ Retry-After dates in the past do not block", "SUCCESS")
+        else:
+            print_test("Past Retry-After date blocked requests", "ERROR")
+            return False
+
+        # Epoch milliseconds and absurd delays are bounded by RATE_LIMIT_MAX_PAUSE
+        import io
+        import contextlib
+        from benchmark import start_stub_server, patched_config, default_responder
+        from utils import api_client
+        reset_ms = str(int((time.time() + 30) * 1000))
+        with patched_config(api_client, RATE_LIMIT_MAX_PAUSE=120):
+            parsed_ms = api_client.parse_rate_limit_reset(reset_ms)
+            huge = api_client.parse_retry_after('99999999999')
+            limiter = RateLimiter(max_requests=5, time_window=60)
+            limiter.update_from_headers({'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': '9' * 15})
+            wait = limiter.wait_time()
+        if 25 <= parsed_ms <= 30 and huge == 120 and 0 < wait <= 120:
+            print_test("✓ Millisecond resets parsed, oversized pauses clamped", "SUCCESS")
+        else:
+            print_test(f"Pause parsing off: {parsed_ms}, {huge}, {wait}", "ERROR")
+            return False
+
+        # A limiter that stays blocked fails the request instead of hanging it
+        server, base_url = start_stub_server(default_responder)
+        blocked = RateLimiter(max_requests=5, time_window=60)
+        blocked.pause(60)
+        try:
+            with patched_config(api_client, API_ENABLED=True, RATE_LIMIT_ENABLED=True,
+                                RATE_LIMIT_ACQUIRE_TIMEOUT=0.2, rate_limiter=blocked,
+                                CACHE_RESULTS=False, NEGATIVE_CACHE_ENABLED=False,
+                                API_KEYS={'primary': 'test-key'},
+                                API_ENDPOINTS={'phone_lookup': f"{base_url}/phone"}), \
+                    contextlib.redirect_stdout(io.StringIO()):
+                start = time.monotonic()
+                result = api_client.APIClient().lookup_phone('081200000001')
+                elapsed = time.monotonic() - start
+        finally:
+            server.shutdown()
+        if result is None and elapsed < 2:
+            print_test(f"✓ Request gave up after {elapsed:.2f}s without a rate limit slot", "SUCCESS")
+        else:
+            print_test(f"Blocked request not abandoned ({elapsed:.2f}s)", "ERROR")
+            return False
+
         return True
     except Exception as e:
         print_test(f"Rate limiter test failed: {e}", "ERROR")
@@ -129,7 +229,7 @@ def test_cache():
     print_test("\nTesting cache...", "INFO")
     
     try:
-        from utils.api_client import result_cache
+        from utils.api_client import result_cache, ResultCache
         
         # Set cache
         test_data = {"name": "Test User", "phone": "081234567890"}
@@ -147,11 +247,541 @@ def test_cache():
         result_cache.clear()
         print_test("✓ Cache cleared", "SUCCESS")
         
+        # Bounded cache evicts the least recently used entry
+        cache = ResultCache(max_entries=2, max_bytes=1024, ttl=60)
+        cache.set("a", {"n": 1})
+        cache.set("b", {"n": 2})
+        cache.get("a")
+        cache.set("c", {"n": 3})
+        if cache.get("b") is None and cache.get("a") and cache.stats()['evictions'] == 1:
+            print_test("✓ LRU eviction working", "SUCCESS")
+        else:
+            print_test("LRU eviction not working", "ERROR")
+            return False
+        
+        # Expired entries are swept out
+        cache = ResultCache(max_entries=10, max_bytes=1024, ttl=0.05, sweep_interval=0)
+        cache.set("a", {"n": 1})
+        time.sleep(0.06)
+        cache.sweep()
+        if len(cache) == 0 and cache.stats()['expirations'] == 1:
+            print_test("✓ TTL expiry sweep working", "SUCCESS")
+        else:
+            print_test("TTL expiry sweep not working", "ERROR")
+            return False
+        
         return True
     except Exception as e:
         print_test(f"Cache test failed: {e}", "ERROR")
         return False
 
+def test_persistent_cache():
+    """Test that cached results survive a restart."""
+    print_test("\nTesting persistent cache...", "INFO")
+    
+    try:
+        import os
+        import tempfile
+        from utils.api_client import ResultCache, PersistentCache, TieredCache
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'cache.db')
+            test_data = {"name": "Test User"}
+            TieredCache(ResultCache(), PersistentCache(path)).set("phone_081234567890", test_data)
+            
+            # New L1 with the same L2 file simulates a restart
+            restarted = TieredCache(ResultCache(), PersistentCache(path))
+            if restarted.get("phone_081234567890") == test_data and len(restarted) == 1:
+                print_test("✓ Entry served from L2 and promoted to L1", "SUCCESS")
+            else:
+                print_test("Persistent cache lost the entry", "ERROR")
+                return False
+            
+            expired = PersistentCache(path, ttl=0)
+            if expired.get("phone_081234567890") is None and len(expired) == 0:
+                print_test("✓ Expired entries compacted away", "SUCCESS")
+            else:
+                print_test("Expired entry still served", "ERROR")
+                return False
+            
+            # Expiring many entries must return all their pages, not just one
+            cache = PersistentCache(path)
+            for i in range(5000):
+                cache.set(f"phone_{i:012d}", {"name": f"User {i}", "address": "x" * 200})
+            cache.ttl = 0
+            cache.compact()
+            free_pages = cache.conn.execute('PRAGMA freelist_count').fetchone()[0]
+            if len(cache) == 0 and free_pages == 0:
+                print_test("✓ compact() drains the freelist", "SUCCESS")
+            else:
+                print_test(f"compact() left {free_pages} free pages", "ERROR")
+                return False
+        
+        return True
+    except Exception as e:
+        print_test(f"Persistent cache test failed: {e}", "ERROR")
+        return False
+
+def test_negative_cache():
+    """Test that only genuine not-found answers are cached."""
+    print_test("\nTesting negative cache...", "INFO")
+    
+    try:
+        from benchmark import start_stub_server, patched_config
+        from utils import api_client
+        
+        calls = {'404': 0, '500': 0}
+        
+        def responder(path, params, body):
+            status = '404' if params['phone'][0].endswith('404') else '500'
+            calls[status] += 1
+            return int(status), {}, {}
+        
+        server, base_url = start_stub_server(responder)
+        negative_cache = api_client.ResultCache(ttl=60)
+        try:
+            with patched_config(api_client, API_ENABLED=True, RATE_LIMIT_ENABLED=False, REQUEST_DELAY=0,
+                                RETRY_BACKOFF_BASE=0, CIRCUIT_BREAKER_THRESHOLD=10,
+                                negative_cache=negative_cache,
+                                API_KEYS={'primary': 'test-key'},
+                                API_ENDPOINTS={'phone_lookup': f"{base_url}/phone"}):
+                client = api_client.APIClient()
+                for _ in range(2):
+                    client.lookup_phone("081200000404")
+                    client.lookup_phone("081200000500")
+        finally:
+            server.shutdown()
+        
+        if calls['404'] == 1 and negative_cache.stats()['hits'] == 1:
+            print_test("✓ Not-found answer cached (no retries, no repeat call)", "SUCCESS")
+        else:
+            print_test(f"Not-found answer not cached ({calls['404']} calls)", "ERROR")
+            return False
+        
+        if calls['500'] == 2 * api_client.MAX_API_RETRIES:
+            print_test("✓ Server errors are not cached", "SUCCESS")
+        else:
+            print_test(f"Server error handling off ({calls['500']} calls)", "ERROR")
+            return False
+        
+        return True
+    except Exception as e:
+        print_test(f"Negative cache test failed: {e}", "ERROR")
+        return False
+
+def test_batch_lookup():
+    """Test that concurrent batch lookups keep input order."""
+    print_test("\nTesting concurrent batch lookup...", "INFO")
+    
+    try:
+        import random
+        from benchmark import start_stub_server, patched_config, default_responder
+        from utils import api_client
+        
+        def responder(path, params, body):
+            # Random latency so responses finish out of order
+            time.sleep(random.uniform(0, 0.02))
+            return default_responder(path, params, body)
+        
+        server, base_url = start_stub_server(responder)
+        targets = [f"0812{i:08d}" for i in range(20)] + ["12345"]
+        try:
+            with patched_config(api_client, API_ENABLED=True, RATE_LIMIT_ENABLED=False, REQUEST_DELAY=0,
+                                CACHE_RESULTS=False, NEGATIVE_CACHE_ENABLED=False,
+                                API_KEYS={'primary': 'test-key'},
+                                API_ENDPOINTS={'phone_lookup': f"{base_url}/phone"}):
+                results = api_client.LookupService().batch_lookup(targets, workers=8)
+        finally:
+            server.shutdown()
+        
+        if [r['target'] for r in results[:-1]] == targets[:-1] and results[-1] is None:
+            print_test("✓ Batch results returned in input order", "SUCCESS")
+        else:
+            print_test("Batch results out of order", "ERROR")
+            return False
+        
+        return True
+    except Exception as e:
+        print_test(f"Batch lookup test failed: {e}", "ERROR")
+        return False
+
+def test_batch_prepass():
+    """Test that the batch pre-pass resolves local hits without the API."""
+    print_test("\nTesting batch database pre-pass...", "INFO")
+    
+    try:
+        import os
+        import tempfile
+        from benchmark import start_stub_server, patched_config, default_responder
+        from utils import api_client
+        
+        calls = []
+        
+        def responder(path, params, body):
+            calls.append(params['phone'][0])
+            return default_responder(path, params, body)
+        
+        server, base_url = start_stub_server(responder)
+        targets = [f"0812{i:08d}" for i in range(2000)]
+        timings = {}
+        try:
+            with tempfile.TemporaryDirectory() as tmpdir, \
+                    patched_config(api_client, API_ENABLED=True, DATABASE_ENABLED=True,
+                                   RATE_LIMIT_ENABLED=False, REQUEST_DELAY=0,
+                                   CACHE_RESULTS=False, NEGATIVE_CACHE_ENABLED=False,
+                                   API_KEYS={'primary': 'test-key'},
+                                   API_ENDPOINTS={'phone_lookup': f"{base_url}/phone"}):
+                service = api_client.LookupService(os.path.join(tmpdir, 'test.db'))
+                # Everything but the last 10 targets is in the local database
+                for target in targets[:-10]:
+                    service.db_client.add_phone_record({'phone_number': target, 'name': 'Local User'})
+                results = list(service.iter_batch(targets + targets[:5], workers=4, timings=timings))
+                service.db_client.close()
+        finally:
+            server.shutdown()
+        
+        local_ok = all(result['name'] == 'Local User' for _, result in results[:1990])
+        if local_ok and sorted(calls) == targets[-10:] and len(results) == 2005:
+            print_test("✓ 1990 targets resolved locally, 10 sent to the API", "SUCCESS")
+        else:
+            print_test(f"Pre-pass sent {len(calls)} requests", "ERROR")
+            return False
+        
+        if timings['database_hits'] == 1990 and timings['remote_lookups'] == 10 \
+                and all(timings[stage] >= 0 for stage in ('database', 'cache', 'remote')):
+            print_test(f"✓ Stage timings: db {timings['database']:.3f}s, "
+                       f"api {timings['remote']:.3f}s", "SUCCESS")
+        else:
+            print_test(f"Unexpected stage timings: {timings}", "ERROR")
+            return False
+        
+        return True
+    except Exception as e:
+        print_test(f"Batch pre-pass test failed: {e}", "ERROR")
+        return False
+
+def test_write_through():
+    """Test that API results are written back to the local database in batches."""
+    print_test("\nTesting database write-through...", "INFO")
+    
+    try:
+        import os
+        import tempfile
+        from benchmark import start_stub_server, patched_config, default_responder
+        from utils import api_client
+        
+        calls = []
+        
+        def responder(path, params, body):
+            calls.append(params['phone'][0])
+            return default_responder(path, params, body)
+        
+        server, base_url = start_stub_server(responder)
+        targets = [f"0812{i:08d}" for i in range(30)]
+        try:
+            with tempfile.TemporaryDirectory() as tmpdir, \
+                    patched_config(api_client, API_ENABLED=True, DATABASE_ENABLED=True,
+                                   DATABASE_WRITE_THROUGH=True, WRITE_THROUGH_BATCH_SIZE=8,
+                                   RATE_LIMIT_ENABLED=False, REQUEST_DELAY=0,
+                                   CACHE_RESULTS=False, NEGATIVE_CACHE_ENABLED=False,
+                                   API_KEYS={'primary': 'test-key'},
+                                   API_ENDPOINTS={'phone_lookup': f"{base_url}/phone"}):
+                service = api_client.LookupService(os.path.join(tmpdir, 'test.db'))
+                service.batch_lookup(targets, workers=4)
+                service.writer.flush()
+                stats = service.writer.stats()
+                
+                # A second pass is answered by the local database
+                again = service.batch_lookup(targets, workers=4)
+                service.writer.close()
+                service.db_client.close()
+        finally:
+            server.shutdown()
+        
+        if stats['written'] == 30 and stats['queued'] == 0 and 1 < stats['batches'] <= 30 \
+                and stats['dropped'] == 0 and stats['max_depth'] >= 1:
+            print_test(f"✓ 30 API results written in {stats['batches']} batches", "SUCCESS")
+        else:
+            print_test(f"Write-through stats off: {stats}", "ERROR")
+            return False
+        
+        if len(calls) == 30 and all(r['name'] == 'Stub User' and r['phone_number'] == t
+                                    for r, t in zip(again, targets)):
+            print_test("✓ Repeat lookups served from the local database", "SUCCESS")
+        else:
+            print_test(f"Repeat lookups hit the API ({len(calls)} requests)", "ERROR")
+            return False
+
+        # A database that cannot be opened must not hang flush() or close()
+        import io
+        import contextlib
+        with tempfile.TemporaryDirectory() as tmpdir, contextlib.redirect_stdout(io.StringIO()):
+            writer = api_client.RecordWriter(os.path.join(tmpdir, 'missing', 'test.db'))
+            writer.thread.join(5)
+            accepted = writer.submit('phone', targets[0], {'name': 'Stub User'})
+            writer.flush()
+            writer.close()
+            stats = writer.stats()
+        if writer.dead and not accepted and stats['errors'] == 1 and stats['dropped'] == 1 \
+                and stats['queued'] == 0 and stats['written'] == 0:
+            print_test("✓ Unopenable database disables write-through without blocking", "SUCCESS")
+        else:
+            print_test(f"Dead writer stats off: {stats}", "ERROR")
+            return False
+
+        return True
+    except Exception as e:
+        print_test(f"Write-through test failed: {e}", "ERROR")
+        return False
+
+def test_single_flight():
+    """Test that concurrent lookups for one target share a single request."""
+    print_test("\nTesting request coalescing...", "INFO")
+    
+    try:
+        import threading
+        from benchmark import start_stub_server, patched_config, default_responder
+        from utils import api_client
+        
+        calls = []
+        
+        def responder(path, params, body):
+            calls.append(params['phone'][0])
+            time.sleep(0.1)
+            return default_responder(path, params, body)
+        
+        server, base_url = start_stub_server(responder)
+        inflight = api_client.SingleFlight()
+        try:
+            with patched_config(api_client, API_ENABLED=True, RATE_LIMIT_ENABLED=False, REQUEST_DELAY=0,
+                                CACHE_RESULTS=False, inflight_requests=inflight,
+                                API_KEYS={'primary': 'test-key'},
+                                API_ENDPOINTS={'phone_lookup': f"{base_url}/phone"}):
+                client = api_client.APIClient()
+                results = []
+                threads = [threading.Thread(target=lambda: results.append(client.lookup_phone("081234567890")))
+                           for _ in range(5)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+        finally:
+            server.shutdown()
+        
+        if len(calls) == 1 and inflight.stats()['coalesced'] == 4 and all(results):
+            print_test("✓ 5 concurrent lookups coalesced into 1 request", "SUCCESS")
+        else:
+            print_test(f"Coalescing failed ({len(calls)} requests)", "ERROR")
+            return False
+        
+        return True
+    except Exception as e:
+        print_test(f"Request coalescing test failed: {e}", "ERROR")
+        return False
+
+def test_bulk_lookup():
+    """Test bulk endpoint chunking and fallback to single lookups."""
+    print_test("\nTesting bulk lookup...", "INFO")
+    
+    try:
+        from benchmark import start_stub_server, patched_config, default_responder
+        from utils import api_client
+        
+        calls = {'bulk': 0, 'single': 0}
+        bulk_supported = [True]
+        
+        def responder(path, params, body):
+            if path == '/bulk':
+                calls['bulk'] += 1
+                if not bulk_supported[0]:
+                    return 404, {}, {}
+                # Only even numbers exist on this provider
+                found = [{'phone_number': p, 'name': 'Bulk User'}
+                         for p in body['phones'] if int(p[-1]) % 2 == 0]
+                # Bare-list replies are empty when nothing in the chunk matched
+                return 200, {}, found
+            calls['single'] += 1
+            return default_responder(path, params, body)
+        
+        server, base_url = start_stub_server(responder)
+        targets = [f"0812{i:08d}" for i in range(10)]
+        config = dict(API_ENABLED=True, RATE_LIMIT_ENABLED=False, REQUEST_DELAY=0, CACHE_RESULTS=False,
+                      NEGATIVE_CACHE_ENABLED=False, API_KEYS={'primary': 'test-key'},
+                      BULK_LOOKUP=dict(api_client.BULK_LOOKUP, batch_size=4),
+                      API_ENDPOINTS={'phone_lookup': f"{base_url}/phone",
+                                     'phone_bulk_lookup': f"{base_url}/bulk"})
+        try:
+            with patched_config(api_client, **config):
+                results = api_client.LookupService().batch_lookup(targets)
+                found = [r is not None for r in results]
+                if calls == {'bulk': 3, 'single': 0} and found == [i % 2 == 0 for i in range(10)]:
+                    print_test("✓ 10 targets answered by 3 bulk requests", "SUCCESS")
+                else:
+                    print_test(f"Bulk chunking off: {calls}", "ERROR")
+                    return False
+                
+                # A chunk with no matches is an empty 200, not a missing endpoint
+                calls.update(bulk=0, single=0)
+                service = api_client.LookupService()
+                results = service.batch_lookup([f"0812{i:08d}" for i in range(1, 13, 2)])
+                if calls == {'bulk': 2, 'single': 0} and not any(results) \
+                        and service.api_client.bulk_endpoint('phone'):
+                    print_test("✓ Empty bulk replies keep the bulk endpoint enabled", "SUCCESS")
+                else:
+                    print_test(f"Empty bulk reply disabled bulk lookups: {calls}", "ERROR")
+                    return False
+                
+                bulk_supported[0] = False
+                calls.update(bulk=0, single=0)
+                service = api_client.LookupService()
+                results = service.batch_lookup(targets)
+                if calls['single'] == 10 and all(results) and not service.api_client.bulk_endpoint('phone'):
+                    print_test("✓ Falls back to single lookups when bulk is unsupported", "SUCCESS")
+                else:
+                    print_test(f"Bulk fallback off: {calls}", "ERROR")
+                    return False
+        finally:
+            server.shutdown()
+
+        # A slow chunk holds back neither cached hits nor the fallbacks of faster chunks
+        hits = [f"0813{i:08d}" for i in range(4)]
+        slow = [f"0812{i:08d}" for i in range(4)]
+        unanswered = [f"0812{i:08d}" for i in range(4, 8)]
+        began = time.monotonic()
+        single_calls = []
+
+        def slow_responder(path, params, body):
+            if path == '/bulk':
+                if slow[0] in body['phones']:
+                    time.sleep(0.8)
+                    return 200, {}, [{'phone_number': p, 'name': 'Bulk User'} for p in body['phones']]
+                return 200, {}, None  # Chunk not answered: its targets need single lookups
+            single_calls.append(time.monotonic() - began)
+            return default_responder(path, params, body)
+
+        server, base_url = start_stub_server(slow_responder)
+        cache = api_client.ResultCache()
+        for target in hits:
+            cache.set(f"phone_{target}", {'name': 'Cached User'})
+        try:
+            with patched_config(api_client, **dict(config, CACHE_RESULTS=True, result_cache=cache,
+                                                   API_ENDPOINTS={'phone_lookup': f"{base_url}/phone",
+                                                                  'phone_bulk_lookup': f"{base_url}/bulk"})):
+                batch = api_client.LookupService().iter_batch(hits + slow + unanswered, workers=4)
+                arrivals = []
+                for target, result in batch:
+                    arrivals.append((time.monotonic() - began, result['name']))
+        finally:
+            server.shutdown()
+
+        names = [name for _, name in arrivals]
+        if names == ['Cached User'] * 4 + ['Bulk User'] * 4 + ['Stub User'] * 4 \
+                and arrivals[3][0] < 0.4 and len(single_calls) == 4 and max(single_calls) < 0.6:
+            print_test("✓ Cached hits streamed first, fallbacks overlapped the slow chunk", "SUCCESS")
+        else:
+            print_test(f"Batch stages serialized: {arrivals}, singles at {single_calls}", "ERROR")
+            return False
+
+        return True
+    except Exception as e:
+        print_test(f"Bulk lookup test failed: {e}", "ERROR")
+        return False
+
+def test_circuit_breaker():
+    """Test circuit breaker states and secondary-key failover."""
+    print_test("\nTesting circuit breaker and failover...", "INFO")
+    
+    try:
+        import io
+        import contextlib
+        from benchmark import start_stub_server, patched_config, default_responder
+        from utils import api_client
+        
+        breaker = api_client.CircuitBreaker(failure_threshold=2, reset_timeout=0.1)
+        breaker.record_failure()
+        breaker.record_failure()
+        if breaker.allow_request():
+            print_test("Breaker still closed after threshold", "ERROR")
+            return False
+        time.sleep(0.1)
+        probe, second = breaker.allow_request(), breaker.allow_request()
+        breaker.record_success()
+        if probe and not second and breaker.state == breaker.CLOSED:
+            print_test("✓ Breaker opens, half-opens for one probe, then closes", "SUCCESS")
+        else:
+            print_test("Breaker state machine off", "ERROR")
+            return False
+        
+        # A probe that never reports back is replaced after reset_timeout
+        breaker.record_failure()
+        breaker.record_failure()
+        time.sleep(0.1)
+        lost_probe = breaker.allow_request()
+        blocked = not breaker.allow_request()
+        time.sleep(0.1)
+        if lost_probe and blocked and breaker.allow_request():
+            print_test("✓ Stale half-open probe re-admitted", "SUCCESS")
+        else:
+            print_test("Breaker stuck half-open", "ERROR")
+            return False
+        breaker.record_success()
+        
+        if all(api_client.backoff_delay(n) <= api_client.RETRY_BACKOFF_MAX for n in range(20)):
+            print_test("✓ Backoff delay capped", "SUCCESS")
+        
+        calls = {'/down': 0, '/backup': 0}
+        
+        def responder(path, params, body):
+            calls[path] += 1
+            if path == '/down':
+                return 503, {}, {}
+            return default_responder(path, params, body)
+        
+        server, base_url = start_stub_server(responder)
+        try:
+            with patched_config(api_client, API_ENABLED=True, RATE_LIMIT_ENABLED=False, REQUEST_DELAY=0,
+                                CACHE_RESULTS=False, RETRY_BACKOFF_BASE=0,
+                                CIRCUIT_BREAKER_THRESHOLD=api_client.MAX_API_RETRIES,
+                                API_KEYS={'primary': 'key-1', 'secondary': 'key-2'},
+                                API_ENDPOINTS={'phone_lookup': f"{base_url}/down"},
+                                API_ENDPOINTS_SECONDARY={'phone_lookup': f"{base_url}/backup"}):
+                client = api_client.APIClient()
+                first = client.lookup_phone("081234567890")
+                second = client.lookup_phone("081234567891")
+        finally:
+            server.shutdown()
+        
+        if first and second and calls == {'/down': api_client.MAX_API_RETRIES, '/backup': 2}:
+            print_test("✓ Failed over to secondary; open breaker skipped primary", "SUCCESS")
+        else:
+            print_test(f"Failover off: {calls}", "ERROR")
+            return False
+        
+        # Errors outside Timeout/ConnectionError must still close out a probe
+        probe_breaker = api_client.CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        probe_breaker.record_failure()
+        
+        class BrokenSession:
+            def request(self, *args, **kwargs):
+                raise api_client.requests.exceptions.ChunkedEncodingError("truncated body")
+        
+        with patched_config(api_client, RATE_LIMIT_ENABLED=False, RETRY_BACKOFF_BASE=0, MAX_API_RETRIES=1,
+                            get_circuit_breaker=lambda endpoint: probe_breaker):
+            client = api_client.APIClient()
+            client.session = BrokenSession()
+            with contextlib.redirect_stdout(io.StringIO()):
+                client._request_route("http://127.0.0.1:9/broken", "key", {}, "GET", None)
+        if probe_breaker.state == probe_breaker.OPEN:
+            print_test("✓ Failed probe with an unexpected error reopens the breaker", "SUCCESS")
+        else:
+            print_test(f"Probe left breaker {probe_breaker.state}", "ERROR")
+            return False
+        
+        return True
+    except Exception as e:
+        print_test(f"Circuit breaker test failed: {e}", "ERROR")
+        return False
+
 def test_database_client():
     """Test database client."""
     print_test("\nTesting database client...", "INFO")
@@ -198,6 +828,60 @@ def test_database_client():
         print_test(f"Database test failed: {e}", "ERROR")
         return False
 
+def test_database_connection():
+    """Test persistent connections and the one-time schema check."""
+    print_test("\nTesting database connection handling...", "INFO")
+    
+    try:
+        import io
+        import os
+        import tempfile
+        import threading
+        import contextlib
+        from benchmark import patched_config
+        from utils import api_client
+        from utils.db_schema import SCHEMA_VERSION, get_schema_version
+        
+        with tempfile.TemporaryDirectory() as tmpdir, \
+                patched_config(api_client, DATABASE_ENABLED=True):
+            path = os.path.join(tmpdir, 'test.db')
+            api_client.DatabaseClient(path).add_phone_record(
+                {'phone_number': '081234567890', 'name': 'Test User'})
+            
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                db = api_client.DatabaseClient(path)
+            conn = db._connect()
+            if ("initialized" not in output.getvalue()
+                    and get_schema_version(conn) == SCHEMA_VERSION
+                    and conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'):
+                print_test("✓ Schema check skipped DDL on existing database (WAL)", "SUCCESS")
+            else:
+                print_test("Schema DDL re-ran or WAL not enabled", "ERROR")
+                return False
+            
+            if db._connect() is conn and db.query_phone('081234567890'):
+                print_test("✓ Connection reused across queries", "SUCCESS")
+            else:
+                print_test("Connection not reused", "ERROR")
+                return False
+            
+            results = []
+            thread = threading.Thread(target=lambda: results.append(db.query_phone('081234567890')))
+            thread.start()
+            thread.join()
+            if results and results[0]:
+                print_test("✓ Other threads get their own connection", "SUCCESS")
+            else:
+                print_test("Query from worker thread failed", "ERROR")
+                return False
+            db.close()
+        
+        return True
+    except Exception as e:
+        print_test(f"Database connection test failed: {e}", "ERROR")
+        return False
+
 def test_lookup_no_data():
     """Test lookup when no data is available."""
     print_test("\nTesting lookup with no data...", "INFO")
@@ -263,9 +947,19 @@ def main():
         ("Imports", test_imports),
         ("Configuration", test_configuration),
         ("API Client", test_api_client),
+        ("Lookup Service", test_lookup_service),
         ("Rate Limiter", test_rate_limiter),
         ("Cache", test_cache),
+        ("Persistent Cache", test_persistent_cache),
+        ("Negative Cache", test_negative_cache),
+        ("Batch Lookup", test_batch_lookup),
+        ("Batch Pre-pass", test_batch_prepass),
+        ("Write-through", test_write_through),
+        ("Request Coalescing", test_single_flight),
+        ("Bulk Lookup", test_bulk_lookup),
+        ("Circuit Breaker", test_circuit_breaker),
         ("Database Client", test_database_client),
+        ("Database Connection", test_database_connection),
         ("Lookup No Data", test_lookup_no_data),
         ("Response Normalization", test_normalize_response),
     ]
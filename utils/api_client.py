@@ -3,70 +3,591 @@ API Client for Real Tracking
 Handles communication with external APIs for phone number and NIK lookup
 """
 
+import os
+import queue
+import atexit
+import random
 import requests
+import sys
 import time
 import json
 import sqlite3
+import threading
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from requests.adapters import HTTPAdapter
 from datetime import datetime, timedelta
-from typing import Dict, Optional, Any
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Any, Iterator, List, Tuple
 from colorama import Fore, Style
 
+from utils.db_schema import (
+    MAX_QUERY_PARAMS, NIK_COLUMNS, PHONE_COLUMNS,
+    apply_schema, configure_connection, upsert_rows
+)
+from utils.snapshot import Snapshot, snapshot_path
 from config.api_config import (
-    API_ENABLED, API_TIMEOUT, MAX_API_RETRIES,
-    API_ENDPOINTS, API_KEYS, DATABASE_ENABLED,
-    DATABASE_PATH, RATE_LIMIT_ENABLED, MAX_REQUESTS_PER_MINUTE,
-    REQUEST_DELAY, CACHE_RESULTS, CACHE_DURATION
+    API_ENABLED, API_TIMEOUT, MAX_API_RETRIES, CONNECTION_POOL_SIZE,
+    RETRY_BACKOFF_BASE, RETRY_BACKOFF_MAX,
+    CIRCUIT_BREAKER_THRESHOLD, CIRCUIT_BREAKER_RESET,
+    API_ENDPOINTS, API_ENDPOINTS_SECONDARY, API_KEYS, BULK_LOOKUP, DATABASE_ENABLED,
+    DATABASE_PATH, DATABASE_CACHE_SIZE_KB, DATABASE_BUSY_TIMEOUT_MS, DATABASE_SNAPSHOT_ENABLED,
+    DATABASE_WRITE_THROUGH, WRITE_THROUGH_BATCH_SIZE, WRITE_THROUGH_FLUSH_INTERVAL, WRITE_THROUGH_QUEUE_SIZE,
+    RATE_LIMIT_ENABLED, MAX_REQUESTS_PER_MINUTE, ADAPTIVE_RATE_LIMIT,
+    RATE_LIMIT_MAX_PAUSE, RATE_LIMIT_ACQUIRE_TIMEOUT,
+    REQUEST_DELAY, CACHE_RESULTS, CACHE_DURATION,
+    CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, CACHE_SWEEP_INTERVAL,
+    PERSISTENT_CACHE_ENABLED, PERSISTENT_CACHE_PATH,
+    NEGATIVE_CACHE_ENABLED, NEGATIVE_CACHE_DURATION, NEGATIVE_CACHE_MAX_ENTRIES
 )
 
+# Per-thread output state; batch workers run quietly so their chatter does not interleave
+_thread_state = threading.local()
+
+def _log(message: str):
+    """Print a progress message unless the current thread is a quiet batch worker"""
+    if not getattr(_thread_state, 'quiet', False):
+        print(message)
+
+def _clamp_pause(seconds: float) -> float:
+    """Bound a provider-requested pause so a bogus header cannot stall every lookup"""
+    return min(max(0.0, seconds), RATE_LIMIT_MAX_PAUSE)
+
+def parse_retry_after(value) -> Optional[float]:
+    """Parse a Retry-After header given as seconds or as an HTTP date"""
+    if value is None:
+        return None
+    try:
+        return _clamp_pause(float(value))
+    except ValueError:
+        pass
+    try:
+        return _clamp_pause(parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+def parse_rate_limit_reset(value) -> Optional[float]:
+    """Parse X-RateLimit-Reset (seconds until reset, or an epoch timestamp) into seconds"""
+    if value is None:
+        return None
+    try:
+        reset = float(value)
+    except ValueError:
+        return None
+    # Large values are absolute epoch timestamps rather than a delta,
+    # in milliseconds past 1e12
+    if reset > 1e12:
+        reset /= 1000
+    if reset > 1e9:
+        reset -= time.time()
+    return _clamp_pause(reset)
+
 class RateLimiter:
-    """Simple rate limiter for API calls"""
+    """Thread-safe sliding-window rate limiter for API calls"""
     def __init__(self, max_requests, time_window=60):
         self.max_requests = max_requests
+        self.base_max_requests = max_requests
         self.time_window = time_window
-        self.requests = []
+        self.requests = deque()
+        # Budget reported by the provider (None until a response carries headers)
+        self.provider_remaining = None
+        self.provider_reset_at = 0.0
+        self.lock = threading.Lock()
+    
+    def _expire(self, now):
+        # Timestamps are appended in order, so expired ones sit at the left
+        while self.requests and now - self.requests[0] >= self.time_window:
+            self.requests.popleft()
+        if self.provider_remaining is not None and now >= self.provider_reset_at:
+            self.provider_remaining = None
+    
+    def _wait(self, now) -> float:
+        # Caller holds the lock and has expired old entries
+        if self.provider_remaining is not None and self.provider_remaining <= 0:
+            return self.provider_reset_at - now
+        if len(self.requests) < self.max_requests:
+            return 0.0
+        return self.requests[0] + self.time_window - now
     
     def can_make_request(self):
-        now = time.time()
-        # Remove old requests outside time window
-        self.requests = [req_time for req_time in self.requests 
-                        if now - req_time < self.time_window]
-        return len(self.requests) < self.max_requests
+        with self.lock:
+            now = time.monotonic()
+            self._expire(now)
+            return self._wait(now) <= 0
     
     def add_request(self):
-        self.requests.append(time.time())
+        with self.lock:
+            self.requests.append(time.monotonic())
+            if self.provider_remaining is not None:
+                self.provider_remaining -= 1
+    
+    def wait_time(self) -> float:
+        """Seconds until the next request slot frees (0 if one is free now)"""
+        with self.lock:
+            now = time.monotonic()
+            self._expire(now)
+            return max(0.0, self._wait(now))
+    
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until a request slot is free and reserve it
+        
+        Args:
+            timeout: Maximum seconds to wait, None to wait as long as needed
+        
+        Returns:
+            True if a slot was reserved, False if the timeout expired first
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._expire(now)
+                wait = self._wait(now)
+                if wait <= 0:
+                    self.requests.append(now)
+                    if self.provider_remaining is not None:
+                        self.provider_remaining -= 1
+                    return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+    
+    def pause(self, seconds: float):
+        """Hold every request until `seconds` from now (e.g. after a 429)"""
+        with self.lock:
+            self.provider_remaining = 0
+            self.provider_reset_at = max(self.provider_reset_at, time.monotonic() + seconds)
+    
+    def update_from_headers(self, headers):
+        """
+        Adopt the budget a provider reports in its response headers
+        
+        X-RateLimit-Remaining/Reset are authoritative: requests stop when the
+        provider says the budget is spent and resume exactly at reset.
+        X-RateLimit-Limit may raise the local window cap so budget the
+        provider grants is not held back. Retry-After pauses all requests.
+        """
+        def header_int(name):
+            try:
+                return int(float(headers[name]))
+            except (KeyError, TypeError, ValueError):
+                return None
+        
+        limit = header_int('X-RateLimit-Limit')
+        remaining = header_int('X-RateLimit-Remaining')
+        reset = parse_rate_limit_reset(headers.get('X-RateLimit-Reset'))
+        retry_after = parse_retry_after(headers.get('Retry-After'))
+        
+        with self.lock:
+            now = time.monotonic()
+            if limit:
+                self.max_requests = max(self.base_max_requests, limit)
+            if remaining is not None:
+                self.provider_remaining = remaining
+                self.provider_reset_at = now + (reset if reset is not None else self.time_window)
+        if retry_after is not None:
+            self.pause(retry_after)
+    
+    @property
+    def remaining(self) -> int:
+        """Number of requests still allowed in the current window"""
+        with self.lock:
+            self._expire(time.monotonic())
+            local = self.max_requests - len(self.requests)
+            if self.provider_remaining is not None:
+                return max(0, min(local, self.provider_remaining))
+            return local
+    
+    @property
+    def fill_level(self) -> float:
+        """Fraction of the window budget already used (0.0 - 1.0)"""
+        return 1 - self.remaining / self.max_requests
 
 # Global rate limiter instance
 rate_limiter = RateLimiter(MAX_REQUESTS_PER_MINUTE, 60)
 
 class ResultCache:
-    """Cache for API results"""
-    def __init__(self):
-        self.cache = {}
+    """Bounded LRU cache for API results with TTL expiry"""
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES,
+                 ttl=CACHE_DURATION, sweep_interval=CACHE_SWEEP_INTERVAL):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        # key -> (data, timestamp, size); least recently used first
+        self.cache = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.last_sweep = time.time()
+        self.lock = threading.Lock()
+    
+    @staticmethod
+    def _estimate_size(data) -> int:
+        try:
+            return len(json.dumps(data, default=str))
+        except (TypeError, ValueError):
+            return sys.getsizeof(data)
+    
+    def _remove(self, key):
+        _, _, size = self.cache.pop(key)
+        self.total_bytes -= size
+    
+    def _sweep(self, now):
+        expired = [key for key, (_, timestamp, _) in self.cache.items()
+                   if now - timestamp >= self.ttl]
+        for key in expired:
+            self._remove(key)
+        self.expirations += len(expired)
+        self.last_sweep = now
+    
+    def _maybe_sweep(self, now):
+        if now - self.last_sweep >= self.sweep_interval:
+            self._sweep(now)
     
     def get(self, key):
-        if key in self.cache:
-            data, timestamp = self.cache[key]
-            if time.time() - timestamp < CACHE_DURATION:
-                return data
-            else:
-                del self.cache[key]
+        with self.lock:
+            now = time.time()
+            self._maybe_sweep(now)
+            entry = self.cache.get(key)
+            if entry is not None:
+                data, timestamp, _ = entry
+                if now - timestamp < self.ttl:
+                    self.cache.move_to_end(key)
+                    self.hits += 1
+                    return data
+                self._remove(key)
+                self.expirations += 1
+            self.misses += 1
+        return None
+    
+    def set(self, key, data, timestamp=None):
+        size = self._estimate_size(data)
+        with self.lock:
+            now = time.time()
+            self._maybe_sweep(now)
+            if key in self.cache:
+                self._remove(key)
+            if size > self.max_bytes:
+                return
+            self.cache[key] = (data, timestamp or now, size)
+            self.total_bytes += size
+            while len(self.cache) > self.max_entries or self.total_bytes > self.max_bytes:
+                oldest = next(iter(self.cache))
+                self._remove(oldest)
+                self.evictions += 1
+    
+    def sweep(self):
+        """Drop every expired entry now"""
+        with self.lock:
+            self._sweep(time.time())
+    
+    def clear(self):
+        with self.lock:
+            self.cache.clear()
+            self.total_bytes = 0
+    
+    def __len__(self):
+        return len(self.cache)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return cache size and hit/miss/eviction counters"""
+        with self.lock:
+            return {
+                'entries': len(self.cache),
+                'bytes': self.total_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
+
+class PersistentCache:
+    """SQLite-backed cache for API results that survives restarts"""
+    def __init__(self, path=PERSISTENT_CACHE_PATH, ttl=CACHE_DURATION):
+        self.path = path
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.conn = None
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+            # auto_vacuum must be chosen before the first table is created
+            self.conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            self.conn.execute('PRAGMA journal_mode = WAL')
+            self.conn.execute('PRAGMA synchronous = NORMAL')
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created REAL NOT NULL
+                ) WITHOUT ROWID
+            ''')
+            self.conn.commit()
+            self.compact()
+        except Exception as e:
+            print(f"{Fore.RED}[!] Persistent cache error: {str(e)}{Style.RESET_ALL}")
+            self.conn = None
+    
+    def get_entry(self, key):
+        """Return (data, timestamp) for a live entry, or None"""
+        if self.conn is None:
+            return None
+        try:
+            with self.lock:
+                row = self.conn.execute(
+                    'SELECT value, created FROM cache_entries WHERE key = ?', (key,)
+                ).fetchone()
+                if row and time.time() - row[1] < self.ttl:
+                    self.hits += 1
+                    return json.loads(row[0]), row[1]
+                if row:
+                    with self.conn:
+                        self.conn.execute('DELETE FROM cache_entries WHERE key = ?', (key,))
+                self.misses += 1
+        except Exception as e:
+            print(f"{Fore.RED}[!] Persistent cache error: {str(e)}{Style.RESET_ALL}")
+        return None
+    
+    def get(self, key):
+        entry = self.get_entry(key)
+        return entry[0] if entry else None
+    
+    def set(self, key, data):
+        if self.conn is None:
+            return
+        try:
+            value = json.dumps(data, default=str)
+            with self.lock, self.conn:
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO cache_entries (key, value, created) VALUES (?, ?, ?)',
+                    (key, value, time.time())
+                )
+        except Exception as e:
+            print(f"{Fore.RED}[!] Persistent cache error: {str(e)}{Style.RESET_ALL}")
+    
+    def compact(self):
+        """Delete expired entries and hand their pages back to the filesystem"""
+        if self.conn is None:
+            return
+        with self.lock:
+            with self.conn:
+                self.conn.execute('DELETE FROM cache_entries WHERE created <= ?',
+                                  (time.time() - self.ttl,))
+            # The pragma frees one page per step and returns no rows, so
+            # execute() would stop after the first; executescript runs it out
+            self.conn.executescript('PRAGMA incremental_vacuum')
+    
+    def clear(self):
+        if self.conn is None:
+            return
+        with self.lock, self.conn:
+            self.conn.execute('DELETE FROM cache_entries')
+    
+    def __len__(self):
+        if self.conn is None:
+            return 0
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM cache_entries').fetchone()[0]
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return entry count and hit/miss counters"""
+        return {'entries': len(self), 'hits': self.hits, 'misses': self.misses}
+
+
+class TieredCache:
+    """In-memory LRU cache (L1) in front of a persistent cache (L2)"""
+    def __init__(self, l1: ResultCache, l2: PersistentCache):
+        self.l1 = l1
+        self.l2 = l2
+    
+    def get(self, key):
+        data = self.l1.get(key)
+        if data is not None:
+            return data
+        entry = self.l2.get_entry(key)
+        if entry:
+            data, timestamp = entry
+            # Keep the original timestamp so the TTL is not extended by promotion
+            self.l1.set(key, data, timestamp=timestamp)
+            return data
         return None
     
     def set(self, key, data):
-        self.cache[key] = (data, time.time())
+        self.l1.set(key, data)
+        self.l2.set(key, data)
+    
+    def sweep(self):
+        self.l1.sweep()
+        self.l2.compact()
     
     def clear(self):
-        self.cache.clear()
+        self.l1.clear()
+        self.l2.clear()
+    
+    def __len__(self):
+        return len(self.l1)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return L1 stats plus L2 counters"""
+        stats = self.l1.stats()
+        for name, value in self.l2.stats().items():
+            stats[f'l2_{name}'] = value
+        return stats
 
 # Global cache instance
-result_cache = ResultCache()
+if PERSISTENT_CACHE_ENABLED:
+    result_cache = TieredCache(ResultCache(), PersistentCache())
+else:
+    result_cache = ResultCache()
+
+# Targets the provider reported as not found (transport errors are never cached)
+negative_cache = ResultCache(max_entries=NEGATIVE_CACHE_MAX_ENTRIES, ttl=NEGATIVE_CACHE_DURATION)
+
+# Returned by APIClient._make_request when the provider answers "not found"
+NOT_FOUND = object()
+
+
+class SingleFlight:
+    """Let concurrent callers asking for the same key share one in-flight call"""
+    def __init__(self):
+        self.calls = {}
+        self.coalesced = 0
+        self.lock = threading.Lock()
+    
+    def do(self, key, func):
+        """Run func() for key, or wait for the call already running for it"""
+        with self.lock:
+            future = self.calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self.calls[key] = future
+            else:
+                self.coalesced += 1
+        
+        if not leader:
+            return future.result()
+        
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self.lock:
+                del self.calls[key]
+    
+    def stats(self) -> Dict[str, int]:
+        """Return in-flight count and how many calls were coalesced"""
+        with self.lock:
+            return {'in_flight': len(self.calls), 'coalesced': self.coalesced}
+
+# Shared by every APIClient so duplicate targets trigger one HTTP request
+inflight_requests = SingleFlight()
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Return positive and negative cache counters side by side"""
+    return {
+        'positive': result_cache.stats(),
+        'negative': negative_cache.stats(),
+        'inflight': inflight_requests.stats()
+    }
+
+
+class CircuitBreaker:
+    """Per-endpoint circuit breaker that fails fast while an endpoint is down"""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+    
+    def __init__(self, failure_threshold=CIRCUIT_BREAKER_THRESHOLD,
+                 reset_timeout=CIRCUIT_BREAKER_RESET):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started = 0.0
+        self.lock = threading.Lock()
+    
+    def allow_request(self) -> bool:
+        """
+        True if a request may be sent; while half-open only one probe is let through
+        
+        A probe that never reported back (e.g. its caller died) is replaced
+        by a new one after reset_timeout, so the endpoint cannot stay stuck.
+        """
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            now = time.monotonic()
+            if (self.state == self.OPEN and now - self.opened_at >= self.reset_timeout) or \
+                    (self.state == self.HALF_OPEN and now - self.probe_started >= self.reset_timeout):
+                self.state = self.HALF_OPEN
+                self.probe_started = now
+                return True
+            return False
+    
+    def record_success(self):
+        with self.lock:
+            self.state = self.CLOSED
+            self.failures = 0
+    
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+# One breaker per endpoint URL, shared by all clients
+circuit_breakers = {}
+_circuit_breakers_lock = threading.Lock()
+
+def get_circuit_breaker(endpoint: str) -> CircuitBreaker:
+    """Return the circuit breaker for an endpoint, creating it on first use"""
+    with _circuit_breakers_lock:
+        if endpoint not in circuit_breakers:
+            circuit_breakers[endpoint] = CircuitBreaker(CIRCUIT_BREAKER_THRESHOLD,
+                                                        CIRCUIT_BREAKER_RESET)
+        return circuit_breakers[endpoint]
+
+def backoff_delay(attempt: int) -> float:
+    """Capped exponential backoff with jitter for the given retry attempt"""
+    delay = min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * (2 ** attempt))
+    # Equal jitter: always wait at least half, spread the rest to avoid bursts
+    return delay / 2 + random.uniform(0, delay / 2)
+
+# Returned by APIClient._request_route when a route should be failed over
+_ROUTE_FAILED = object()
 
 
 class APIClient:
     """Client for interacting with tracking APIs"""
     
     def __init__(self):
+        # Lookup types whose bulk endpoint turned out to be unsupported
+        self.bulk_unsupported = set()
         self.session = requests.Session()
+        # Keep-alive pool so repeated lookups reuse the same TCP/TLS connection
+        adapter = HTTPAdapter(pool_connections=CONNECTION_POOL_SIZE,
+                              pool_maxsize=CONNECTION_POOL_SIZE)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
         self.session.headers.update({
             'User-Agent': 'Pegasus-Lacak-Nomor/3.0',
             'Accept': 'application/json'
@@ -76,100 +597,238 @@ class APIClient:
                 'Authorization': f'Bearer {API_KEYS["primary"]}'
             })
     
-    def _make_request(self, endpoint: str, params: Dict) -> Optional[Dict]:
-        """Make HTTP request with retry logic"""
-        if RATE_LIMIT_ENABLED and not rate_limiter.can_make_request():
-            print(f"{Fore.YELLOW}[!] Rate limit reached. Waiting...{Style.RESET_ALL}")
-            time.sleep(REQUEST_DELAY * 2)
-            return None
+    def _routes(self, endpoint: str) -> List[Tuple[str, str]]:
+        """(endpoint, api_key) pairs to try in order: primary, then secondary"""
+        routes = [(endpoint, API_KEYS.get('primary'))]
+        if API_KEYS.get('secondary'):
+            name = next((key for key, url in API_ENDPOINTS.items() if url == endpoint), None)
+            routes.append((API_ENDPOINTS_SECONDARY.get(name) or endpoint, API_KEYS['secondary']))
+        return routes
+    
+    def _make_request(self, endpoint: str, params: Dict, method: str = 'GET',
+                      json_body: Optional[Dict] = None, bulk: bool = False) -> Optional[Any]:
+        """
+        Make HTTP request with retry logic, failing over to the secondary key
+        
+        Args:
+            bulk: NOT_FOUND then means the endpoint itself is missing (404 or
+                405); an empty 200 body is returned as-is
+        
+        Returns:
+            Parsed JSON, NOT_FOUND if the provider reported no match,
+            or None on transport/API errors
+        """
+        routes = self._routes(endpoint)
+        for i, (route_endpoint, api_key) in enumerate(routes):
+            if i > 0:
+                print(f"{Fore.YELLOW}[!] Failing over to secondary API key{Style.RESET_ALL}")
+            result = self._request_route(route_endpoint, api_key, params, method, json_body, bulk)
+            if result is not _ROUTE_FAILED:
+                return result
+        return None
+    
+    def _request_route(self, endpoint: str, api_key: str, params: Dict,
+                       method: str, json_body: Optional[Dict], bulk: bool = False) -> Any:
+        """Send one request to one endpoint/key, retrying with backoff"""
+        breaker = get_circuit_breaker(endpoint)
+        headers = {'Authorization': f'Bearer {api_key}'}
         
         for attempt in range(MAX_API_RETRIES):
+            if not breaker.allow_request():
+                print(f"{Fore.YELLOW}[!] Endpoint temporarily disabled after repeated failures{Style.RESET_ALL}")
+                return _ROUTE_FAILED
+            
+            if RATE_LIMIT_ENABLED:
+                wait_time = rate_limiter.wait_time()
+                if wait_time > 0:
+                    print(f"{Fore.YELLOW}[!] Rate limit reached. Waiting {wait_time:.1f}s...{Style.RESET_ALL}")
+                if not rate_limiter.acquire(timeout=RATE_LIMIT_ACQUIRE_TIMEOUT):
+                    print(f"{Fore.RED}[!] No rate limit slot within {RATE_LIMIT_ACQUIRE_TIMEOUT}s, "
+                          f"giving up{Style.RESET_ALL}")
+                    return _ROUTE_FAILED
+            
             try:
-                response = self.session.get(
+                response = self.session.request(
+                    method,
                     endpoint,
                     params=params,
+                    json=json_body,
+                    headers=headers,
                     timeout=API_TIMEOUT
                 )
                 
+                if response.status_code >= 500:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                
+                if RATE_LIMIT_ENABLED and ADAPTIVE_RATE_LIMIT:
+                    rate_limiter.update_from_headers(response.headers)
+                
                 if response.status_code == 200:
-                    rate_limiter.add_request()
-                    time.sleep(REQUEST_DELAY)
-                    return response.json()
+                    # The rate limiter already paces requests; fixed delay only without it
+                    if not RATE_LIMIT_ENABLED:
+                        time.sleep(REQUEST_DELAY)
+                    data = response.json()
+                    return data if data or bulk else NOT_FOUND
+                elif response.status_code == 404:  # Provider has no record
+                    return NOT_FOUND
+                elif response.status_code == 405 and bulk:  # Bulk route not offered
+                    return NOT_FOUND
                 elif response.status_code == 429:  # Too Many Requests
-                    wait_time = int(response.headers.get('Retry-After', REQUEST_DELAY * 2))
-                    print(f"{Fore.YELLOW}[!] Rate limited. Waiting {wait_time}s...{Style.RESET_ALL}")
-                    time.sleep(wait_time)
+                    wait_time = parse_retry_after(response.headers.get('Retry-After'))
+                    if wait_time is None:
+                        wait_time = REQUEST_DELAY * 2
+                    print(f"{Fore.YELLOW}[!] Rate limited. Waiting {wait_time:.0f}s...{Style.RESET_ALL}")
+                    if RATE_LIMIT_ENABLED:
+                        # The limiter holds this and every other request until then
+                        rate_limiter.pause(wait_time)
+                    else:
+                        time.sleep(wait_time)
+                    continue
                 elif response.status_code == 401:  # Unauthorized
                     print(f"{Fore.RED}[!] API authentication failed. Check your API key.{Style.RESET_ALL}")
-                    return None
+                    return _ROUTE_FAILED
                 else:
                     print(f"{Fore.YELLOW}[!] API returned status {response.status_code}{Style.RESET_ALL}")
                     
             except requests.exceptions.Timeout:
+                breaker.record_failure()
                 print(f"{Fore.YELLOW}[!] Request timeout (attempt {attempt + 1}/{MAX_API_RETRIES}){Style.RESET_ALL}")
             except requests.exceptions.ConnectionError:
+                breaker.record_failure()
                 print(f"{Fore.YELLOW}[!] Connection error (attempt {attempt + 1}/{MAX_API_RETRIES}){Style.RESET_ALL}")
             except Exception as e:
+                # Also reports back for a half-open probe, which would otherwise hang
+                breaker.record_failure()
                 print(f"{Fore.RED}[!] Error: {str(e)}{Style.RESET_ALL}")
             
             if attempt < MAX_API_RETRIES - 1:
-                time.sleep(REQUEST_DELAY * (attempt + 1))
+                time.sleep(backoff_delay(attempt))
         
-        return None
+        return _ROUTE_FAILED
     
-    def lookup_phone(self, phone_number: str) -> Optional[Dict]:
-        """Lookup phone number information"""
-        # Check cache first
+    def cached_result(self, cache_key: str) -> Tuple[bool, Optional[Dict]]:
+        """
+        Look a key up in the positive and negative caches
+        
+        Returns:
+            (hit, data) - hit is True when no API call is needed
+        """
         if CACHE_RESULTS:
-            cached = result_cache.get(f"phone_{phone_number}")
+            cached = result_cache.get(cache_key)
             if cached:
-                print(f"{Fore.CYAN}[i] Using cached data{Style.RESET_ALL}")
-                return cached
+                _log(f"{Fore.CYAN}[i] Using cached data{Style.RESET_ALL}")
+                return True, cached
+        
+        if NEGATIVE_CACHE_ENABLED and negative_cache.get(cache_key):
+            _log(f"{Fore.CYAN}[i] Using cached not-found result{Style.RESET_ALL}")
+            return True, None
+        
+        return False, None
+    
+    def _lookup(self, cache_key: str, endpoint_name: str, params: Dict, label: str) -> Optional[Dict]:
+        """Cached lookup against one API endpoint"""
+        # Check cache first
+        hit, cached = self.cached_result(cache_key)
+        if hit:
+            return cached
         
         if not API_ENABLED or not API_KEYS.get('primary'):
             print(f"{Fore.YELLOW}[!] API not configured. Use API_KEYS in config/api_config.py{Style.RESET_ALL}")
             return None
         
-        endpoint = API_ENDPOINTS.get('phone_lookup')
+        endpoint = API_ENDPOINTS.get(endpoint_name)
         if not endpoint:
             return None
         
-        print(f"{Fore.CYAN}[*] Querying API for phone: {phone_number}{Style.RESET_ALL}")
+        # Concurrent requests for the same target share one fetch
+        return inflight_requests.do(
+            cache_key, lambda: self._fetch(cache_key, endpoint, params, label))
+    
+    def _fetch(self, cache_key: str, endpoint: str, params: Dict, label: str) -> Optional[Dict]:
+        """Query the API and record the answer in the positive or negative cache"""
+        _log(f"{Fore.CYAN}[*] Querying API for {label}{Style.RESET_ALL}")
         
-        params = {'phone': phone_number}
         result = self._make_request(endpoint, params)
         
+        if result is NOT_FOUND:
+            if NEGATIVE_CACHE_ENABLED:
+                negative_cache.set(cache_key, True)
+            return None
+        
         if result and CACHE_RESULTS:
-            result_cache.set(f"phone_{phone_number}", result)
+            result_cache.set(cache_key, result)
         
         return result
     
+    def lookup_phone(self, phone_number: str) -> Optional[Dict]:
+        """Lookup phone number information"""
+        return self._lookup(f"phone_{phone_number}", 'phone_lookup',
+                            {'phone': phone_number}, f"phone: {phone_number}")
+    
     def lookup_nik(self, nik: str) -> Optional[Dict]:
         """Lookup NIK information"""
-        # Check cache first
-        if CACHE_RESULTS:
-            cached = result_cache.get(f"nik_{nik}")
-            if cached:
-                print(f"{Fore.CYAN}[i] Using cached data{Style.RESET_ALL}")
-                return cached
-        
-        if not API_ENABLED or not API_KEYS.get('primary'):
-            print(f"{Fore.YELLOW}[!] API not configured. Use API_KEYS in config/api_config.py{Style.RESET_ALL}")
+        return self._lookup(f"nik_{nik}", 'nik_lookup',
+                            {'nik': nik}, f"NIK: {nik[:6]}****")
+    
+    def bulk_endpoint(self, lookup_type: str) -> Optional[str]:
+        """Return the bulk endpoint for a lookup type, or None if unavailable"""
+        if lookup_type in self.bulk_unsupported:
             return None
+        return API_ENDPOINTS.get(f"{lookup_type}_bulk_lookup") or None
+    
+    def lookup_bulk(self, lookup_type: str, targets: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Lookup several targets with one request to the bulk endpoint
         
-        endpoint = API_ENDPOINTS.get('nik_lookup')
-        if not endpoint:
-            return None
+        Args:
+            lookup_type: "phone" or "nik"
+            targets: At most BULK_LOOKUP['batch_size'] targets
         
-        print(f"{Fore.CYAN}[*] Querying API for NIK: {nik[:6]}****{Style.RESET_ALL}")
+        Returns:
+            Dict of target -> result (None when the provider has no record).
+            Targets missing from the dict were not answered and need a
+            single lookup.
+        """
+        endpoint = self.bulk_endpoint(lookup_type)
+        if not endpoint or not API_ENABLED or not API_KEYS.get('primary'):
+            return {}
         
-        params = {'nik': nik}
-        result = self._make_request(endpoint, params)
+        _log(f"{Fore.CYAN}[*] Querying bulk API for {len(targets)} {lookup_type} targets{Style.RESET_ALL}")
         
-        if result and CACHE_RESULTS:
-            result_cache.set(f"nik_{nik}", result)
+        body = {BULK_LOOKUP['request_key'][lookup_type]: targets}
+        response = self._make_request(endpoint, {}, method='POST', json_body=body, bulk=True)
         
-        return result
+        if response is NOT_FOUND:
+            # Endpoint missing on this provider (404/405): use single lookups from now on
+            if lookup_type not in self.bulk_unsupported:
+                self.bulk_unsupported.add(lookup_type)
+                print(f"{Fore.YELLOW}[!] Bulk {lookup_type} endpoint not supported, using single lookups{Style.RESET_ALL}")
+            return {}
+        if not isinstance(response, (dict, list)):
+            return {}
+        
+        records = response
+        if isinstance(response, dict):
+            records = response.get(BULK_LOOKUP['results_key'], {})
+        if isinstance(records, list):
+            id_field = BULK_LOOKUP['id_field'][lookup_type]
+            records = {str(record.get(id_field)): record
+                       for record in records if isinstance(record, dict)}
+        
+        results = {}
+        for target in targets:
+            cache_key = f"{lookup_type}_{target}"
+            record = records.get(target)
+            if record:
+                if CACHE_RESULTS:
+                    result_cache.set(cache_key, record)
+            elif NEGATIVE_CACHE_ENABLED:
+                negative_cache.set(cache_key, True)
+            results[target] = record or None
+        
+        return results
     
     def check_operator(self, phone_number: str) -> Optional[str]:
         """Check phone operator using real API or local validation"""
@@ -184,7 +843,7 @@ class APIClient:
             if endpoint:
                 params = {'phone': phone_number}
                 result = self._make_request(endpoint, params)
-                if result and 'operator' in result:
+                if isinstance(result, dict) and 'operator' in result:
                     return result['operator']
         
         return "Unknown"
@@ -204,199 +863,552 @@ class DatabaseClient:
     def __init__(self, db_path: str = DATABASE_PATH):
         self.db_path = db_path
         self.initialized = False
+        # One long-lived connection per thread (sqlite3 connections are thread-bound)
+        self._local = threading.local()
+        # Lookup type -> memory-mapped snapshot, shared by all threads
+        self.snapshots: Dict[str, Snapshot] = {}
         if DATABASE_ENABLED:
             self._init_database()
+            if DATABASE_SNAPSHOT_ENABLED:
+                self.reload_snapshots()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening and tuning it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = configure_connection(sqlite3.connect(self.db_path),
+                                        DATABASE_CACHE_SIZE_KB, DATABASE_BUSY_TIMEOUT_MS)
+            self._local.conn = conn
+        return conn
+    
+    def close(self):
+        """Close the calling thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+    
+    def reload_snapshots(self):
+        """(Re)open the lookup snapshots built next to the database, if any"""
+        snapshots = {}
+        for lookup_type, (table, _) in self.RECORD_TABLES.items():
+            path = snapshot_path(self.db_path, table)
+            if not os.path.exists(path):
+                continue
+            try:
+                snapshots[lookup_type] = Snapshot(path)
+            except Exception as e:
+                print(f"{Fore.RED}[!] Snapshot error ({path}): {str(e)}{Style.RESET_ALL}")
+        # Old maps are left to the garbage collector; readers may still hold them
+        self.snapshots = snapshots
     
     def _init_database(self):
-        """Initialize database schema"""
+        """Initialize database schema (DDL only runs on creation or migration)"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Create tables
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS phone_records (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    phone_number TEXT UNIQUE NOT NULL,
-                    name TEXT,
-                    address TEXT,
-                    city TEXT,
-                    province TEXT,
-                    operator TEXT,
-                    last_updated TEXT
-                )
-            ''')
-            
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS nik_records (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nik TEXT UNIQUE NOT NULL,
-                    name TEXT,
-                    birth_date TEXT,
-                    gender TEXT,
-                    address TEXT,
-                    city TEXT,
-                    province TEXT,
-                    last_updated TEXT
-                )
-            ''')
-            
-            conn.commit()
-            conn.close()
+            if apply_schema(self._connect()):
+                print(f"{Fore.GREEN}[✓] Database initialized{Style.RESET_ALL}")
             self.initialized = True
-            print(f"{Fore.GREEN}[✓] Database initialized{Style.RESET_ALL}")
         except Exception as e:
             print(f"{Fore.RED}[!] Database initialization error: {str(e)}{Style.RESET_ALL}")
             self.initialized = False
     
-    def query_phone(self, phone_number: str) -> Optional[Dict]:
-        """Query phone number from local database"""
+    # Lookup type -> (table, content columns); the first column is the key
+    RECORD_TABLES = {
+        'phone': ('phone_records', PHONE_COLUMNS),
+        'nik': ('nik_records', NIK_COLUMNS),
+    }
+    # Columns are selected by name so both table layouts work
+    POINT_QUERIES = {
+        lookup_type: (
+            columns + ('last_updated',),
+            f"SELECT {', '.join(columns)}, last_updated FROM {table} WHERE {columns[0]} = ?"
+        )
+        for lookup_type, (table, columns) in RECORD_TABLES.items()
+    }
+    
+    def _query_record(self, lookup_type: str, key: str) -> Optional[Dict]:
+        """Fetch one record by its key"""
         if not self.initialized:
             return None
         
+        snapshot = self.snapshots.get(lookup_type)
+        if snapshot is not None:
+            record = snapshot.get(key)
+            if record is not None:
+                return record
+        
+        fields, sql = self.POINT_QUERIES[lookup_type]
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                'SELECT * FROM phone_records WHERE phone_number = ?',
-                (phone_number,)
-            )
-            
-            row = cursor.fetchone()
-            conn.close()
+            row = self._connect().execute(sql, (key,)).fetchone()
             
             if row:
-                return {
-                    'phone_number': row[1],
-                    'name': row[2],
-                    'address': row[3],
-                    'city': row[4],
-                    'province': row[5],
-                    'operator': row[6],
-                    'last_updated': row[7]
-                }
+                return dict(zip(fields, row))
         except Exception as e:
             print(f"{Fore.RED}[!] Database query error: {str(e)}{Style.RESET_ALL}")
         
         return None
     
+    def query_phone(self, phone_number: str) -> Optional[Dict]:
+        """Query phone number from local database"""
+        return self._query_record('phone', phone_number)
+    
     def query_nik(self, nik: str) -> Optional[Dict]:
         """Query NIK from local database"""
-        if not self.initialized:
-            return None
+        return self._query_record('nik', nik)
+    
+    def query_many(self, lookup_type: str, keys: List[str]) -> Dict[str, Dict]:
+        """
+        Resolve many phone numbers or NIKs with chunked IN (...) queries
+        
+        Returns:
+            Dict mapping each key found to its record (misses are absent)
+        """
+        if not self.initialized or not keys:
+            return {}
         
+        found = {}
+        snapshot = self.snapshots.get(lookup_type)
+        if snapshot is not None:
+            found = snapshot.get_many(keys)
+            # Anything added since the snapshot was built is still in SQLite
+            keys = [key for key in keys if key not in found]
+            if not keys:
+                return found
+        
+        table, columns = self.RECORD_TABLES[lookup_type]
+        fields = list(columns) + ['last_updated']
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                'SELECT * FROM nik_records WHERE nik = ?',
-                (nik,)
-            )
-            
-            row = cursor.fetchone()
-            conn.close()
-            
-            if row:
-                return {
-                    'nik': row[1],
-                    'name': row[2],
-                    'birth_date': row[3],
-                    'gender': row[4],
-                    'address': row[5],
-                    'city': row[6],
-                    'province': row[7],
-                    'last_updated': row[8]
-                }
+            conn = self._connect()
+            for start in range(0, len(keys), MAX_QUERY_PARAMS):
+                chunk = keys[start:start + MAX_QUERY_PARAMS]
+                rows = conn.execute(
+                    f"SELECT {', '.join(fields)} FROM {table} "
+                    f"WHERE {columns[0]} IN ({', '.join('?' * len(chunk))})",
+                    chunk
+                )
+                for row in rows:
+                    found[row[0]] = dict(zip(fields, row))
         except Exception as e:
             print(f"{Fore.RED}[!] Database query error: {str(e)}{Style.RESET_ALL}")
         
-        return None
+        return found
     
     def add_phone_record(self, data: Dict) -> bool:
-        """Add phone record to database"""
+        """Add or update a phone record (unchanged content is left untouched)"""
         if not self.initialized:
             return False
         
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT OR REPLACE INTO phone_records 
-                (phone_number, name, address, city, province, operator, last_updated)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                data.get('phone_number'),
-                data.get('name'),
-                data.get('address'),
-                data.get('city'),
-                data.get('province'),
-                data.get('operator'),
-                datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            ))
-            
-            conn.commit()
-            conn.close()
+            conn = self._connect()
+            row = tuple(data.get(column) for column in PHONE_COLUMNS)
+            with conn:
+                upsert_rows(conn, 'phone_records', [row],
+                            datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
             return True
         except Exception as e:
             print(f"{Fore.RED}[!] Error adding record: {str(e)}{Style.RESET_ALL}")
             return False
 
 
-def perform_real_lookup(target: str, lookup_type: str = "auto") -> Optional[Dict]:
+class RecordWriter:
     """
-    Perform real lookup using API or database
-    
-    Args:
-        target: Phone number or NIK to lookup
-        lookup_type: "phone", "nik", or "auto"
+    Single background thread committing API results to the local database
     
-    Returns:
-        Dict with result data or None if not found
+    Lookups only enqueue (never blocking; a full queue drops the record and
+    counts it). The writer drains the queue in batches of up to batch_size
+    records, or whatever arrived within flush_interval seconds, and upserts
+    each batch in one transaction. Pending records are flushed at exit.
+    If the database cannot be opened the writer is marked dead and later
+    records are dropped instead of queued.
     """
-    api_client = APIClient()
-    db_client = DatabaseClient()
+    _STOP = object()
+    
+    def __init__(self, db_path: str = DATABASE_PATH, batch_size: int = WRITE_THROUGH_BATCH_SIZE,
+                 flush_interval: float = WRITE_THROUGH_FLUSH_INTERVAL,
+                 max_queue: int = WRITE_THROUGH_QUEUE_SIZE):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.lock = threading.Lock()
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.errors = 0
+        self.max_depth = 0
+        self.closed = False
+        self.dead = False
+        self.thread = threading.Thread(target=self._run, name="record-writer", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+    
+    def submit(self, lookup_type: str, target: str, data: Dict) -> bool:
+        """Queue an API result for writing; returns False if it was dropped"""
+        table, columns = DatabaseClient.RECORD_TABLES[lookup_type]
+        row = (target,) + tuple(data.get(column) for column in columns[1:])
+        if self.dead or not self.thread.is_alive():
+            with self.lock:
+                self.dropped += 1
+            return False
+        try:
+            self.queue.put_nowait((table, row))
+        except queue.Full:
+            with self.lock:
+                self.dropped += 1
+            return False
+        if self.dead:
+            # The writer died between the check above and the put
+            self._discard()
+            return False
+        
+        depth = self.queue.qsize()
+        with self.lock:
+            self.max_depth = max(self.max_depth, depth)
+        return True
     
-    result = None
+    def _run(self):
+        try:
+            conn = configure_connection(sqlite3.connect(self.db_path),
+                                        DATABASE_CACHE_SIZE_KB, DATABASE_BUSY_TIMEOUT_MS)
+            apply_schema(conn)
+        except Exception as e:
+            with self.lock:
+                self.errors += 1
+            self.dead = True
+            print(f"{Fore.RED}[!] Write-through disabled: {str(e)}{Style.RESET_ALL}")
+            self._discard()
+            return
+        
+        stopping = False
+        while not stopping:
+            # Block for the first record, then gather the rest of the batch
+            items = [self.queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(items) < self.batch_size and items[-1] is not self._STOP:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            stopping = items[-1] is self._STOP
+            self._write(conn, [item for item in items if item is not self._STOP])
+            for _ in items:
+                self.queue.task_done()
+        conn.close()
     
-    # Determine lookup type
-    if lookup_type == "auto":
+    def _discard(self):
+        """Drop whatever was queued before the writer died"""
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not self._STOP:
+                with self.lock:
+                    self.dropped += 1
+            self.queue.task_done()
+    
+    def _write(self, conn: sqlite3.Connection, batch: List[Tuple[str, Tuple]]):
+        if not batch:
+            return
+        by_table: Dict[str, List[Tuple]] = {}
+        for table, row in batch:
+            by_table.setdefault(table, []).append(row)
+        
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            with conn:
+                for table, rows in by_table.items():
+                    upsert_rows(conn, table, rows, timestamp)
+            with self.lock:
+                self.written += len(batch)
+                self.batches += 1
+        except Exception as e:
+            with self.lock:
+                self.errors += len(batch)
+            print(f"{Fore.RED}[!] Write-through error: {str(e)}{Style.RESET_ALL}")
+    
+    def flush(self):
+        """Block until every queued record has been committed"""
+        # Like queue.join(), but gives up once the writer thread has exited
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks and self.thread.is_alive():
+                self.queue.all_tasks_done.wait(0.1)
+    
+    def close(self):
+        """Flush pending records and stop the writer thread"""
+        if self.closed:
+            return
+        self.closed = True
+        while self.thread.is_alive():
+            try:
+                self.queue.put(self._STOP, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        self.thread.join()
+    
+    def stats(self) -> Dict[str, int]:
+        """Return queue depth and write counters"""
+        with self.lock:
+            return {
+                'queued': self.queue.qsize(),
+                'max_depth': self.max_depth,
+                'written': self.written,
+                'batches': self.batches,
+                'dropped': self.dropped,
+                'errors': self.errors
+            }
+
+
+class LookupService:
+    """Long-lived lookup service sharing one API session and database handle"""
+    
+    def __init__(self, db_path: str = DATABASE_PATH):
+        self.api_client = APIClient()
+        self.db_client = DatabaseClient(db_path)
+        # Write-through of API results into the local database (optional)
+        self.writer = None
+        if DATABASE_WRITE_THROUGH and self.db_client.initialized:
+            self.writer = RecordWriter(db_path, WRITE_THROUGH_BATCH_SIZE,
+                                       WRITE_THROUGH_FLUSH_INTERVAL, WRITE_THROUGH_QUEUE_SIZE)
+    
+    @staticmethod
+    def resolve_type(target: str, lookup_type: str = "auto") -> Optional[str]:
+        """Resolve "auto" to "phone" or "nik" based on the target format"""
+        if lookup_type != "auto":
+            return lookup_type
         if target.startswith('08'):
-            lookup_type = "phone"
-        elif len(target) == 16:
-            lookup_type = "nik"
-        else:
-            print(f"{Fore.RED}[!] Cannot determine lookup type{Style.RESET_ALL}")
-            return None
+            return "phone"
+        if len(target) == 16:
+            return "nik"
+        print(f"{Fore.RED}[!] Cannot determine lookup type{Style.RESET_ALL}")
+        return None
     
-    # Try database first (faster)
-    if DATABASE_ENABLED:
-        print(f"{Fore.CYAN}[*] Checking local database...{Style.RESET_ALL}")
-        if lookup_type == "phone":
-            result = db_client.query_phone(target)
-        elif lookup_type == "nik":
-            result = db_client.query_nik(target)
+    def lookup_local(self, target: str, lookup_type: str) -> Tuple[bool, Optional[Dict]]:
+        """
+        Resolve a target from the local database and result caches only
         
-        if result:
-            print(f"{Fore.GREEN}[✓] Found in local database{Style.RESET_ALL}")
-            return result
+        Returns:
+            (resolved, result) - resolved is False when the API must be asked
+        """
+        # Try database first (faster)
+        if DATABASE_ENABLED:
+            _log(f"{Fore.CYAN}[*] Checking local database...{Style.RESET_ALL}")
+            if lookup_type == "phone":
+                result = self.db_client.query_phone(target)
+            else:
+                result = self.db_client.query_nik(target)
+            
+            if result:
+                _log(f"{Fore.GREEN}[✓] Found in local database{Style.RESET_ALL}")
+                return True, result
+        
+        return self.api_client.cached_result(f"{lookup_type}_{target}")
+    
+    def lookup_remote(self, target: str, lookup_type: str) -> Optional[Dict]:
+        """Resolve a target through the remote API (paced by the shared rate limiter)"""
+        result = None
+        if API_ENABLED and API_KEYS.get('primary'):
+            _log(f"{Fore.CYAN}[*] Querying remote API...{Style.RESET_ALL}")
+            if lookup_type == "phone":
+                result = self.api_client.lookup_phone(target)
+            else:
+                result = self.api_client.lookup_nik(target)
+            
+            if result:
+                _log(f"{Fore.GREEN}[✓] Found via API{Style.RESET_ALL}")
+                if self.writer is not None:
+                    self.writer.submit(lookup_type, target, result)
+                return result
+        
+        # No results found
+        _log(f"{Fore.YELLOW}[!] No results from API or database{Style.RESET_ALL}")
+        return result
     
-    # Try API if database didn't return results
-    if API_ENABLED and API_KEYS.get('primary'):
-        print(f"{Fore.CYAN}[*] Querying remote API...{Style.RESET_ALL}")
-        if lookup_type == "phone":
-            result = api_client.lookup_phone(target)
-        elif lookup_type == "nik":
-            result = api_client.lookup_nik(target)
+    def lookup(self, target: str, lookup_type: str = "auto") -> Optional[Dict]:
+        """
+        Perform real lookup using API or database
+        
+        Args:
+            target: Phone number or NIK to lookup
+            lookup_type: "phone", "nik", or "auto"
         
-        if result:
-            print(f"{Fore.GREEN}[✓] Found via API{Style.RESET_ALL}")
+        Returns:
+            Dict with result data or None if not found
+        """
+        lookup_type = self.resolve_type(target, lookup_type)
+        if lookup_type is None:
+            return None
+        
+        resolved, result = self.lookup_local(target, lookup_type)
+        if resolved:
+            if result is None:
+                _log(f"{Fore.YELLOW}[!] No results from API or database{Style.RESET_ALL}")
             return result
+        
+        return self.lookup_remote(target, lookup_type)
+    
+    @staticmethod
+    def _quietly(func, *args):
+        _thread_state.quiet = True
+        return func(*args)
     
-    # No results found
-    if not result:
-        print(f"{Fore.YELLOW}[!] No results from API or database{Style.RESET_ALL}")
+    @staticmethod
+    def _forward(source: Future, target: Future):
+        """Resolve target with source's outcome once source completes"""
+        def done(future):
+            error = future.exception()
+            if error is not None:
+                target.set_exception(error)
+            else:
+                target.set_result(future.result())
+        source.add_done_callback(done)
+    
+    def iter_batch(self, targets: List[str], workers: int = 4,
+                   timings: Optional[Dict] = None) -> Iterator[Tuple[str, Optional[Dict]]]:
+        """
+        Look up many targets concurrently, yielding (target, result) in input order
+        
+        Targets are resolved in stages: one set-based pass over the local
+        database, then the result caches, and only the remaining misses go to
+        the API stage, which the shared rate limiter paces. Misses go to the
+        bulk endpoint in chunks when one is configured, and whatever a chunk
+        leaves unanswered falls back to single lookups on the worker pool as
+        soon as that chunk returns. Each result is yielded as soon as it and
+        every target before it are resolved.
+        
+        Args:
+            timings: Optional dict filled with per-stage seconds and hit counts
+                ('database', 'cache', 'remote', 'database_hits', 'cache_hits',
+                'remote_lookups'); complete once the iterator is exhausted
+        """
+        stats = timings if timings is not None else {}
+        types = [self.resolve_type(target) for target in targets]
+        unique = list(dict.fromkeys(
+            (lookup_type, target) for target, lookup_type in zip(targets, types) if lookup_type
+        ))
+        found = {}
+        
+        # Stage 1: local database, a few chunked IN (...) queries per type
+        start = time.perf_counter()
+        if DATABASE_ENABLED:
+            for lookup_type in ('phone', 'nik'):
+                keys = [target for kind, target in unique if kind == lookup_type]
+                for target, record in self.db_client.query_many(lookup_type, keys).items():
+                    found[(lookup_type, target)] = record
+        stats['database'] = time.perf_counter() - start
+        stats['database_hits'] = len(found)
+        
+        # Stage 2: result caches (including cached "not found" answers)
+        start = time.perf_counter()
+        for key in unique:
+            if key not in found:
+                hit, data = self.api_client.cached_result(f"{key[0]}_{key[1]}")
+                if hit:
+                    found[key] = data
+        stats['cache'] = time.perf_counter() - start
+        stats['cache_hits'] = len(found) - stats['database_hits']
+        
+        # Stage 3: unique misses, in input order, still needing the API
+        misses = [key for key in unique if key not in found]
+        stats['remote_lookups'] = len(misses)
+        start = time.perf_counter()
+        finished = [start]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            def single(key):
+                return executor.submit(self._quietly, self.lookup_remote, key[1], key[0])
+            
+            def chunk_done(lookup_type, chunk, future):
+                # Runs when this chunk returns; its leftovers start right away
+                answered = future.result() if future.exception() is None else {}
+                for target in chunk:
+                    key = (lookup_type, target)
+                    if target in answered:
+                        result = answered[target]
+                        if result and self.writer is not None:
+                            self.writer.submit(lookup_type, target, result)
+                        remote[key].set_result(result)
+                        continue
+                    try:
+                        self._forward(single(key), remote[key])
+                    except RuntimeError:
+                        # Iteration was abandoned and the pool is shutting down
+                        remote[key].cancel()
+            
+            # One future per unique miss; duplicates share it. Misses of a type
+            # with a bulk endpoint are resolved by their chunk's callback.
+            bulk_types = {lookup_type for lookup_type in ('phone', 'nik')
+                          if self.api_client.bulk_endpoint(lookup_type)}
+            remote: Dict[Tuple[str, str], Future] = {}
+            for key in misses:
+                if key[0] in bulk_types:
+                    remote[key] = Future()
+                    remote[key].add_done_callback(lambda _: finished.append(time.perf_counter()))
+            
+            # Providers with a bulk endpoint answer misses in chunks
+            size = BULK_LOOKUP['batch_size']
+            for lookup_type in ('phone', 'nik'):
+                if lookup_type not in bulk_types:
+                    continue
+                chunk_targets = [target for kind, target in misses if kind == lookup_type]
+                for i in range(0, len(chunk_targets), size):
+                    chunk = chunk_targets[i:i + size]
+                    future = executor.submit(self._quietly, self.api_client.lookup_bulk, lookup_type, chunk)
+                    future.add_done_callback(
+                        lambda done, lookup_type=lookup_type, chunk=chunk: chunk_done(lookup_type, chunk, done))
+            
+            # Everything else goes straight to single lookups
+            for key in misses:
+                if key not in remote:
+                    remote[key] = single(key)
+                    remote[key].add_done_callback(lambda _: finished.append(time.perf_counter()))
+            
+            for target, lookup_type in zip(targets, types):
+                key = (lookup_type, target)
+                if lookup_type is None:
+                    yield target, None
+                elif key in found:
+                    yield target, found[key]
+                else:
+                    yield target, remote[key].result()
+        stats['remote'] = max(finished) - start
+    
+    def batch_lookup(self, targets: List[str], workers: int = 4) -> List[Optional[Dict]]:
+        """Look up many targets concurrently, returning results in input order"""
+        return [result for _, result in self.iter_batch(targets, workers)]
+    
+    def check_operator(self, phone_number: str) -> Optional[str]:
+        """Check phone operator through the shared API client"""
+        return self.api_client.check_operator(phone_number)
+
+
+# Process-wide lookup service, created on first use
+_lookup_service = None
+_lookup_service_lock = threading.Lock()
+
+def get_lookup_service() -> LookupService:
+    """Return the shared LookupService, creating it on first call"""
+    global _lookup_service
+    if _lookup_service is None:
+        with _lookup_service_lock:
+            if _lookup_service is None:
+                _lookup_service = LookupService()
+    return _lookup_service
+
+
+def perform_real_lookup(target: str, lookup_type: str = "auto") -> Optional[Dict]:
+    """
+    Perform real lookup using API or database
+    
+    Args:
+        target: Phone number or NIK to lookup
+        lookup_type: "phone", "nik", or "auto"
     
-    return result
+    Returns:
+        Dict with result data or None if not found
+    """
+    return get_lookup_service().lookup(target, lookup_type)
@@ -4,16 +4,50 @@ Database Manager for Pegasus Lacak Nomor
 Tool untuk mengelola database lokal (import, export, query)
 """
 
+import io
+import os
+import re
+import gzip
 import sqlite3
 import json
 import csv
 import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from colorama import Fore, Style, init
 
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Allow running as `python utils/database_manager.py` from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.db_schema import (
+    AGGREGATE_DIMENSIONS, NIK_COLUMNS, PHONE_COLUMNS, TABLE_COLUMNS, INTERNAL_COLUMNS,
+    apply_schema, clear_table, compact_table, configure_connection, content_hash, delete_rows,
+    get_schema_version, is_compact, upsert_rows
+)
+from utils.snapshot import build_snapshot, snapshot_path
+from utils.dataset_generator import DEFAULT_SEED, GENERATORS
+
 init()
 
 DATABASE_PATH = "data/local_database.db"
+IMPORT_CHUNK_SIZE = 5000  # rows per executemany/transaction during import
+JSON_READ_SIZE = 1 << 16  # bytes read per step when streaming a JSON array
+JSON_MAX_ELEMENT_SIZE = 16 << 20  # characters one JSON array element may span
+CSV_READ_SIZE = 1 << 20  # bytes of CSV parsed and committed per batch
+EXPORT_ARRAYSIZE = 1000  # rows fetched per cursor round trip during export
+IMPORT_WORKERS = os.cpu_count() or 1  # parser processes for parallel import
+PARALLEL_RANGE_SIZE = 4 << 20  # bytes of input per parser task
+VACUUM_STEP_PAGES = 2000  # free pages returned per incremental_vacuum step
+LATENCY_SAMPLES = 1000  # point lookups timed before and after maintenance
+
+AUTO_VACUUM_MODES = {0: 'none', 1: 'full', 2: 'incremental'}
 
 def print_colored(message, color="cyan"):
     """Print colored message."""
@@ -28,170 +62,650 @@ def print_colored(message, color="cyan"):
 def init_database():
     """Initialize database with schema."""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS phone_records (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                phone_number TEXT UNIQUE NOT NULL,
-                name TEXT,
-                address TEXT,
-                city TEXT,
-                province TEXT,
-                operator TEXT,
-                last_updated TEXT
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS nik_records (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nik TEXT UNIQUE NOT NULL,
-                name TEXT,
-                birth_date TEXT,
-                gender TEXT,
-                address TEXT,
-                city TEXT,
-                province TEXT,
-                last_updated TEXT
-            )
-        ''')
+        conn = configure_connection(sqlite3.connect(DATABASE_PATH))
         
-        conn.commit()
+        if apply_schema(conn):
+            print_colored("[✓] Database initialized successfully!", "green")
+        else:
+            print_colored(f"[✓] Database schema already up to date (version {get_schema_version(conn)})", "green")
         conn.close()
-        print_colored("[✓] Database initialized successfully!", "green")
         return True
     except Exception as e:
         print_colored(f"[!] Error initializing database: {str(e)}", "red")
         return False
 
-def import_from_json(json_file):
-    """Import phone records from JSON file."""
-    try:
-        with open(json_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
+# Characters that change nesting or string state inside a JSON value
+_JSON_STRUCTURE = re.compile(r'[\\"\[\]{},]')
+
+def _element_end(buf, pos):
+    """Index of the ',' or ']' ending the top-level array element at pos, or -1."""
+    depth = 0
+    in_string = False
+    escaped_until = -1
+    for match in _JSON_STRUCTURE.finditer(buf, pos):
+        i = match.start()
+        if i < escaped_until:
+            continue
+        char = buf[i]
+        if in_string:
+            if char == '\\':
+                escaped_until = i + 2
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in '[{':
+            depth += 1
+        elif char in ']}' and depth:
+            depth -= 1
+        elif char in ',]' and not depth:
+            return i
+    return -1
+
+def _iter_json_array(f):
+    """
+    Yield the elements of a top-level JSON array one at a time.
+    
+    A complete element that does not parse is yielded as None and skipped,
+    so the rest of the array still loads. An element still unfinished after
+    JSON_MAX_ELEMENT_SIZE characters aborts the read instead of buffering
+    the remainder of the file.
+    """
+    decoder = json.JSONDecoder()
+    raw = f.read(JSON_READ_SIZE)
+    buf = raw.lstrip()
+    if not buf.startswith('['):
+        raise ValueError("Expected a JSON array")
+    # Characters dropped from the front of buf, for error offsets
+    offset = len(raw) - len(buf)
+    pos = 1
+    eof = False
+    while True:
+        # Skip whitespace and separators between elements
+        while pos < len(buf) and buf[pos] in ' \t\r\n,':
+            pos += 1
+        if pos < len(buf) and buf[pos] == ']':
+            return
+        try:
+            if pos >= len(buf):
+                raise ValueError("need more data")
+            item, end = decoder.raw_decode(buf, pos)
+            # A value ending exactly at the buffer edge may be cut short (e.g. numbers)
+            if end == len(buf) and not eof:
+                raise ValueError("need more data")
+        except ValueError:
+            boundary = _element_end(buf, pos)
+            if boundary >= 0:
+                # Whole element is buffered, so it is malformed: reject and resync
+                yield None
+                pos = boundary
+                continue
+            if eof:
+                raise ValueError(f"Truncated or malformed JSON array at character {offset + pos:,}")
+            if len(buf) - pos > JSON_MAX_ELEMENT_SIZE:
+                raise ValueError(f"JSON array element at character {offset + pos:,} "
+                                 f"exceeds {JSON_MAX_ELEMENT_SIZE:,} characters")
+            chunk = f.read(JSON_READ_SIZE)
+            eof = not chunk
+            offset += pos
+            buf = buf[pos:] + chunk
+            pos = 0
+            continue
+        yield item
+        pos = end
+        if pos > JSON_READ_SIZE:
+            offset += pos
+            buf = buf[pos:]
+            pos = 0
+
+def iter_json_records(json_file):
+    """
+    Stream records from a JSON array or JSON Lines file.
+    
+    Records that cannot be parsed are yielded as None so the caller can
+    count them as rejected.
+    """
+    with open(json_file, 'r', encoding='utf-8') as f:
+        first = ''
+        while not first:
+            char = f.read(1)
+            if not char:
+                return
+            first = char.strip()
+        f.seek(0)
         
-        count = 0
-        if isinstance(data, list):
-            for record in data:
-                try:
-                    cursor.execute('''
-                        INSERT OR REPLACE INTO phone_records 
-                        (phone_number, name, address, city, province, operator, last_updated)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        record.get('phone_number', ''),
-                        record.get('name', ''),
-                        record.get('address', ''),
-                        record.get('city', ''),
-                        record.get('province', ''),
-                        record.get('operator', ''),
-                        datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    ))
-                    count += 1
-                except Exception as e:
-                    print_colored(f"[!] Error importing record: {str(e)}", "yellow")
+        if first == '[':
+            yield from _iter_json_array(f)
+            return
         
-        conn.commit()
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None
+
+def _chunked(iterable, size):
+    """Yield lists of up to `size` items."""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _record_row(record, columns):
+    """Convert a record dict to a row tuple for columns, or None if the key is missing."""
+    if not isinstance(record, dict):
+        return None
+    key = str(record.get(columns[0]) or '').strip()
+    if not key:
+        return None
+    return (key,) + tuple(record.get(column, '') for column in columns[1:])
+
+def _table_columns(table):
+    if table not in TABLE_COLUMNS:
+        raise ValueError(f"Unknown table '{table}'")
+    return TABLE_COLUMNS[table]
+
+def _peak_memory_mb():
+    """Peak resident memory of this process in MB, or None if unavailable."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux but bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def print_import_report(stats, source, table='phone_records'):
+    """Print the summary of an import run."""
+    print_colored(f"[✓] Imported {stats['imported']:,} records from {source} into {table}", "green")
+    print(f"    Inserted      : {stats['inserted']:,}")
+    print(f"    Updated       : {stats['updated']:,}")
+    print(f"    Unchanged     : {stats['unchanged']:,}")
+    print(f"    Rejected rows : {stats['rejected']:,}")
+    print(f"    Throughput    : {stats['rows_per_second']:,.0f} rows/s ({stats['seconds']:.2f}s)")
+    if stats['peak_memory_mb'] is not None:
+        print(f"    Peak memory   : {stats['peak_memory_mb']:.1f} MB")
+
+def _insert_records(conn, table, records, counts):
+    """Upsert one batch of records in a single transaction, adding to counts."""
+    columns = _table_columns(table)
+    rows = []
+    for record in records:
+        row = _record_row(record, columns)
+        if row is None:
+            counts['rejected'] += 1
+        else:
+            rows.append(row)
+    _write_rows(conn, table, rows, counts)
+
+def _write_rows(conn, table, rows, counts, hashes=None):
+    """Upsert ready-made row tuples in one transaction, adding to counts."""
+    # One timestamp per batch instead of one per row
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with conn:
+        inserted, updated, unchanged = upsert_rows(conn, table, rows, timestamp, hashes)
+    counts['inserted'] += inserted
+    counts['updated'] += updated
+    counts['unchanged'] += unchanged
+
+def _new_counts():
+    return {'inserted': 0, 'updated': 0, 'unchanged': 0, 'rejected': 0}
+
+def _import_stats(counts, start):
+    seconds = time.perf_counter() - start
+    imported = counts['inserted'] + counts['updated'] + counts['unchanged']
+    return dict(
+        counts,
+        imported=imported,
+        seconds=seconds,
+        rows_per_second=imported / seconds if seconds > 0 else 0.0,
+        peak_memory_mb=_peak_memory_mb()
+    )
+
+def import_records(records, chunk_size=IMPORT_CHUNK_SIZE, db_path=None, table='phone_records'):
+    """
+    Insert records in chunks, one executemany and transaction per chunk.
+    
+    Args:
+        records: Iterable of record dicts (None entries count as rejected)
+        chunk_size: Rows per transaction
+        db_path: Database file, defaults to DATABASE_PATH
+        table: 'phone_records' or 'nik_records'
+    
+    Returns:
+        Dict with imported (inserted + updated + unchanged), inserted, updated,
+        unchanged and rejected counts, seconds, rows_per_second, peak_memory_mb
+    """
+    _table_columns(table)
+    start = time.perf_counter()
+    conn = configure_connection(sqlite3.connect(db_path or DATABASE_PATH))
+    apply_schema(conn)
+    
+    counts = _new_counts()
+    try:
+        for chunk in _chunked(records, chunk_size):
+            _insert_records(conn, table, chunk, counts)
+    finally:
         conn.close()
-        print_colored(f"[✓] Imported {count} records from {json_file}", "green")
+    
+    return _import_stats(counts, start)
+
+def import_from_json(json_file, chunk_size=IMPORT_CHUNK_SIZE, table='phone_records'):
+    """Import records from a JSON array or JSON Lines file (streamed)."""
+    try:
+        stats = import_records(iter_json_records(json_file), chunk_size, table=table)
+        print_import_report(stats, json_file, table)
         return True
     except Exception as e:
         print_colored(f"[!] Error importing from JSON: {str(e)}", "red")
         return False
 
-def import_from_csv(csv_file):
-    """Import phone records from CSV file."""
+def _row_boundary(block):
+    """Offset just past the last newline in block that is not inside a quoted field."""
+    pos = block.rfind(b'\n')
+    while pos >= 0:
+        # An even number of quotes before the newline means we are outside quotes
+        if block.count(b'"', 0, pos) % 2 == 0:
+            return pos + 1
+        pos = block.rfind(b'\n', 0, pos)
+    return 0
+
+def iter_csv_batches(csv_file, start_offset=0, read_size=CSV_READ_SIZE):
+    """
+    Stream a CSV file as batches of record dicts.
+    
+    Yields:
+        (records, end_offset) where end_offset is the byte position just
+        after the last row of the batch, suitable for resuming.
+    """
+    with open(csv_file, 'rb') as f:
+        header = f.readline().decode('utf-8-sig')
+        fieldnames = next(csv.reader([header]), [])
+        offset = max(start_offset, f.tell())
+        f.seek(offset)
+        
+        pending = b''
+        while True:
+            data = f.read(read_size)
+            block = pending + data
+            cut = _row_boundary(block) if data else len(block)
+            if cut == 0 and data:
+                # A single row longer than read_size: keep reading
+                pending = block
+                continue
+            
+            text = block[:cut].decode('utf-8')
+            records = [dict(zip(fieldnames, row)) for row in csv.reader(io.StringIO(text)) if row]
+            offset += cut
+            pending = block[cut:]
+            if records or not data:
+                yield records, offset
+            if not data:
+                return
+
+def _drop_secondary_indexes(conn, table):
+    """Drop explicitly created indexes on table and return their SQL for rebuilding."""
+    indexes = conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+        (table,)
+    ).fetchall()
+    for name, _ in indexes:
+        conn.execute(f'DROP INDEX IF EXISTS "{name}"')
+    return [sql for _, sql in indexes]
+
+def _rebuild_indexes(conn, index_sql):
+    """Recreate indexes dropped by _drop_secondary_indexes."""
+    for sql in index_sql:
+        conn.execute(sql)
+    conn.commit()
+
+def import_from_csv(csv_file, rebuild_indexes=False, resume=True, read_size=CSV_READ_SIZE,
+                    table='phone_records'):
+    """
+    Bulk-load records from a CSV file.
+    
+    The file is parsed in read_size blocks, each committed in one
+    executemany transaction. After every commit the byte offset is saved to
+    `<csv_file>.offset`, so an interrupted load resumes where it stopped.
+    
+    Args:
+        csv_file: CSV with a header row
+        rebuild_indexes: Drop secondary indexes during the load and rebuild
+            them once at the end (the UNIQUE key index is always kept)
+        resume: Continue from a saved offset if one exists
+        read_size: Bytes per batch
+        table: 'phone_records' or 'nik_records'
+    """
+    checkpoint = csv_file + '.offset'
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
+        _table_columns(table)
+        start = time.perf_counter()
+        start_offset = 0
+        if resume and os.path.exists(checkpoint):
+            with open(checkpoint, 'r', encoding='utf-8') as f:
+                start_offset = int(f.read().strip() or 0)
+            print_colored(f"[i] Resuming {csv_file} from byte {start_offset:,}", "cyan")
         
-        count = 0
-        with open(csv_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                try:
-                    cursor.execute('''
-                        INSERT OR REPLACE INTO phone_records 
-                        (phone_number, name, address, city, province, operator, last_updated)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        row.get('phone_number', ''),
-                        row.get('name', ''),
-                        row.get('address', ''),
-                        row.get('city', ''),
-                        row.get('province', ''),
-                        row.get('operator', ''),
-                        datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    ))
-                    count += 1
-                except Exception as e:
-                    print_colored(f"[!] Error importing row: {str(e)}", "yellow")
+        conn = configure_connection(sqlite3.connect(DATABASE_PATH))
+        apply_schema(conn)
+        dropped = _drop_secondary_indexes(conn, table) if rebuild_indexes else []
         
-        conn.commit()
-        conn.close()
-        print_colored(f"[✓] Imported {count} records from {csv_file}", "green")
+        counts = _new_counts()
+        try:
+            for records, offset in iter_csv_batches(csv_file, start_offset, read_size):
+                _insert_records(conn, table, records, counts)
+                with open(checkpoint, 'w', encoding='utf-8') as f:
+                    f.write(str(offset))
+        finally:
+            if dropped:
+                print_colored(f"[*] Rebuilding {len(dropped)} index(es)...", "cyan")
+                _rebuild_indexes(conn, dropped)
+            conn.close()
+        
+        # Finished cleanly: nothing left to resume
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        print_import_report(_import_stats(counts, start), csv_file, table)
         return True
     except Exception as e:
         print_colored(f"[!] Error importing from CSV: {str(e)}", "red")
         return False
 
-def export_to_json(output_file):
-    """Export all phone records to JSON."""
-    try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM phone_records')
-        rows = cursor.fetchall()
-        
+def _split_points(path, start, range_size, fmt):
+    """
+    Byte offsets that cut the file into ranges of about range_size bytes.
+    
+    Every cut sits just after a newline that ends a record: for JSON Lines
+    any newline, for CSV only newlines outside quoted fields (tracked by
+    quote parity in one sequential pass).
+    """
+    size = os.path.getsize(path)
+    points = [start]
+    with open(path, 'rb') as f:
+        f.seek(start)
+        position = start
+        in_quotes = False
+        target = start + range_size
+        while target < size:
+            block = f.read(CSV_READ_SIZE)
+            if not block:
+                break
+            search_from = max(target - position, 0)
+            cut = -1
+            if search_from < len(block):
+                if fmt == 'jsonl':
+                    newline = block.find(b'\n', search_from)
+                    cut = newline + 1 if newline >= 0 else -1
+                else:
+                    # Quote parity at search_from, then walk newlines until one is outside quotes
+                    parity = (in_quotes + block.count(b'"', 0, search_from)) % 2
+                    newline = block.find(b'\n', search_from)
+                    while newline >= 0:
+                        parity = (parity + block.count(b'"', search_from, newline)) % 2
+                        if parity == 0:
+                            cut = newline + 1
+                            break
+                        search_from = newline
+                        newline = block.find(b'\n', newline + 1)
+            if fmt == 'csv':
+                in_quotes = (in_quotes + block.count(b'"')) % 2 == 1
+            if cut >= 0:
+                points.append(position + cut)
+                target = position + cut + range_size
+                # Re-read from the cut so parity restarts at a record boundary
+                f.seek(position + cut)
+                position += cut
+                in_quotes = False
+            else:
+                position += len(block)
+    points.append(size)
+    return points
+
+def _parse_range(path, fmt, start, end, fieldnames, table):
+    """
+    Parse and validate one byte range in a worker process.
+    
+    Returns:
+        (rows, hashes, rejected) ready for the single writer
+    """
+    columns = TABLE_COLUMNS[table]
+    with open(path, 'rb') as f:
+        f.seek(start)
+        text = f.read(end - start).decode('utf-8')
+    
+    if fmt == 'jsonl':
         records = []
+        # Only '\n' ends a record; splitlines() would also break on \x85,
+        # \u2028 and friends, which JSON strings may contain unescaped
+        for line in text.split('\n'):
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                records.append(None)
+    else:
+        records = [dict(zip(fieldnames, row)) for row in csv.reader(io.StringIO(text)) if row]
+    
+    rows = []
+    rejected = 0
+    for record in records:
+        row = _record_row(record, columns)
+        if row is None:
+            rejected += 1
+        else:
+            rows.append(row)
+    return rows, [content_hash(row) for row in rows], rejected
+
+def import_parallel(input_file, table='phone_records', workers=None, range_size=None, db_path=None):
+    """
+    Import a CSV or JSON Lines file with parallel parsing and a single writer.
+    
+    The file is cut into byte ranges on record boundaries; a process pool
+    parses, validates and hashes each range, and this process upserts the
+    resulting rows in one transaction per range, in file order. At most two
+    ranges per worker are in flight so memory stays bounded.
+    
+    Returns:
+        Same stats dict as import_records, plus workers
+    """
+    _table_columns(table)
+    workers = workers or IMPORT_WORKERS
+    range_size = range_size or PARALLEL_RANGE_SIZE
+    fmt = _file_format(input_file)
+    if fmt == 'json':
+        raise ValueError("Parallel import supports CSV and JSON Lines files")
+    
+    start = time.perf_counter()
+    fieldnames = None
+    first = 0
+    if fmt == 'csv':
+        with open(input_file, 'rb') as f:
+            fieldnames = next(csv.reader([f.readline().decode('utf-8-sig')]), [])
+            first = f.tell()
+    points = _split_points(input_file, first, range_size, fmt)
+    ranges = list(zip(points, points[1:]))
+    
+    conn = configure_connection(sqlite3.connect(db_path or DATABASE_PATH))
+    apply_schema(conn)
+    counts = _new_counts()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            next_range = 0
+            while next_range < len(ranges) or pending:
+                while next_range < len(ranges) and len(pending) < workers * 2:
+                    begin, end = ranges[next_range]
+                    pending.append(executor.submit(
+                        _parse_range, input_file, fmt, begin, end, fieldnames, table))
+                    next_range += 1
+                rows, hashes, rejected = pending.popleft().result()
+                counts['rejected'] += rejected
+                _write_rows(conn, table, rows, counts, hashes)
+    finally:
+        conn.close()
+    
+    stats = _import_stats(counts, start)
+    stats['workers'] = workers
+    return stats
+
+def import_from_file_parallel(input_file, table='phone_records', workers=None):
+    """Parallel import with a printed report."""
+    try:
+        stats = import_parallel(input_file, table, workers)
+        print_import_report(stats, input_file, table)
+        print(f"    Workers       : {stats['workers']}")
+        return True
+    except Exception as e:
+        print_colored(f"[!] Error in parallel import: {str(e)}", "red")
+        return False
+
+def export_columns(conn, table):
+    """Columns of table that belong in an export (bookkeeping columns excluded)."""
+    _table_columns(table)
+    return [row[1] for row in conn.execute(f'PRAGMA table_info({table})')
+            if row[1] not in INTERNAL_COLUMNS]
+
+def iter_table_rows(conn, table, arraysize=EXPORT_ARRAYSIZE):
+    """Yield rows of table as dicts, fetching arraysize rows at a time."""
+    columns = export_columns(conn, table)
+    cursor = conn.cursor()
+    cursor.arraysize = arraysize
+    cursor.execute(f"SELECT {', '.join(columns)} FROM {table}")
+    while True:
+        rows = cursor.fetchmany()
+        if not rows:
+            return
         for row in rows:
-            records.append({
-                'id': row[0],
-                'phone_number': row[1],
-                'name': row[2],
-                'address': row[3],
-                'city': row[4],
-                'province': row[5],
-                'operator': row[6],
-                'last_updated': row[7]
-            })
-        
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(records, f, indent=4, ensure_ascii=False)
-        
+            yield dict(zip(columns, row))
+
+def _file_format(path):
+    """Pick the file format from the extension (ignoring .gz)."""
+    name = path[:-3] if path.endswith('.gz') else path
+    ext = os.path.splitext(name)[1].lower()
+    if ext in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    if ext == '.csv':
+        return 'csv'
+    return 'json'
+
+def _open_output(output_file, compress):
+    if compress:
+        return gzip.open(output_file, 'wt', encoding='utf-8', newline='')
+    return open(output_file, 'w', encoding='utf-8', newline='')
+
+def _write_json(f, rows):
+    """Write rows as a pretty JSON array, one record at a time."""
+    count = 0
+    for record in rows:
+        f.write(',\n    ' if count else '[\n    ')
+        # Same layout json.dump(records, indent=4) would produce
+        f.write(json.dumps(record, indent=4, ensure_ascii=False).replace('\n', '\n    '))
+        count += 1
+    f.write('\n]' if count else '[]')
+    return count
+
+def _write_jsonl(f, rows):
+    count = 0
+    for record in rows:
+        f.write(json.dumps(record, ensure_ascii=False))
+        f.write('\n')
+        count += 1
+    return count
+
+def _write_csv(f, rows, columns):
+    writer = csv.DictWriter(f, fieldnames=columns)
+    writer.writeheader()
+    count = 0
+    for record in rows:
+        writer.writerow(record)
+        count += 1
+    return count
+
+def export_table(output_file, table='phone_records', fmt=None, compress=None,
+                 arraysize=EXPORT_ARRAYSIZE):
+    """
+    Stream a table to a file without loading it into memory.
+    
+    Args:
+        output_file: Destination path
+        table: 'phone_records' or 'nik_records'
+        fmt: 'json', 'jsonl' or 'csv'; guessed from the extension if None
+        compress: gzip the output; defaults to True for a .gz extension
+        arraysize: Rows fetched per cursor round trip
+    
+    Returns:
+        Dict with exported count, seconds, rows_per_second, peak_memory_mb
+    """
+    fmt = fmt or _file_format(output_file)
+    if compress is None:
+        compress = output_file.endswith('.gz')
+    
+    start = time.perf_counter()
+    conn = sqlite3.connect(DATABASE_PATH)
+    try:
+        rows = iter_table_rows(conn, table, arraysize)
+        with _open_output(output_file, compress) as f:
+            if fmt == 'jsonl':
+                count = _write_jsonl(f, rows)
+            elif fmt == 'csv':
+                count = _write_csv(f, rows, export_columns(conn, table))
+            else:
+                count = _write_json(f, rows)
+    finally:
         conn.close()
-        print_colored(f"[✓] Exported {len(records)} records to {output_file}", "green")
+    
+    seconds = time.perf_counter() - start
+    return {
+        'exported': count,
+        'seconds': seconds,
+        'rows_per_second': count / seconds if seconds > 0 else 0.0,
+        'peak_memory_mb': _peak_memory_mb()
+    }
+
+def export_records(output_file, table='phone_records', fmt=None, compress=None):
+    """Export a table to JSON, JSON Lines or CSV (optionally gzipped) and report."""
+    try:
+        stats = export_table(output_file, table, fmt, compress)
+        print_colored(f"[✓] Exported {stats['exported']:,} records from {table} to {output_file}", "green")
+        print(f"    Throughput    : {stats['rows_per_second']:,.0f} rows/s ({stats['seconds']:.2f}s)")
+        if stats['peak_memory_mb'] is not None:
+            print(f"    Peak memory   : {stats['peak_memory_mb']:.1f} MB")
         return True
     except Exception as e:
-        print_colored(f"[!] Error exporting to JSON: {str(e)}", "red")
+        print_colored(f"[!] Error exporting records: {str(e)}", "red")
         return False
 
+def export_to_json(output_file):
+    """Export all phone records to JSON."""
+    return export_records(output_file, 'phone_records', fmt='json')
+
 def query_phone(phone_number):
     """Query single phone number."""
     try:
         conn = sqlite3.connect(DATABASE_PATH)
         cursor = conn.cursor()
         
-        cursor.execute('SELECT * FROM phone_records WHERE phone_number = ?', (phone_number,))
+        cursor.execute('SELECT phone_number, name, address, city, province, operator, last_updated '
+                       'FROM phone_records WHERE phone_number = ?', (phone_number,))
         row = cursor.fetchone()
         
         conn.close()
         
         if row:
             print_colored("\n[✓] Record found:", "green")
-            print(f"Phone Number: {row[1]}")
-            print(f"Name: {row[2]}")
-            print(f"Address: {row[3]}")
-            print(f"City: {row[4]}")
-            print(f"Province: {row[5]}")
-            print(f"Operator: {row[6]}")
-            print(f"Last Updated: {row[7]}")
+            print(f"Phone Number: {row[0]}")
+            print(f"Name: {row[1]}")
+            print(f"Address: {row[2]}")
+            print(f"City: {row[3]}")
+            print(f"Province: {row[4]}")
+            print(f"Operator: {row[5]}")
+            print(f"Last Updated: {row[6]}")
             return True
         else:
             print_colored("\n[!] No record found for this phone number.", "yellow")
@@ -200,41 +714,177 @@ def query_phone(phone_number):
         print_colored(f"[!] Error querying database: {str(e)}", "red")
         return False
 
-def list_all_records(limit=10):
-    """List all records in database."""
+def estimate_count(conn, table):
+    """
+    Cheap row count for display.
+    
+    Sums the day summary in record_stats, which every write keeps exact.
+    Databases not yet upgraded to it use the sqlite_stat1 figure from the
+    last ANALYZE, and only fall back to a full COUNT(*) when neither exists.
+    
+    Returns:
+        (count, exact) where exact is False for estimates
+    """
+    _table_columns(table)
+    try:
+        row = conn.execute(
+            "SELECT COALESCE(SUM(record_count), 0) FROM record_stats WHERE table_name = ? AND dimension = 'day'",
+            (table,)
+        ).fetchone()
+        return row[0], True
+    except sqlite3.OperationalError:
+        pass  # Opened without apply_schema on a pre-v3 database
+    try:
+        # The first number of any stat row for the table is its row count
+        row = conn.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = ? LIMIT 1', (table,)).fetchone()
+        if row:
+            return int(row[0].split()[0]), False
+    except sqlite3.OperationalError:
+        pass  # No sqlite_stat1 until the first ANALYZE
+    return conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0], True
+
+def fetch_page(conn, table, after=None, before=None, page_size=10):
+    """
+    Fetch one page of (key, name, city) rows ordered by key.
+    
+    Pages are addressed by the last key seen (after) or the first key of the
+    current page (before), so each page is an index range scan regardless
+    of how deep into the table it is.
+    """
+    key = _table_columns(table)[0]
+    columns = f'{key}, name, city'
+    if before is not None:
+        rows = conn.execute(
+            f'SELECT {columns} FROM {table} WHERE {key} < ? ORDER BY {key} DESC LIMIT ?',
+            (before, page_size)
+        ).fetchall()
+        return rows[::-1]
+    if after is not None:
+        return conn.execute(
+            f'SELECT {columns} FROM {table} WHERE {key} > ? ORDER BY {key} LIMIT ?',
+            (after, page_size)
+        ).fetchall()
+    return conn.execute(
+        f'SELECT {columns} FROM {table} ORDER BY {key} LIMIT ?', (page_size,)
+    ).fetchall()
+
+def _print_page(rows):
+    for row in rows:
+        print(f"{row[0] or '':16} | {row[1] or '':20} | {row[2] or '':15}")
+
+def _page_size(value, default=10):
+    """Parse a page size from user input, falling back to default."""
+    try:
+        size = int(str(value).strip())
+    except ValueError:
+        return default
+    return min(max(size, 1), 1000)
+
+def list_all_records(limit=10, table='phone_records'):
+    """List the first records in the database."""
     try:
         conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT COUNT(*) FROM phone_records')
-        total = cursor.fetchone()[0]
+        total, exact = estimate_count(conn, table)
+        rows = fetch_page(conn, table, page_size=_page_size(limit))
+        conn.close()
         
-        cursor.execute(f'SELECT * FROM phone_records LIMIT {limit}')
-        rows = cursor.fetchall()
+        print_colored(f"\n[i] Total records in database: {'' if exact else '~'}{total:,}", "cyan")
+        print_colored(f"[i] Showing first {len(rows)} records:\n", "cyan")
+        _print_page(rows)
         
-        conn.close()
+        return True
+    except Exception as e:
+        print_colored(f"[!] Error listing records: {str(e)}", "red")
+        return False
+
+def browse_records(page_size=10, table='phone_records'):
+    """Page through a table interactively (n = next, p = previous, q = quit)."""
+    try:
+        page_size = _page_size(page_size)
+        conn = sqlite3.connect(DATABASE_PATH)
+        # Counted once per session; paging itself never counts
+        total, exact = estimate_count(conn, table)
+        rows = fetch_page(conn, table, page_size=page_size)
+        page = 1
         
-        print_colored(f"\n[i] Total records in database: {total}", "cyan")
-        print_colored(f"[i] Showing first {min(limit, len(rows))} records:\n", "cyan")
+        while True:
+            print_colored(f"\n[i] {table}: page {page} "
+                          f"({'' if exact else '~'}{total:,} records total)\n", "cyan")
+            _print_page(rows)
+            choice = input(f"\n{Fore.YELLOW}[n]ext, [p]revious, [q]uit: {Style.RESET_ALL}").strip().lower()
+            
+            if choice == 'n' and rows:
+                next_rows = fetch_page(conn, table, after=rows[-1][0], page_size=page_size)
+                if next_rows:
+                    rows = next_rows
+                    page += 1
+                else:
+                    print_colored("[i] Already on the last page", "yellow")
+            elif choice == 'p' and rows:
+                prev_rows = fetch_page(conn, table, before=rows[0][0], page_size=page_size)
+                if prev_rows:
+                    rows = prev_rows
+                    page -= 1
+                else:
+                    print_colored("[i] Already on the first page", "yellow")
+            elif choice == 'q' or not rows:
+                break
         
-        for row in rows:
-            print(f"{row[1]:15} | {row[2]:20} | {row[4]:15}")
+        conn.close()
+        return True
+    except Exception as e:
+        print_colored(f"[!] Error browsing records: {str(e)}", "red")
+        return False
+
+def aggregate_counts(conn, table, dimension, limit=None):
+    """
+    (value, count) pairs for one summary dimension, read from record_stats.
+    
+    Ordered by count, except 'day' which lists the newest days first. The
+    summary table is small and kept current by every import, so this never
+    touches the record tables.
+    """
+    _table_columns(table)
+    if dimension not in AGGREGATE_DIMENSIONS[table]:
+        raise ValueError(f"{table} has no '{dimension}' summary")
+    order = 'value DESC' if dimension == 'day' else 'record_count DESC, value'
+    return conn.execute(
+        f"SELECT value, record_count FROM record_stats "
+        f"WHERE table_name = ? AND dimension = ? AND record_count > 0 ORDER BY {order} LIMIT ?",
+        (table, dimension, -1 if limit is None else limit)
+    ).fetchall()
+
+def show_statistics(table='phone_records', limit=10):
+    """Print record counts per operator, province, city and update day."""
+    try:
+        conn = configure_connection(sqlite3.connect(DATABASE_PATH))
+        apply_schema(conn)
+        # Every record is counted once per dimension, so any dimension sums to the total
+        total = sum(count for _, count in aggregate_counts(conn, table, 'day'))
+        print_colored(f"\n[i] {table}: {total:,} records", "cyan")
         
+        for dimension in AGGREGATE_DIMENSIONS[table]:
+            rows = aggregate_counts(conn, table, dimension)
+            print_colored(f"\n[*] Per {dimension} ({len(rows):,} distinct):", "cyan")
+            for value, count in rows[:limit]:
+                print(f"    {value or '(empty)':30} {count:>12,}")
+            if len(rows) > limit:
+                print(f"    ... {len(rows) - limit:,} more")
+        conn.close()
         return True
     except Exception as e:
-        print_colored(f"[!] Error listing records: {str(e)}", "red")
+        print_colored(f"[!] Error reading statistics: {str(e)}", "red")
         return False
 
 def delete_record(phone_number):
     """Delete a phone record."""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute('DELETE FROM phone_records WHERE phone_number = ?', (phone_number,))
-        conn.commit()
+        conn = configure_connection(sqlite3.connect(DATABASE_PATH))
+        apply_schema(conn)
+        with conn:
+            deleted = delete_rows(conn, 'phone_records', [phone_number])
         
-        if cursor.rowcount > 0:
+        if deleted:
             print_colored(f"[✓] Deleted record for {phone_number}", "green")
         else:
             print_colored(f"[!] No record found for {phone_number}", "yellow")
@@ -250,12 +900,11 @@ def clear_database():
     confirm = input(f"{Fore.YELLOW}[!] Are you sure you want to clear all records? (yes/no): {Style.RESET_ALL}")
     if confirm.lower() == 'yes':
         try:
-            conn = sqlite3.connect(DATABASE_PATH)
-            cursor = conn.cursor()
-            
-            cursor.execute('DELETE FROM phone_records')
-            cursor.execute('DELETE FROM nik_records')
-            conn.commit()
+            conn = configure_connection(sqlite3.connect(DATABASE_PATH))
+            apply_schema(conn)
+            with conn:
+                for table in TABLE_COLUMNS:
+                    clear_table(conn, table)
             conn.close()
             
             print_colored("[✓] Database cleared successfully!", "green")
@@ -267,50 +916,343 @@ def clear_database():
         print_colored("[!] Operation cancelled.", "yellow")
         return False
 
+def migrate_to_compact():
+    """Rebuild the record tables in the compact WITHOUT ROWID layout."""
+    try:
+        conn = configure_connection(sqlite3.connect(DATABASE_PATH))
+        apply_schema(conn)
+        # Fold the WAL into the main file so sizes are comparable
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        before = os.path.getsize(DATABASE_PATH)
+        
+        converted = []
+        for table in TABLE_COLUMNS:
+            if is_compact(conn, table):
+                print_colored(f"[i] {table} is already compact", "cyan")
+                continue
+            print_colored(f"[*] Rebuilding {table}...", "cyan")
+            compact_table(conn, table)
+            converted.append(table)
+        
+        if converted:
+            # Reclaim the pages freed by the old tables and UNIQUE indexes
+            conn.execute('VACUUM')
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        conn.close()
+        
+        after = os.path.getsize(DATABASE_PATH)
+        print_colored(f"[✓] Compact layout ready ({len(converted)} table(s) converted)", "green")
+        print(f"    File size     : {before / 1024 / 1024:.1f} MB -> {after / 1024 / 1024:.1f} MB")
+        return True
+    except Exception as e:
+        print_colored(f"[!] Error migrating to compact layout: {str(e)}", "red")
+        return False
+
+def build_snapshots():
+    """Build read-only memory-mapped lookup snapshots of the record tables."""
+    try:
+        conn = configure_connection(sqlite3.connect(DATABASE_PATH))
+        apply_schema(conn)
+        for table in TABLE_COLUMNS:
+            start = time.perf_counter()
+            path = snapshot_path(DATABASE_PATH, table)
+            count = build_snapshot(conn, table, path)
+            size = os.path.getsize(path)
+            print_colored(f"[✓] {table}: {count:,} records -> {path} "
+                          f"({size / 1024 / 1024:.1f} MB, {time.perf_counter() - start:.2f}s)", "green")
+        conn.close()
+        print_colored("[i] Set DATABASE_SNAPSHOT_ENABLED = True to serve lookups from the snapshots. "
+                      "Rebuild after importing new data.", "cyan")
+        return True
+    except Exception as e:
+        print_colored(f"[!] Error building snapshots: {str(e)}", "red")
+        return False
+
+def generate_dataset(output_file, table='phone_records', count=100000, seed=DEFAULT_SEED,
+                     fmt=None, compress=None):
+    """
+    Write a synthetic dataset for load testing (see utils/dataset_generator.py).
+    
+    Args:
+        output_file: .json, .jsonl or .csv (optionally .gz) file, or a .db
+            SQLite database to import the records into directly
+        table: 'phone_records' or 'nik_records'
+        count: Number of records
+        seed: Same seed, same records
+        fmt: 'json', 'jsonl', 'csv' or 'sqlite'; guessed from the extension if None
+        compress: gzip the output; defaults to True for a .gz extension
+    
+    Returns:
+        Dict with generated count, seconds, rows_per_second, peak_memory_mb
+    """
+    columns = _table_columns(table)
+    if fmt is None:
+        ext = os.path.splitext(output_file)[1].lower()
+        fmt = 'sqlite' if ext in ('.db', '.sqlite', '.sqlite3') else _file_format(output_file)
+    if compress is None:
+        compress = output_file.endswith('.gz')
+    
+    start = time.perf_counter()
+    records = GENERATORS[table](count, seed)
+    if fmt == 'sqlite':
+        count = import_records(records, db_path=output_file, table=table)['imported']
+    else:
+        with _open_output(output_file, compress) as f:
+            if fmt == 'jsonl':
+                count = _write_jsonl(f, records)
+            elif fmt == 'csv':
+                count = _write_csv(f, records, columns)
+            else:
+                count = _write_json(f, records)
+    
+    seconds = time.perf_counter() - start
+    return {
+        'generated': count,
+        'seconds': seconds,
+        'rows_per_second': count / seconds if seconds > 0 else 0.0,
+        'peak_memory_mb': _peak_memory_mb()
+    }
+
+def generate_records(output_file, table='phone_records', count=100000, seed=DEFAULT_SEED):
+    """Generate a synthetic dataset and report."""
+    try:
+        stats = generate_dataset(output_file, table, count, seed)
+        print_colored(f"[✓] Generated {stats['generated']:,} fake {table} (seed {seed}) "
+                      f"into {output_file}", "green")
+        print(f"    Throughput    : {stats['rows_per_second']:,.0f} rows/s ({stats['seconds']:.2f}s)")
+        if stats['peak_memory_mb'] is not None:
+            print(f"    Peak memory   : {stats['peak_memory_mb']:.1f} MB")
+        return True
+    except Exception as e:
+        print_colored(f"[!] Error generating dataset: {str(e)}", "red")
+        return False
+
+def database_report(conn):
+    """
+    Size figures for an open database.
+    
+    Per-table and per-index sizes come from the dbstat virtual table, which
+    only some SQLite builds include; 'objects' is None without it.
+    """
+    page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+    pages = conn.execute('PRAGMA page_count').fetchone()[0]
+    report = {
+        'file_bytes': page_size * pages,
+        'page_size': page_size,
+        'pages': pages,
+        'free_pages': conn.execute('PRAGMA freelist_count').fetchone()[0],
+        'auto_vacuum': AUTO_VACUUM_MODES.get(conn.execute('PRAGMA auto_vacuum').fetchone()[0]),
+        'objects': None,
+    }
+    try:
+        report['objects'] = conn.execute(
+            "SELECT s.name, COALESCE(m.type, 'table'), SUM(s.pgsize) FROM dbstat s "
+            "LEFT JOIN sqlite_master m ON m.name = s.name GROUP BY s.name ORDER BY 3 DESC"
+        ).fetchall()
+    except sqlite3.OperationalError:
+        pass  # SQLite built without SQLITE_ENABLE_DBSTAT_VTAB
+    return report
+
+def lookup_latency(db_path, table, keys):
+    """
+    Time one point lookup per key on a fresh connection.
+    
+    Returns:
+        {'median_ms', 'p95_ms'}, or None when there are no keys
+    """
+    if not keys:
+        return None
+    columns = _table_columns(table)
+    query = f"SELECT {', '.join(columns)}, last_updated FROM {table} WHERE {columns[0]} = ?"
+    conn = configure_connection(sqlite3.connect(db_path))
+    timings = []
+    for key in keys:
+        start = time.perf_counter()
+        conn.execute(query, (key,)).fetchone()
+        timings.append(time.perf_counter() - start)
+    conn.close()
+    timings.sort()
+    return {
+        'median_ms': timings[len(timings) // 2] * 1000,
+        'p95_ms': timings[int(len(timings) * 0.95)] * 1000,
+    }
+
+def run_maintenance(db_path=None, table='phone_records', step_pages=VACUUM_STEP_PAGES,
+                    samples=LATENCY_SAMPLES):
+    """
+    Refresh planner statistics and return free pages to the file system.
+    
+    The first run switches the database to incremental auto-vacuum, which
+    takes one full VACUUM. Later runs free pages with incremental_vacuum in
+    step_pages steps, each a short transaction, so other connections are
+    never locked out for the whole pass. ANALYZE and PRAGMA optimize then
+    refresh the statistics the query planner uses.
+    
+    Returns:
+        Dict with 'before'/'after' reports, 'latency_before'/'latency_after'
+        over the same sampled keys of table, 'vacuum_steps' (None when the
+        run did the one-off full VACUUM) and 'seconds'
+    """
+    db_path = db_path or DATABASE_PATH
+    start = time.perf_counter()
+    conn = configure_connection(sqlite3.connect(db_path))
+    apply_schema(conn)
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    before = database_report(conn)
+    key = _table_columns(table)[0]
+    keys = [k for (k,) in conn.execute(
+        f'SELECT {key} FROM {table} ORDER BY random() LIMIT ?', (samples,)
+    )]
+    latency_before = lookup_latency(db_path, table, keys)
+    
+    if before['auto_vacuum'] != 'incremental':
+        # auto_vacuum only changes on a full rebuild; later runs step instead
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        conn.execute('VACUUM')
+        steps = None
+    else:
+        steps = 0
+        free = before['free_pages']
+        while free:
+            # The pragma frees one page per step and returns no rows, so
+            # execute() would stop after the first; executescript runs it out
+            conn.executescript(f'PRAGMA incremental_vacuum({int(step_pages)})')
+            steps += 1
+            remaining = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            if remaining >= free:
+                break
+            free = remaining
+    
+    conn.execute('ANALYZE')
+    conn.execute('PRAGMA optimize')
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    after = database_report(conn)
+    conn.close()
+    
+    return {
+        'before': before,
+        'after': after,
+        'latency_before': latency_before,
+        'latency_after': lookup_latency(db_path, table, keys),
+        'vacuum_steps': steps,
+        'seconds': time.perf_counter() - start,
+    }
+
+def _format_latency(latency):
+    if latency is None:
+        return 'n/a (table is empty)'
+    return f"median {latency['median_ms']:.3f} ms, p95 {latency['p95_ms']:.3f} ms"
+
+def maintain_database(table='phone_records'):
+    """Run maintenance and print the size and latency report."""
+    try:
+        print_colored("[*] Running ANALYZE, PRAGMA optimize and vacuum...", "cyan")
+        result = run_maintenance(table=table)
+        before, after = result['before'], result['after']
+        
+        print_colored(f"[✓] Maintenance finished in {result['seconds']:.2f}s", "green")
+        if result['vacuum_steps'] is None:
+            print("    Vacuum        : full rebuild, now in incremental auto-vacuum mode")
+        else:
+            print(f"    Vacuum        : {result['vacuum_steps']} incremental step(s) "
+                  f"of up to {VACUUM_STEP_PAGES:,} pages")
+        print(f"    File size     : {before['file_bytes'] / 1024 / 1024:.1f} MB -> "
+              f"{after['file_bytes'] / 1024 / 1024:.1f} MB")
+        print(f"    Free pages    : {before['free_pages']:,} -> {after['free_pages']:,} "
+              f"({after['page_size']:,} bytes/page)")
+        print(f"    Auto-vacuum   : {before['auto_vacuum']} -> {after['auto_vacuum']}")
+        print(f"    Lookups before: {_format_latency(result['latency_before'])}")
+        print(f"    Lookups after : {_format_latency(result['latency_after'])}")
+        
+        if after['objects'] is None:
+            print_colored("[i] Table and index sizes need SQLite with the dbstat virtual table", "yellow")
+        else:
+            print_colored("\n[i] Space by table and index:", "cyan")
+            for name, kind, size in after['objects']:
+                print(f"    {name:40} {kind:6} {size / 1024 / 1024:10.2f} MB")
+        return True
+    except Exception as e:
+        print_colored(f"[!] Error running maintenance: {str(e)}", "red")
+        return False
+
 def show_menu():
     """Show database manager menu."""
     print(f"\n{Fore.CYAN}{'='*70}")
     print("DATABASE MANAGER - Pegasus Lacak Nomor")
     print(f"{'='*70}{Style.RESET_ALL}\n")
     print("1. Initialize Database")
-    print("2. Import from JSON")
+    print("2. Import from JSON / JSON Lines")
     print("3. Import from CSV")
-    print("4. Export to JSON")
+    print("4. Export (JSON / JSON Lines / CSV, add .gz to compress)")
     print("5. Query Phone Number")
-    print("6. List All Records")
+    print("6. Browse Records")
     print("7. Delete Record")
     print("8. Clear Database")
+    print("9. Convert to Compact Layout (WITHOUT ROWID)")
+    print("10. Build Lookup Snapshot")
+    print("11. Parallel Import (CSV / JSON Lines)")
+    print("12. Record Statistics")
+    print("13. Maintenance (ANALYZE, vacuum, size report)")
+    print("14. Generate Synthetic Dataset")
     print("0. Exit")
     print(f"\n{Fore.CYAN}{'='*70}{Style.RESET_ALL}")
 
+def ask_table():
+    """Ask which table an import/export should use."""
+    table = input("Table (phone/nik, default phone): ").strip().lower()
+    return 'nik_records' if table == 'nik' else 'phone_records'
+
 def main():
     """Main program loop."""
     while True:
         show_menu()
-        choice = input(f"\n{Fore.YELLOW}Choose option (0-8): {Style.RESET_ALL}")
+        choice = input(f"\n{Fore.YELLOW}Choose option (0-14): {Style.RESET_ALL}")
         
         if choice == '1':
             init_database()
         elif choice == '2':
-            file_path = input("Enter JSON file path: ")
-            import_from_json(file_path)
+            file_path = input("Enter JSON or JSON Lines file path: ")
+            import_from_json(file_path, table=ask_table())
         elif choice == '3':
             file_path = input("Enter CSV file path: ")
-            import_from_csv(file_path)
+            table = ask_table()
+            rebuild = input("Drop and rebuild secondary indexes around the load? (y/n): ")
+            import_from_csv(file_path, rebuild_indexes=rebuild.lower() == 'y', table=table)
         elif choice == '4':
-            file_path = input("Enter output file path: ")
-            export_to_json(file_path)
+            file_path = input("Enter output file path (.json, .jsonl, .csv, optionally .gz): ")
+            export_records(file_path, ask_table())
         elif choice == '5':
             phone = input("Enter phone number: ")
             query_phone(phone)
         elif choice == '6':
-            limit = input("Enter limit (default 10): ") or "10"
-            list_all_records(int(limit))
+            table = ask_table()
+            size = input("Records per page (default 10): ")
+            browse_records(_page_size(size), table)
         elif choice == '7':
             phone = input("Enter phone number to delete: ")
             delete_record(phone)
         elif choice == '8':
             clear_database()
+        elif choice == '9':
+            migrate_to_compact()
+        elif choice == '10':
+            build_snapshots()
+        elif choice == '11':
+            file_path = input("Enter CSV or JSON Lines file path: ")
+            table = ask_table()
+            workers = input(f"Parser processes (default {IMPORT_WORKERS}): ").strip()
+            import_from_file_parallel(file_path, table, int(workers) if workers.isdigit() else None)
+        elif choice == '12':
+            show_statistics(ask_table())
+        elif choice == '13':
+            maintain_database(ask_table())
+        elif choice == '14':
+            file_path = input("Enter output path (.json, .jsonl, .csv, optionally .gz, or .db): ")
+            table = ask_table()
+            count = input("Number of records (default 100000): ").strip()
+            seed = input(f"Seed (default {DEFAULT_SEED}): ").strip()
+            generate_records(file_path, table, int(count) if count.isdigit() else 100000,
+                             int(seed) if seed.isdigit() else DEFAULT_SEED)
         elif choice == '0':
             print_colored("\n[i] Goodbye!", "cyan")
             sys.exit(0)
@@ -0,0 +1,145 @@
+"""
+Synthetic Dataset Generator
+Clearly fake, deterministic phone_records and nik_records for load and
+benchmark testing. Every address is "Jalan Contoh ...", and the same seed
+always produces the same records in the same order, so the first N
+records of a larger dataset equal a dataset of size N.
+
+Usage:
+    python utils/dataset_generator.py [phone|nik] [count] [output] [seed]
+
+The output extension picks the format: .json, .jsonl, .csv (add .gz to
+compress) or .db to import straight into a SQLite database.
+"""
+
+import os
+import sys
+import random
+from datetime import date, timedelta
+from typing import Dict, Iterator
+
+# Allow running as `python utils/dataset_generator.py` from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import PHONE_OPERATORS
+
+DEFAULT_SEED = 42
+
+FIRST_NAMES = [
+    'Budi', 'Siti', 'Ahmad', 'Dewi', 'Agus', 'Sri', 'Eko', 'Rina',
+    'Hendra', 'Wati', 'Joko', 'Putri', 'Rudi', 'Ayu', 'Bambang', 'Nur',
+]
+LAST_NAMES = [
+    'Santoso', 'Rahayu', 'Hidayat', 'Wijaya', 'Saputra', 'Kusuma',
+    'Pratama', 'Nugroho', 'Setiawan', 'Lestari', 'Permana', 'Siregar',
+]
+STREETS = ['Melati', 'Kenanga', 'Mawar', 'Merdeka', 'Pahlawan', 'Cendana', 'Flamboyan', 'Anggrek']
+
+# (NIK region code, city, province)
+REGIONS = [
+    ('317101', 'Jakarta Pusat', 'DKI Jakarta'),
+    ('317401', 'Jakarta Selatan', 'DKI Jakarta'),
+    ('327301', 'Bandung', 'Jawa Barat'),
+    ('327501', 'Bekasi', 'Jawa Barat'),
+    ('367101', 'Tangerang', 'Banten'),
+    ('337401', 'Semarang', 'Jawa Tengah'),
+    ('347101', 'Yogyakarta', 'DI Yogyakarta'),
+    ('357801', 'Surabaya', 'Jawa Timur'),
+    ('357301', 'Malang', 'Jawa Timur'),
+    ('517101', 'Denpasar', 'Bali'),
+    ('127101', 'Medan', 'Sumatera Utara'),
+    ('137101', 'Padang', 'Sumatera Barat'),
+    ('167101', 'Palembang', 'Sumatera Selatan'),
+    ('217101', 'Batam', 'Kepulauan Riau'),
+    ('647101', 'Balikpapan', 'Kalimantan Timur'),
+    ('737101', 'Makassar', 'Sulawesi Selatan'),
+]
+
+# Every prefix equally likely, as listed in PHONE_OPERATORS
+PHONE_PREFIXES = sorted(PHONE_OPERATORS)
+
+# Subscriber numbers are i * multiplier + offset modulo the number space,
+# a bijection that keeps keys unique while scattering them
+PHONE_SUBSCRIBERS = 10 ** 8
+PHONE_MULTIPLIER = 73939133  # odd and not a multiple of 5
+
+BIRTH_START = date(1950, 1, 1)
+BIRTH_DAYS = (date(2007, 12, 31) - BIRTH_START).days + 1
+NIK_SERIALS = 9999  # serial 0001-9999 per region and birth date
+NIK_SPACE = len(REGIONS) * BIRTH_DAYS * NIK_SERIALS
+NIK_MULTIPLIER = 1000003  # prime, so coprime with NIK_SPACE
+
+
+def _check_count(count: int, space: int, kind: str):
+    if count > space:
+        raise ValueError(f"At most {space:,} unique {kind} records can be generated")
+
+
+def iter_phone_records(count: int, seed: int = DEFAULT_SEED) -> Iterator[Dict]:
+    """Yield count fake phone records with unique numbers"""
+    _check_count(count, PHONE_SUBSCRIBERS, 'phone')
+    rng = random.Random(seed)
+    offset = rng.randrange(PHONE_SUBSCRIBERS)
+    for i in range(count):
+        prefix = rng.choice(PHONE_PREFIXES)
+        _, city, province = rng.choice(REGIONS)
+        subscriber = (i * PHONE_MULTIPLIER + offset) % PHONE_SUBSCRIBERS
+        yield {
+            'phone_number': f"{prefix}{subscriber:08d}",
+            'name': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            'address': f"Jalan Contoh {rng.choice(STREETS)} No. {rng.randint(1, 250)}",
+            'city': city,
+            'province': province,
+            'operator': PHONE_OPERATORS[prefix],
+        }
+
+
+def iter_nik_records(count: int, seed: int = DEFAULT_SEED) -> Iterator[Dict]:
+    """
+    Yield count fake NIK records with unique, well-formed NIKs
+
+    A NIK is region code (6 digits) + birth date as DDMMYY, with 40 added
+    to the day for women + serial (4 digits); city, province, birth_date
+    and gender agree with it.
+    """
+    _check_count(count, NIK_SPACE, 'NIK')
+    rng = random.Random(seed)
+    offset = rng.randrange(NIK_SPACE)
+    for i in range(count):
+        key = (i * NIK_MULTIPLIER + offset) % NIK_SPACE
+        key, region = divmod(key, len(REGIONS))
+        serial, day = divmod(key, BIRTH_DAYS)
+        code, city, province = REGIONS[region]
+        birth = BIRTH_START + timedelta(days=day)
+        female = rng.random() < 0.5
+        yield {
+            'nik': f"{code}{birth.day + (40 if female else 0):02d}{birth:%m%y}{serial + 1:04d}",
+            'name': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            'birth_date': birth.isoformat(),
+            'gender': 'P' if female else 'L',
+            'address': f"Jalan Contoh {rng.choice(STREETS)} No. {rng.randint(1, 250)}",
+            'city': city,
+            'province': province,
+        }
+
+
+GENERATORS = {
+    'phone_records': iter_phone_records,
+    'nik_records': iter_nik_records,
+}
+
+
+def main():
+    """Generate a dataset from command-line arguments."""
+    from utils import database_manager
+
+    kind = sys.argv[1] if len(sys.argv) > 1 else 'phone'
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    table = 'nik_records' if kind == 'nik' else 'phone_records'
+    output = sys.argv[3] if len(sys.argv) > 3 else f"data/synthetic_{table}.jsonl"
+    seed = int(sys.argv[4]) if len(sys.argv) > 4 else DEFAULT_SEED
+    return 0 if database_manager.generate_records(output, table, count, seed) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
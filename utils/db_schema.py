@@ -0,0 +1,364 @@
+"""
+Local Database Schema
+Shared schema, migrations and connection tuning for the SQLite database
+used by DatabaseClient and the database manager
+"""
+
+import json
+import hashlib
+import sqlite3
+from collections import Counter
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Dimensions counted in record_stats; 'day' is the date part of last_updated
+AGGREGATE_DIMENSIONS = {
+    'phone_records': ('operator', 'province', 'city', 'day'),
+    'nik_records': ('province', 'city', 'day'),
+}
+
+STATS_UPSERT = (
+    'INSERT INTO record_stats (table_name, dimension, value, record_count) VALUES (?, ?, ?, ?) '
+    'ON CONFLICT(table_name, dimension, value) '
+    'DO UPDATE SET record_count = record_count + excluded.record_count'
+)
+
+
+def _dimension_sql(dimension: str) -> str:
+    """SQL expression for a row's value in dimension ('' for NULL)"""
+    if dimension == 'day':
+        return "COALESCE(substr(last_updated, 1, 10), '')"
+    return f"COALESCE({dimension}, '')"
+
+
+def aggregate_backfill(table: str) -> List[str]:
+    """Statements counting a table's existing rows into record_stats"""
+    return [
+        f"INSERT INTO record_stats (table_name, dimension, value, record_count) "
+        f"SELECT '{table}', '{dimension}', {_dimension_sql(dimension)}, COUNT(*) "
+        f"FROM {table} GROUP BY 3"
+        for dimension in AGGREGATE_DIMENSIONS[table]
+    ]
+
+
+# Each entry upgrades the schema by one version; PRAGMA user_version records
+# how many have been applied, so DDL only runs on creation or migration.
+SCHEMA_MIGRATIONS: List[List[str]] = [
+    # Version 1: initial tables
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS phone_records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            phone_number TEXT UNIQUE NOT NULL,
+            name TEXT,
+            address TEXT,
+            city TEXT,
+            province TEXT,
+            operator TEXT,
+            last_updated TEXT
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS nik_records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nik TEXT UNIQUE NOT NULL,
+            name TEXT,
+            birth_date TEXT,
+            gender TEXT,
+            address TEXT,
+            city TEXT,
+            province TEXT,
+            last_updated TEXT
+        )
+        ''',
+    ],
+    # Version 2: content hashes so upserts can skip unchanged rows
+    [
+        'ALTER TABLE phone_records ADD COLUMN content_hash TEXT',
+        'ALTER TABLE nik_records ADD COLUMN content_hash TEXT',
+    ],
+    # Version 3: per-dimension record counts, kept current by upsert_rows
+    # and delete_rows so summaries never scan the record tables
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS record_stats (
+            table_name TEXT NOT NULL,
+            dimension TEXT NOT NULL,
+            value TEXT NOT NULL,
+            record_count INTEGER NOT NULL,
+            PRIMARY KEY (table_name, dimension, value)
+        ) WITHOUT ROWID
+        ''',
+        *aggregate_backfill('phone_records'),
+        *aggregate_backfill('nik_records'),
+    ],
+]
+
+SCHEMA_VERSION = len(SCHEMA_MIGRATIONS)
+
+PHONE_COLUMNS = ('phone_number', 'name', 'address', 'city', 'province', 'operator')
+NIK_COLUMNS = ('nik', 'name', 'birth_date', 'gender', 'address', 'city', 'province')
+
+# Record tables and their content columns; the first column is the unique key
+TABLE_COLUMNS = {
+    'phone_records': PHONE_COLUMNS,
+    'nik_records': NIK_COLUMNS,
+}
+
+# Bookkeeping columns that are not part of a record's content
+INTERNAL_COLUMNS = ('content_hash',)
+
+# Stay under SQLITE_MAX_VARIABLE_NUMBER on older SQLite builds
+MAX_QUERY_PARAMS = 900
+
+
+def configure_connection(conn: sqlite3.Connection, cache_size_kb: int = 65536,
+                         busy_timeout_ms: int = 5000) -> sqlite3.Connection:
+    """Apply WAL journaling and performance pragmas to a connection"""
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = NORMAL')
+    # Negative cache_size is in KiB rather than pages
+    conn.execute(f'PRAGMA cache_size = -{int(cache_size_kb)}')
+    conn.execute(f'PRAGMA busy_timeout = {int(busy_timeout_ms)}')
+    conn.execute('PRAGMA temp_store = MEMORY')
+    return conn
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Return the schema version stored in the database file"""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def apply_schema(conn: sqlite3.Connection) -> bool:
+    """
+    Bring the database schema up to SCHEMA_VERSION
+
+    Returns:
+        True if any migration ran, False if the schema was already current
+    """
+    version = get_schema_version(conn)
+    if version >= SCHEMA_VERSION:
+        return False
+
+    with conn:
+        for statements in SCHEMA_MIGRATIONS[version:]:
+            for statement in statements:
+                conn.execute(statement)
+        # PRAGMA does not accept bound parameters
+        conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+    return True
+
+
+def content_hash(row: Sequence) -> str:
+    """Hash of a row's content columns, used to detect unchanged records"""
+    encoded = json.dumps(list(row), ensure_ascii=False, default=str)
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
+
+
+def upsert_sql(table: str) -> str:
+    """INSERT ... ON CONFLICT DO UPDATE statement for a record table"""
+    columns = TABLE_COLUMNS[table]
+    names = list(columns) + ['last_updated', 'content_hash']
+    updates = ', '.join(f'{name} = excluded.{name}' for name in names[1:])
+    return (
+        f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))}) "
+        f"ON CONFLICT({columns[0]}) DO UPDATE SET {updates} "
+        f"WHERE {table}.content_hash IS NOT excluded.content_hash"
+    )
+
+
+def _stat_value(value) -> str:
+    return '' if value is None else str(value)
+
+
+def _row_dimensions(table: str, row: Sequence, day: str) -> Tuple[str, ...]:
+    """A written row's record_stats values, as _dimension_sql would read them back"""
+    columns = TABLE_COLUMNS[table]
+    return tuple(day if dimension == 'day' else _stat_value(row[columns.index(dimension)])
+                 for dimension in AGGREGATE_DIMENSIONS[table])
+
+
+def stored_rows(conn: sqlite3.Connection, table: str,
+                keys: Iterable[str]) -> Dict[str, Tuple]:
+    """Map each key already present in table to (key, content_hash, *dimension values)"""
+    key_column = TABLE_COLUMNS[table][0]
+    dimensions = ', '.join(_dimension_sql(dimension) for dimension in AGGREGATE_DIMENSIONS[table])
+    keys = list(keys)
+    found: Dict[str, Tuple] = {}
+    for start in range(0, len(keys), MAX_QUERY_PARAMS):
+        chunk = keys[start:start + MAX_QUERY_PARAMS]
+        rows = conn.execute(
+            f"SELECT {key_column}, content_hash, {dimensions} FROM {table} "
+            f"WHERE {key_column} IN ({', '.join('?' * len(chunk))})",
+            chunk
+        ).fetchall()
+        found.update(zip(map(itemgetter(0), rows), rows))
+    return found
+
+
+def begin_write(conn: sqlite3.Connection):
+    """
+    Take the write lock now unless a transaction is already open
+
+    sqlite3 only issues BEGIN before the first DML statement, so the stored
+    rows read ahead of a write could otherwise change under another writer
+    before the write, leaving record_stats and the returned counts wrong.
+    """
+    if not conn.in_transaction:
+        conn.execute('BEGIN IMMEDIATE')
+
+
+def _stat_deltas(table: str, written: Sequence[Sequence], day: str,
+                 removed: Sequence[Tuple]) -> List[Tuple]:
+    """
+    record_stats adjustments for a write
+
+    written holds the rows stored on day (TABLE_COLUMNS order), removed the
+    dimension values of the versions they replaced or that were deleted.
+    Counting runs column by column, so the per-row cost stays in C.
+    """
+    columns = TABLE_COLUMNS[table]
+    written_columns = list(zip(*written))
+    removed_columns = list(zip(*removed))
+    params = []
+    for position, dimension in enumerate(AGGREGATE_DIMENSIONS[table]):
+        deltas: Counter = Counter()
+        if written:
+            counts = ({day: len(written)} if dimension == 'day'
+                      else Counter(written_columns[columns.index(dimension)]))
+            for value, count in counts.items():
+                deltas[_stat_value(value)] += count
+        if removed:
+            deltas.subtract(Counter(removed_columns[position]))
+        params.extend((table, dimension, value, delta) for value, delta in deltas.items() if delta)
+    return params
+
+
+def upsert_rows(conn: sqlite3.Connection, table: str, rows: Sequence[Tuple],
+                timestamp: str, hashes: Optional[Sequence[str]] = None) -> Tuple[int, int, int]:
+    """
+    Upsert rows (tuples in TABLE_COLUMNS order), skipping unchanged content
+
+    The caller owns the transaction (begun IMMEDIATE here if none is open,
+    so the stored rows cannot change before they are written). hashes may
+    carry each row's content_hash when it was already computed (e.g. by
+    parser processes). record_stats is adjusted in the same transaction.
+
+    Returns:
+        (inserted, updated, unchanged) counts
+    """
+    begin_write(conn)
+    stored = stored_rows(conn, table, {row[0] for row in rows})
+    pending = []
+    replaced = []
+    written: Dict[str, Sequence] = {}
+    inserted = updated = unchanged = 0
+    day = timestamp[:10]
+    if hashes is None:
+        hashes = [content_hash(row) for row in rows]
+    for row, digest in zip(rows, hashes):
+        key = row[0]
+        previous = stored.get(key)
+        if previous is None:
+            inserted += 1
+        elif previous[1] == digest:
+            unchanged += 1
+            continue
+        else:
+            updated += 1
+            replaced.append(_row_dimensions(table, written[key], day) if key in written
+                            else previous[2:])
+        # Later duplicates in the same batch compare against this version
+        stored[key] = (key, digest)
+        written[key] = row
+        pending.append(tuple(row) + (timestamp, digest))
+
+    if pending:
+        conn.executemany(upsert_sql(table), pending)
+        conn.executemany(STATS_UPSERT, _stat_deltas(table, pending, day, replaced))
+    return inserted, updated, unchanged
+
+
+def delete_rows(conn: sqlite3.Connection, table: str, keys: Iterable[str]) -> int:
+    """
+    Delete records by key, adjusting record_stats (the caller owns the transaction)
+
+    Returns:
+        Number of records deleted
+    """
+    begin_write(conn)
+    stored = stored_rows(conn, table, set(keys))
+    if not stored:
+        return 0
+    key_column = TABLE_COLUMNS[table][0]
+    conn.executemany(f'DELETE FROM {table} WHERE {key_column} = ?', [(key,) for key in stored])
+    removed = [values[2:] for values in stored.values()]
+    conn.executemany(STATS_UPSERT, _stat_deltas(table, [], '', removed))
+    return len(stored)
+
+
+def clear_table(conn: sqlite3.Connection, table: str):
+    """Delete every record in table along with its record_stats (the caller owns the transaction)"""
+    conn.execute(f'DELETE FROM {table}')
+    conn.execute('DELETE FROM record_stats WHERE table_name = ?', (table,))
+    # ANALYZE figures for the old contents would otherwise outlive them
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+        conn.execute('DELETE FROM sqlite_stat1 WHERE tbl = ?', (table,))
+
+
+def is_compact(conn: sqlite3.Connection, table: str) -> bool:
+    """True if table uses the compact WITHOUT ROWID layout"""
+    row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone()
+    return bool(row) and 'WITHOUT ROWID' in row[0].upper()
+
+
+def compact_table(conn: sqlite3.Connection, table: str) -> bool:
+    """
+    Rebuild a record table as WITHOUT ROWID, clustered on its identifier
+
+    The surrogate id and the separate UNIQUE index go away: the key is
+    stored once and a point lookup walks a single B-tree. Columns added by
+    later migrations are carried over, as are explicitly created indexes.
+
+    Returns:
+        True if the table was rebuilt, False if it was already compact
+    """
+    if is_compact(conn, table):
+        return False
+
+    key = TABLE_COLUMNS[table][0]
+    columns = [(name, col_type) for _, name, col_type, *_ in conn.execute(f'PRAGMA table_info({table})')
+               if name != 'id']
+    names = ', '.join(name for name, _ in columns)
+    definitions = ', '.join(
+        f'{name} {col_type} PRIMARY KEY NOT NULL' if name == key else f'{name} {col_type}'
+        for name, col_type in columns
+    )
+    indexes = [sql for (sql,) in conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+        (table,)
+    )]
+
+    conn.execute('BEGIN')
+    try:
+        conn.execute(f'CREATE TABLE {table}_compact ({definitions}) WITHOUT ROWID')
+        conn.execute(f'INSERT INTO {table}_compact ({names}) SELECT {names} FROM {table} ORDER BY {key}')
+        conn.execute(f'DROP TABLE {table}')
+        conn.execute(f'ALTER TABLE {table}_compact RENAME TO {table}')
+        for sql in indexes:
+            conn.execute(sql)
+        conn.execute('DELETE FROM sqlite_sequence WHERE name = ?', (table,))
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+    return True
+
+
+def rebuild_aggregates(conn: sqlite3.Connection, table: str):
+    """Recount record_stats for table from scratch (the caller owns the transaction)"""
+    conn.execute('DELETE FROM record_stats WHERE table_name = ?', (table,))
+    for statement in aggregate_backfill(table):
+        conn.execute(statement)
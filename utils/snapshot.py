@@ -0,0 +1,179 @@
+"""
+Lookup Snapshots
+Immutable, sorted, memory-mapped copies of the record tables for fast
+read-only point lookups. The SQLite database stays the source of truth;
+snapshots are rebuilt from it on demand.
+
+File layout (little-endian):
+    magic      8 bytes  b'PLSNAP1\\0'
+    header_len uint32   length of the JSON header that follows
+    header     JSON     {"table", "fields", "key_width", "count", "built_at"}
+    keys       count * key_width bytes, sorted, NUL-padded
+    offsets    (count + 1) * uint64, start of each record in the blob
+    blob       JSON-encoded value lists, one per record
+"""
+
+import os
+import json
+import mmap
+import time
+import bisect
+import shutil
+import sqlite3
+import struct
+from typing import Dict, Iterable, List, Optional
+
+from utils.db_schema import TABLE_COLUMNS
+
+MAGIC = b'PLSNAP1\0'
+_PREFIX = struct.Struct('<8sI')
+_OFFSET = struct.Struct('<Q')
+_RANGE = struct.Struct('<QQ')
+
+# Keys per block of the in-memory sparse index
+INDEX_STEP = 128
+
+
+def snapshot_path(db_path: str, table: str) -> str:
+    """Snapshot file for a table, stored next to its database"""
+    return f"{os.path.splitext(db_path)[0]}.{table}.snap"
+
+
+def build_snapshot(conn: sqlite3.Connection, table: str, path: str) -> int:
+    """
+    Write a snapshot of table to path (atomically replacing any old one)
+
+    Returns:
+        Number of records written
+    """
+    columns = TABLE_COLUMNS[table]
+    key = columns[0]
+    fields = list(columns) + ['last_updated']
+    count, key_width = conn.execute(
+        f'SELECT COUNT(*), COALESCE(MAX(LENGTH(CAST({key} AS BLOB))), 0) FROM {table}'
+    ).fetchone()
+
+    keys = bytearray()
+    offsets = bytearray(_OFFSET.pack(0))
+    blob_path = path + '.blob'
+    position = 0
+    # BINARY collation orders keys the same way as their padded UTF-8 bytes
+    cursor = conn.execute(f"SELECT {', '.join(fields)} FROM {table} ORDER BY {key}")
+    with open(blob_path, 'wb') as blob:
+        for row in cursor:
+            keys += str(row[0]).encode('utf-8').ljust(key_width, b'\0')
+            data = json.dumps(row[1:], ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            blob.write(data)
+            position += len(data)
+            offsets += _OFFSET.pack(position)
+
+    header = json.dumps({
+        'table': table,
+        'fields': fields,
+        'key_width': key_width,
+        'count': count,
+        'built_at': time.strftime("%Y-%m-%d %H:%M:%S"),
+    }).encode('utf-8')
+
+    tmp_path = path + '.tmp'
+    try:
+        with open(tmp_path, 'wb') as f, open(blob_path, 'rb') as blob:
+            f.write(_PREFIX.pack(MAGIC, len(header)))
+            f.write(header)
+            f.write(keys)
+            f.write(offsets)
+            shutil.copyfileobj(blob, f)
+        os.replace(tmp_path, path)
+    finally:
+        os.remove(blob_path)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return count
+
+
+class Snapshot:
+    """
+    Read-only, memory-mapped snapshot serving lookups by binary search
+
+    A sparse in-memory index (every INDEX_STEP-th key) is bisected to pick a
+    block, which is then searched directly in the mapping, so a lookup
+    allocates little beyond the probe key and the returned record.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_len = _PREFIX.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f"{path} is not a lookup snapshot")
+
+        header = json.loads(self._mm[_PREFIX.size:_PREFIX.size + header_len])
+        self.table = header['table']
+        self.fields = header['fields']
+        self.built_at = header['built_at']
+        self.key_width = header['key_width']
+        self.count = header['count']
+
+        self._keys_start = _PREFIX.size + header_len
+        self._offsets_start = self._keys_start + self.count * self.key_width
+        self._blob_start = self._offsets_start + (self.count + 1) * _OFFSET.size
+        # First key of every INDEX_STEP block; bisecting this list runs in C.
+        # An empty table has key_width 0 and therefore no blocks at all.
+        self._sparse = []
+        if self.count:
+            block_bytes = INDEX_STEP * self.key_width
+            self._sparse = [self._mm[start:start + self.key_width]
+                            for start in range(self._keys_start, self._offsets_start, block_bytes)]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _index(self, key: str) -> int:
+        """Position of key in the snapshot, or -1"""
+        encoded = key.encode('utf-8')
+        if not self.count or len(encoded) > self.key_width:
+            return -1
+        probe = encoded.ljust(self.key_width, b'\0')
+        block = bisect.bisect_right(self._sparse, probe) - 1
+        if block < 0:
+            return -1
+
+        # Scan the block in place; only matches on a key boundary count
+        start = self._keys_start + block * INDEX_STEP * self.key_width
+        end = min(start + INDEX_STEP * self.key_width, self._offsets_start)
+        pos = self._mm.find(probe, start, end)
+        while pos >= 0 and (pos - self._keys_start) % self.key_width:
+            pos = self._mm.find(probe, pos + 1, end)
+        return -1 if pos < 0 else (pos - self._keys_start) // self.key_width
+
+    def __contains__(self, key: str) -> bool:
+        return self._index(key) >= 0
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Record for key, or None if the snapshot does not contain it"""
+        index = self._index(key)
+        if index < 0:
+            return None
+        start, end = _RANGE.unpack_from(self._mm, self._offsets_start + index * _OFFSET.size)
+        values = json.loads(self._mm[self._blob_start + start:self._blob_start + end])
+        record = {self.fields[0]: key}
+        record.update(zip(self.fields[1:], values))
+        return record
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Dict]:
+        """Records for every key present in the snapshot"""
+        found = {}
+        for key in keys:
+            record = self.get(key)
+            if record is not None:
+                found[key] = record
+        return found
+
+    def contains_many(self, keys: Iterable[str]) -> List[bool]:
+        """Membership of each key, in order"""
+        return [self._index(key) >= 0 for key in keys]
+
+    def close(self):
+        self._mm.close()